@@ -0,0 +1,30 @@
+"""add client vector targets
+
+Revision ID: 8e2d6b4f1c75
+Revises: 4c9d1f7b2a68
+Create Date: 2026-10-19 18:05:12.730164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8e2d6b4f1c75'
+down_revision = '4c9d1f7b2a68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('clients', sa.Column('vector_index', sa.String(), nullable=True))
+    op.add_column('clients', sa.Column('vector_namespace', sa.String(), nullable=True))
+    op.add_column('clients', sa.Column('vector_migration_index', sa.String(), nullable=True))
+    op.add_column('clients', sa.Column('vector_migration_namespace', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('clients') as batch_op:
+        batch_op.drop_column('vector_migration_namespace')
+        batch_op.drop_column('vector_migration_index')
+        batch_op.drop_column('vector_namespace')
+        batch_op.drop_column('vector_index')
@@ -0,0 +1,30 @@
+"""add crawled page simhash
+
+Revision ID: e7b5a2c9f410
+Revises: c3e81f5a7d24
+Create Date: 2026-10-19 14:02:55.810362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7b5a2c9f410'
+down_revision = 'c3e81f5a7d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('crawled_pages', sa.Column('simhash', sa.String(length=16), nullable=True))
+    op.add_column('crawled_pages', sa.Column('duplicate_of', sa.String(), nullable=True))
+    # 0 on existing jobs, which the API reports as an integer
+    op.add_column('crawler_jobs', sa.Column('pages_duplicate', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('crawler_jobs') as batch_op:
+        batch_op.drop_column('pages_duplicate')
+    with op.batch_alter_table('crawled_pages') as batch_op:
+        batch_op.drop_column('duplicate_of')
+        batch_op.drop_column('simhash')
@@ -0,0 +1,28 @@
+"""add crawler job checkpoint
+
+Revision ID: 9a4f2d6b1e83
+Revises: 5d1c7a3e6f90
+Create Date: 2026-10-19 11:20:17.904655
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON
+
+# revision identifiers, used by Alembic.
+revision = '9a4f2d6b1e83'
+down_revision = '5d1c7a3e6f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('crawler_jobs', sa.Column('max_pages', sa.Integer(), nullable=True))
+    op.add_column('crawler_jobs', sa.Column('checkpoint', JSON, nullable=True))
+    op.add_column('crawler_jobs', sa.Column('checkpointed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('crawler_jobs', 'checkpointed_at')
+    op.drop_column('crawler_jobs', 'checkpoint')
+    op.drop_column('crawler_jobs', 'max_pages')
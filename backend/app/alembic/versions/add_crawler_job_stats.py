@@ -0,0 +1,24 @@
+"""add crawler job stats
+
+Revision ID: 2b8e4f1a9c37
+Revises: 7f3a5c6d8e2b
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON
+
+# revision identifiers, used by Alembic.
+revision = '2b8e4f1a9c37'
+down_revision = '7f3a5c6d8e2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('crawler_jobs', sa.Column('stats', JSON, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('crawler_jobs', 'stats')
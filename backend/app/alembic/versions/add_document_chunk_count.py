@@ -0,0 +1,28 @@
+"""add document chunk count and job result
+
+Revision ID: 4c9d1f7b2a68
+Revises: e7b5a2c9f410
+Create Date: 2026-10-19 16:20:41.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON
+
+# revision identifiers, used by Alembic.
+revision = '4c9d1f7b2a68'
+down_revision = 'e7b5a2c9f410'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('chunk_count', sa.Integer(), nullable=True))
+    op.add_column('background_jobs', sa.Column('result', JSON, nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('background_jobs') as batch_op:
+        batch_op.drop_column('result')
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('chunk_count')
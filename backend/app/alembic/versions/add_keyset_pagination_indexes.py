@@ -0,0 +1,37 @@
+"""add keyset pagination indexes
+
+Revision ID: 3b7e1d9a4c26
+Revises: 6a0e9c2d7f14
+Create Date: 2026-10-19 21:14:52.604113
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3b7e1d9a4c26'
+down_revision = '6a0e9c2d7f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Listings page on (created_at, id); documents are already covered by
+    # ix_documents_client_id_created_at. The session index gains id and
+    # replaces the one without it.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_clients_created_at_id', 'clients', ['created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_chat_messages_session_id_created_at_id', 'chat_messages',
+                        ['session_id', 'created_at', 'id'], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_chat_messages_session_id_created_at', table_name='chat_messages',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_chat_messages_session_id_created_at', 'chat_messages', ['session_id', 'created_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_chat_messages_session_id_created_at_id', table_name='chat_messages',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_clients_created_at_id', table_name='clients',
+                      postgresql_concurrently=True, if_exists=True)
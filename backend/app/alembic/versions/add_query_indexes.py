@@ -0,0 +1,39 @@
+"""add query indexes
+
+Revision ID: 6a0e9c2d7f14
+Revises: 1f6c3a9e8b52
+Create Date: 2026-10-19 20:03:27.918342
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6a0e9c2d7f14'
+down_revision = '1f6c3a9e8b52'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_documents_client_id_created_at', 'documents', ['client_id', 'created_at', 'id']),
+    ('ix_chat_sessions_client_id_start_time', 'chat_sessions', ['client_id', 'start_time']),
+    ('ix_chat_sessions_start_time', 'chat_sessions', ['start_time']),
+    ('ix_chat_messages_client_id_created_at', 'chat_messages', ['client_id', 'created_at']),
+    ('ix_chat_messages_created_at', 'chat_messages', ['created_at']),
+    ('ix_chat_messages_session_id_created_at', 'chat_messages', ['session_id', 'created_at']),
+    ('ix_crawled_pages_client_id_status_url', 'crawled_pages', ['client_id', 'status', 'url']),
+]
+
+
+def upgrade() -> None:
+    # clients.api_key is already indexed by its unique constraint.
+    # On Postgres the indexes are built concurrently, without blocking writes
+    # to the chat tables; that cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
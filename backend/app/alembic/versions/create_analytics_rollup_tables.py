@@ -0,0 +1,40 @@
+"""create analytics rollup tables
+
+Revision ID: 1f6c3a9e8b52
+Revises: 8e2d6b4f1c75
+Create Date: 2026-10-19 19:12:48.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '1f6c3a9e8b52'
+down_revision = '8e2d6b4f1c75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('analytics_hourly', 'analytics_daily'):
+        op.create_table(
+            table,
+            sa.Column('client_id', sa.String(), sa.ForeignKey('clients.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('messages', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('client_id', 'bucket_start')
+        )
+    op.create_table(
+        'analytics_rollup_state',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('rolled_up_until', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_rollup_state')
+    op.drop_table('analytics_daily')
+    op.drop_table('analytics_hourly')
@@ -0,0 +1,41 @@
+"""create background jobs table
+
+Revision ID: 5d1c7a3e6f90
+Revises: 2b8e4f1a9c37
+Create Date: 2026-10-19 10:03:41.552917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON
+
+# revision identifiers, used by Alembic.
+revision = '5d1c7a3e6f90'
+down_revision = '2b8e4f1a9c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('payload', JSON, nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_background_jobs_status_run_at', 'background_jobs', ['status', 'run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_background_jobs_status_run_at', table_name='background_jobs')
+    op.drop_table('background_jobs')
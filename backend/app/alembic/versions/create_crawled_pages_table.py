@@ -0,0 +1,64 @@
+"""create crawled pages table
+
+Revision ID: c3e81f5a7d24
+Revises: 9a4f2d6b1e83
+Create Date: 2026-10-19 12:41:09.377120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3e81f5a7d24'
+down_revision = '9a4f2d6b1e83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'crawled_pages',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('client_id', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('chunk_count', sa.Integer(), nullable=False),
+        sa.Column('content', sa.LargeBinary(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['crawler_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'url', name='uq_crawled_pages_job_url')
+    )
+    
+    # Counters start at 0 on existing jobs, which the API reports as integers
+    with op.batch_alter_table('crawler_jobs') as batch_op:
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('pages_crawled', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('pages_indexed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('chunks_indexed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('bytes_crawled', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Keep error messages of past jobs; their page lists are not migrated
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("UPDATE crawler_jobs SET error = result_data->>'error' WHERE result_data IS NOT NULL")
+    else:
+        op.execute("UPDATE crawler_jobs SET error = json_extract(result_data, '$.error') WHERE result_data IS NOT NULL")
+    
+    with op.batch_alter_table('crawler_jobs') as batch_op:
+        batch_op.drop_column('result_data')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('crawler_jobs') as batch_op:
+        batch_op.add_column(sa.Column('result_data', sa.JSON(), nullable=True))
+        batch_op.drop_column('bytes_crawled')
+        batch_op.drop_column('chunks_indexed')
+        batch_op.drop_column('pages_indexed')
+        batch_op.drop_column('pages_crawled')
+        batch_op.drop_column('error')
+    op.drop_table('crawled_pages')
@@ -0,0 +1,110 @@
+"""partition chat_messages by month
+
+Revision ID: 9d4a2f6e1b83
+Revises: 3b7e1d9a4c26
+Create Date: 2026-10-19 22:05:31.447920
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9d4a2f6e1b83'
+down_revision = '3b7e1d9a4c26'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_chat_messages_client_id_created_at', ['client_id', 'created_at']),
+    ('ix_chat_messages_created_at', ['created_at']),
+    ('ix_chat_messages_session_id_created_at_id', ['session_id', 'created_at', 'id']),
+]
+
+# Partitions are created up to this many months ahead; the archive job keeps extending them
+MONTHS_AHEAD = 2
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month):
+    return _month_start(month + timedelta(days=32))
+
+
+def _is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('chat_messages')"
+    )).first() is not None
+
+
+def _create_table(partitioned):
+    op.execute(f"""
+        CREATE TABLE chat_messages (
+            id VARCHAR NOT NULL,
+            client_id VARCHAR NOT NULL REFERENCES clients (id),
+            session_id VARCHAR NOT NULL REFERENCES chat_sessions (id),
+            user_message TEXT NOT NULL,
+            bot_response TEXT NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY ({'id, created_at' if partitioned else 'id'})
+        ){' PARTITION BY RANGE (created_at)' if partitioned else ''}
+    """)
+    for name, columns in INDEXES:
+        op.create_index(name, 'chat_messages', columns)
+
+
+def _rename_old_table():
+    op.execute("ALTER TABLE chat_messages RENAME TO chat_messages_old")
+    op.execute("ALTER TABLE chat_messages_old RENAME CONSTRAINT chat_messages_pkey TO chat_messages_old_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+
+
+def upgrade() -> None:
+    # Only Postgres has declarative partitioning; elsewhere the table stays as it is
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or _is_partitioned(bind):
+        return
+
+    # Rewrites the table under an exclusive lock: run in a maintenance window on large installs
+    _rename_old_table()
+    op.execute("UPDATE chat_messages_old SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+    _create_table(partitioned=True)
+    op.execute("CREATE TABLE chat_messages_default PARTITION OF chat_messages DEFAULT")
+
+    first = bind.execute(sa.text("SELECT min(created_at) FROM chat_messages_old")).scalar()
+    now = datetime.utcnow()
+    month = _month_start(first or now)
+    last = _month_start(now)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE chat_messages_p{month:%Y_%m} PARTITION OF chat_messages "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+        )
+        month = _next_month(month)
+
+    op.execute(
+        "INSERT INTO chat_messages (id, client_id, session_id, user_message, bot_response, created_at) "
+        "SELECT id, client_id, session_id, user_message, bot_response, created_at FROM chat_messages_old"
+    )
+    op.execute("DROP TABLE chat_messages_old")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _is_partitioned(bind):
+        return
+
+    _rename_old_table()
+    _create_table(partitioned=False)
+    op.execute(
+        "INSERT INTO chat_messages (id, client_id, session_id, user_message, bot_response, created_at) "
+        "SELECT id, client_id, session_id, user_message, bot_response, created_at FROM chat_messages_old"
+    )
+    # Drops the partitions with it
+    op.execute("DROP TABLE chat_messages_old")
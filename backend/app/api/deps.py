@@ -1,17 +1,21 @@
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.database.session import get_db
-from app.database.crud import get_client_by_api_key
-from app.database.models import Client
+from app.database.session import get_async_db, get_db
+from app.core.auth_cache import ClientRecord, client_cache
+from app.database.pagination import Cursor, decode_cursor
 
 def get_current_client(
     api_key: str = Header(..., description="Client API key"),
     db: Session = Depends(get_db)
-):
-    """Dependency to get the current client from the API key."""
-    client = get_client_by_api_key(db, api_key)
+) -> ClientRecord:
+    """
+    Dependency to get the current client from the API key. Clients are
+    cached (see app.core.auth_cache), so most requests skip the database.
+    """
+    client = client_cache.get_client(db, api_key)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,3 +23,28 @@ def get_current_client(
             headers={"WWW-Authenticate": "ApiKey"},
         )
     return client
+
+async def get_current_client_async(
+    api_key: str = Header(..., description="Client API key"),
+    db: AsyncSession = Depends(get_async_db)
+) -> ClientRecord:
+    """get_current_client for routes that use an AsyncSession."""
+    client = await client_cache.aget_client(db, api_key)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+    return client
+
+def get_cursor(
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page")
+) -> Optional[Cursor]:
+    """Dependency decoding the position a paginated listing continues from."""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
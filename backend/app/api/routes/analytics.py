@@ -1,28 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import logging
 
-from app.database.session import get_db
-from app.database.crud import get_client_analytics, save_analytics_snapshot
+from app.database.session import get_async_db
+from app.database.async_crud import get_client_analytics, save_analytics_snapshot
 from app.database.models import Client, ChatSession, ChatMessage
-from app.api.deps import get_current_client
+from app.api.deps import get_current_client_async
+from app.core.analytics import Bucket, series
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/summary")
 async def get_analytics_summary(
-    days: Optional[int] = Query(30, description="Number of days to include in summary"), 
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+    days: int = Query(30, ge=1, description="Number of days to include in summary"),
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get analytics summary for the dashboard.
     """
     try:
-        analytics = get_client_analytics(db=db, client_id=current_client.id, days=days)
+        analytics = await get_client_analytics(db=db, client_id=current_client.id, days=days)
         return analytics
     except Exception as e:
         logger.error(f"Error in analytics summary: {str(e)}")
@@ -32,74 +33,36 @@ async def get_analytics_summary(
         )
 
 @router.get("/sessions/daily")
-def get_daily_sessions(
-    days: int = 30,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+async def get_daily_sessions(
+    days: int = Query(30, ge=1, description="Number of days to include"),
+    bucket: Bucket = Query(Bucket.DAY, description="Bucket size: hour, day or week"),
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get daily session counts for the specified number of days."""
-    date_from = datetime.utcnow() - timedelta(days=days)
-    
-    # Query to get daily session counts
-    daily_sessions = []
-    current_date = date_from
-    
-    while current_date <= datetime.utcnow():
-        next_date = current_date + timedelta(days=1)
-        
-        # Count sessions for this day
-        session_count = db.query(ChatSession).filter(
-            ChatSession.client_id == current_client.id,
-            ChatSession.start_time >= current_date,
-            ChatSession.start_time < next_date
-        ).count()
-        
-        daily_sessions.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "count": session_count
-        })
-        
-        current_date = next_date
-    
-    return daily_sessions
+    """Get session counts per bucket (daily by default) for the specified number of days."""
+    try:
+        return await db.run_sync(series, current_client.id, "sessions", days, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/messages/daily")
-def get_daily_messages(
-    days: int = 30,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+async def get_daily_messages(
+    days: int = Query(30, ge=1, description="Number of days to include"),
+    bucket: Bucket = Query(Bucket.DAY, description="Bucket size: hour, day or week"),
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get daily message counts for the specified number of days."""
-    date_from = datetime.utcnow() - timedelta(days=days)
-    
-    # Query to get daily message counts
-    daily_messages = []
-    current_date = date_from
-    
-    while current_date <= datetime.utcnow():
-        next_date = current_date + timedelta(days=1)
-        
-        # Count messages for this day
-        message_count = db.query(ChatMessage).filter(
-            ChatMessage.client_id == current_client.id,
-            ChatMessage.created_at >= current_date,
-            ChatMessage.created_at < next_date
-        ).count()
-        
-        daily_messages.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "count": message_count
-        })
-        
-        current_date = next_date
-    
-    return daily_messages
+    """Get message counts per bucket (daily by default) for the specified number of days."""
+    try:
+        return await db.run_sync(series, current_client.id, "messages", days, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/snapshot")
-def create_analytics_snapshot(
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+async def create_analytics_snapshot(
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a snapshot of current analytics."""
-    snapshot = save_analytics_snapshot(db=db, client_id=current_client.id)
+    snapshot = await save_analytics_snapshot(db=db, client_id=current_client.id)
     return {"message": "Analytics snapshot created successfully"}
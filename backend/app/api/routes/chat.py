@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime, timedelta
 
-from app.database.session import get_db
-from app.database.crud import (
+from app.database.session import get_async_db
+from app.database.async_crud import (
     create_chat_session, get_chat_session, end_chat_session,
     create_chat_message, get_chat_messages_by_session
 )
@@ -11,9 +13,14 @@ from app.api.schemas.chat import (
     ChatSession, ChatMessage, ChatRequest, ChatResponse
 )
 from app.database.models import Client
-from app.api.deps import get_current_client
+from app.api.deps import get_current_client_async, get_cursor
+from app.database.pagination import NEXT_CURSOR_HEADER, Cursor
 from app.core.chatbot import ChatbotEngine
 from app.core.vector_store import VectorStore
+from app.core.vector_routing import read_target
+from app.core.chat_buffer import chat_buffer
+from app.core.export import ExportFormat, MEDIA_TYPES, as_naive_utc, iter_export
+from app.config import settings
 
 router = APIRouter()
 
@@ -21,24 +28,34 @@ router = APIRouter()
 vector_store = VectorStore()
 chatbot_engine = ChatbotEngine(vector_store)
 
+async def session_owner(db: AsyncSession, session_id: str) -> Optional[str]:
+    """Client id of a chat session, including one still waiting in the write buffer."""
+    pending = chat_buffer.pending_session(session_id)
+    if pending is not None:
+        return pending["client_id"]
+    session = await get_chat_session(db=db, session_id=session_id)
+    return session.client_id if session else None
+
 @router.post("/", response_model=ChatResponse)
-def chat(
+async def chat(
     chat_request: ChatRequest,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Create or get session
     session_id = chat_request.session_id
     if not session_id:
-        session = create_chat_session(
-            db=db, 
-            client_id=current_client.id, 
-            user_id=chat_request.user_id
-        )
-        session_id = session.id
+        if settings.CHAT_WRITE_BUFFER_ENABLED:
+            session_id = await chat_buffer.add_session(current_client.id, chat_request.user_id)
+        else:
+            session = await create_chat_session(
+                db=db, 
+                client_id=current_client.id, 
+                user_id=chat_request.user_id
+            )
+            session_id = session.id
     else:
-        session = get_chat_session(db=db, session_id=session_id)
-        if not session or session.client_id != current_client.id:
+        if await session_owner(db, session_id) != current_client.id:
             raise HTTPException(status_code=404, detail="Chat session not found")
     
     # Get client info for context
@@ -47,13 +64,18 @@ def chat(
         "website_url": current_client.website_url
     }
     
+    # Read from the client's current namespace (it moves after an embedding migration)
+    target = read_target(current_client)
+    
     try:
         # Get response from chatbot
-        response_text = chatbot_engine.get_response(
+        response_text = await chatbot_engine.aget_response(
             query=chat_request.message,
             client_id=current_client.id,
             client_info=client_info,
-            session_id=session_id
+            session_id=session_id,
+            index_name=target.index_name,
+            namespace=target.namespace
         )
     except Exception as e:
         print(f"Error generating response: {str(e)}")
@@ -62,6 +84,11 @@ def chat(
             detail=f"Error generating response: {str(e)}"
         )
     
+    if settings.CHAT_WRITE_BUFFER_ENABLED:
+        # Written in the next batch; the response doesn't wait for the commit
+        await chat_buffer.add_message(current_client.id, session_id, chat_request.message, response_text)
+        return ChatResponse(message=response_text, session_id=session_id)
+    
     # Make sure to use ChatMessageCreate properly
     from app.api.schemas.chat import ChatMessageCreate
     
@@ -74,45 +101,82 @@ def chat(
     )
     
     # Store chat message
-    create_chat_message(db=db, chat_message=chat_message)
+    await create_chat_message(db=db, chat_message=chat_message)
     
     return ChatResponse(message=response_text, session_id=session_id)
 
 @router.get("/sessions/{session_id}", response_model=ChatSession)
-def get_session(
+async def get_session(
     session_id: str,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a chat session by ID."""
-    session = get_chat_session(db=db, session_id=session_id)
+    # Include this process's turns that are still buffered
+    await chat_buffer.flush()
+    session = await get_chat_session(db=db, session_id=session_id)
     if not session or session.client_id != current_client.id:
         raise HTTPException(status_code=404, detail="Chat session not found")
     return session
 
 @router.post("/sessions/{session_id}/end", response_model=ChatSession)
-def end_session(
+async def end_session(
     session_id: str,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """End a chat session."""
-    session = get_chat_session(db=db, session_id=session_id)
+    await chat_buffer.flush()
+    session = await get_chat_session(db=db, session_id=session_id)
     if not session or session.client_id != current_client.id:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
-    return end_chat_session(db=db, session_id=session_id)
+    return await end_chat_session(db=db, session_id=session_id)
 
 @router.get("/sessions/{session_id}/messages", response_model=List[ChatMessage])
-def get_session_messages(
+async def get_session_messages(
     session_id: str,
-    current_client: Client = Depends(get_current_client),
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=1000),
+    current_client: Client = Depends(get_current_client_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all messages for a chat session."""
-    session = get_chat_session(db=db, session_id=session_id)
+    """
+    Get a page of a chat session's messages, oldest first. Pass the
+    X-Next-Cursor response header as `cursor` for the next page.
+    """
+    await chat_buffer.flush()
+    session = await get_chat_session(db=db, session_id=session_id)
     if not session or session.client_id != current_client.id:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
-    messages = get_chat_messages_by_session(db=db, session_id=session_id)
-    return messages
+    page = await get_chat_messages_by_session(db=db, session_id=session_id, after=cursor, limit=limit)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+@router.get("/export")
+async def export_messages(
+    start: Optional[datetime] = Query(None, description="Inclusive, UTC; defaults to 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Exclusive, UTC; defaults to now"),
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson or csv"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+    current_client: Client = Depends(get_current_client_async)
+):
+    """
+    Export the current client's chat messages, with their sessions, as a
+    streamed file. Memory use does not grow with the size of the export.
+    """
+    end = as_naive_utc(end) if end else datetime.utcnow()
+    start = as_naive_utc(start) if start else end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    await chat_buffer.flush()
+
+    file_name = f"chat-export-{start:%Y%m%d}-{end:%Y%m%d}.{format.value}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        iter_export(current_client.id, start, end, format, compress=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
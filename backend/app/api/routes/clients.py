@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime, timedelta
 
 from app.database.session import get_db
 from app.database.crud import (
-    create_client, get_client, get_clients, update_client, delete_client
+    create_client, get_client, get_clients, update_client, deactivate_client
 )
 from app.api.schemas.client import (
-    Client, ClientCreate, ClientUpdate
+    Client, ClientCreate, ClientDeletion, ClientUpdate
 )
-from app.api.deps import get_current_client
+from app.api.deps import get_current_client, get_cursor
+from app.database.pagination import NEXT_CURSOR_HEADER, Cursor
+from app.core.auth_cache import client_cache
+from app.core.job_queue import enqueue
+from app.core.vector_routing import write_targets
 
 router = APIRouter()
 
+# Extra wait before a deleted client's data is removed, for chat turns other processes still buffer
+DELETION_MARGIN_SECONDS = 5
+
 @router.post("/", response_model=Client, status_code=status.HTTP_201_CREATED)
 def create_new_client(
     client: ClientCreate,
@@ -23,13 +31,16 @@ def create_new_client(
 
 @router.get("/", response_model=List[Client])
 def read_clients(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
-    """Get all clients."""
-    clients = get_clients(db, skip=skip, limit=limit)
-    return clients
+    """Get a page of clients; pass the X-Next-Cursor response header as `cursor` for the next page."""
+    page = get_clients(db, after=cursor, limit=limit)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/me", response_model=Client)
 def read_client_me(
@@ -62,16 +73,24 @@ def update_client_info(
         raise HTTPException(status_code=404, detail="Client not found")
     return update_client(db=db, client_id=client_id, client=client)
 
-@router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{client_id}", response_model=ClientDeletion, status_code=status.HTTP_202_ACCEPTED)
 def delete_client_by_id(
     client_id: str,
     db: Session = Depends(get_db)
 ):
-    """Delete a client."""
+    """
+    Delete a client. Its API key is refused at once by this process and by
+    the others once their cached copy expires (AUTH_CACHE_TTL_SECONDS, at
+    once with AUTH_CACHE_REDIS_URL). Its data and vectors are removed after
+    that by a background job, whose id is returned.
+    """
     db_client = get_client(db, client_id=client_id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found")
-    success = delete_client(db=db, client_id=client_id)
-    if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete client")
-    return None
+    # Including the target of an embedding migration in progress
+    targets = [target._asdict() for target in write_targets(db_client)]
+    # The delay covers other processes' auth-cache staleness plus a margin for the chat turns they still buffer
+    run_at = datetime.utcnow() + timedelta(seconds=client_cache.max_staleness + DELETION_MARGIN_SECONDS)
+    job = enqueue(db, "delete_client", {"client_id": client_id, "targets": targets}, run_at=run_at, commit=False)
+    deactivate_client(db=db, client_id=client_id)
+    return ClientDeletion(client_id=client_id, job_id=job.id)
@@ -1,26 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime  # Added missing import
 
 from app.api.deps import get_db
+from app.config import settings
 from app.database import models
-from app.schemas.crawlers import CrawlerCreate, CrawlerResponse, CrawlerStatus
-from app.core.crawler import crawl_website  # Import existing crawler function
+from app.schemas.crawlers import (
+    CrawlerCreate, CrawlerResponse, CrawlerStatus, CrawledPageResponse, CrawledPageDetail
+)
+from app.core.job_queue import enqueue
 
 router = APIRouter()
 
 @router.post("/{client_id}/crawl", response_model=CrawlerResponse)
 def initiate_crawl(
     client_id: UUID,
-    background_tasks: BackgroundTasks,
     url: Optional[str] = None,
+    max_pages: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGES_PER_CRAWL_LIMIT),
     db: Session = Depends(get_db)
 ):
     """
     Initiate a crawler job for a specific client.
     Optionally provide a specific URL to crawl, otherwise uses client's website URL.
+    max_pages overrides the default MAX_PAGES_PER_CRAWL for large sites; it caps
+    fetches, so failed and retried requests count towards it too.
     """
     # Check if client exists
     client = db.query(models.Client).filter(models.Client.id == str(client_id)).first()
@@ -39,27 +43,18 @@ def initiate_crawl(
     crawler_job = models.CrawlerJob(
         client_id=str(client_id),
         url=crawl_url,
-        status=CrawlerStatus.PENDING.value
+        status=CrawlerStatus.PENDING.value,
+        max_pages=max_pages
     )
     db.add(crawler_job)
+    db.flush()
+    
+    # Hand the crawl to the worker processes
+    enqueue(db, "crawl", {"crawler_job_id": crawler_job.id}, commit=False)
     db.commit()
     db.refresh(crawler_job)
     
-    # Start the crawler job in the background using the existing crawler function
-    background_tasks.add_task(
-        process_crawl_job, 
-        job_id=crawler_job.id,
-        url=crawl_url, 
-        db=db
-    )
-    
-    return CrawlerResponse(
-        id=crawler_job.id,
-        client_id=str(client_id),
-        url=crawl_url,
-        status=crawler_job.status,
-        created_at=crawler_job.created_at
-    )
+    return crawler_job
 
 @router.get("/{client_id}/jobs", response_model=List[CrawlerResponse])
 def get_client_crawl_jobs(
@@ -79,30 +74,48 @@ def get_client_crawl_jobs(
     
     return jobs
 
-async def process_crawl_job(job_id: str, url: str, db: Session) -> None:
-    """
-    Process a crawl job using the existing crawler functionality.
-    """
-    try:
-        # Update status to running
-        job = db.query(models.CrawlerJob).filter(models.CrawlerJob.id == job_id).first()
-        job.status = CrawlerStatus.RUNNING.value
-        db.commit()
-        
-        # Use the existing crawler function to crawl the website
-        result = crawl_website(url)
-        
-        # Update job with results
-        job = db.query(models.CrawlerJob).filter(models.CrawlerJob.id == job_id).first()
-        job.status = CrawlerStatus.COMPLETED.value
-        job.completed_at = datetime.utcnow()
-        job.result_data = result
-        db.commit()
-        
-    except Exception as e:
-        # Update job with failure status
-        job = db.query(models.CrawlerJob).filter(models.CrawlerJob.id == job_id).first()
-        job.status = CrawlerStatus.FAILED.value
-        job.completed_at = datetime.utcnow()
-        job.result_data = {"error": str(e)}
-        db.commit()
+def get_client_crawl_job(db: Session, client_id: UUID, job_id: str) -> models.CrawlerJob:
+    """Get a crawler job that belongs to the client or raise 404."""
+    job = db.query(models.CrawlerJob).filter(
+        models.CrawlerJob.id == job_id,
+        models.CrawlerJob.client_id == str(client_id)
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Crawler job not found")
+    return job
+
+@router.get("/{client_id}/jobs/{job_id}/pages", response_model=List[CrawledPageResponse])
+def get_crawl_job_pages(
+    client_id: UUID,
+    job_id: str,
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    db: Session = Depends(get_db)
+):
+    """List the pages of a crawler job without their content."""
+    get_client_crawl_job(db, client_id, job_id)
+    
+    pages = db.query(models.CrawledPage).filter(
+        models.CrawledPage.job_id == job_id
+    ).order_by(models.CrawledPage.created_at).offset(skip).limit(limit).all()
+    
+    return pages
+
+@router.get("/{client_id}/jobs/{job_id}/pages/{page_id}", response_model=CrawledPageDetail)
+def get_crawl_job_page(
+    client_id: UUID,
+    job_id: str,
+    page_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a single crawled page including its decompressed content."""
+    get_client_crawl_job(db, client_id, job_id)
+    
+    page = db.query(models.CrawledPage).filter(
+        models.CrawledPage.id == page_id,
+        models.CrawledPage.job_id == job_id
+    ).first()
+    if not page:
+        raise HTTPException(status_code=404, detail="Crawled page not found")
+    
+    return page
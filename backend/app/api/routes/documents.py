@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from typing import AsyncIterator, List, Optional
+import aiofiles
+import json
+import os
+import uuid
 
+from app.config import settings
 from app.database.session import get_db
 from app.database.crud import (
     create_document, get_document, get_documents_by_client,
-    update_document, delete_document
+    update_document, delete_document, insert_documents
 )
 from app.api.schemas.document import (
-    Document as DocumentSchema, DocumentCreate, DocumentUpdate
+    Document as DocumentSchema, DocumentCreate, DocumentSummary, DocumentUpdate, BulkDocumentResponse,
+    FileUploadResponse
 )
 from app.database.models import Client, Document
-from app.api.deps import get_current_client
-from app.core.document_processor import DocumentProcessor
-from app.core.vector_store import VectorStore
+from app.api.deps import get_current_client, get_cursor
+from app.database.pagination import NEXT_CURSOR_HEADER, Cursor
+from app.core.job_queue import enqueue
+from app.core.file_extractors import SUPPORTED_EXTENSIONS
 
 router = APIRouter()
 
@@ -22,58 +33,9 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-@router.get("/")
-def get_documents(db: Session = Depends(get_db)):
-    try:
-        # Log attempt to fetch documents
-        logger.debug("Attempting to fetch documents from database")
-        
-        # Fixed code - use the SQLAlchemy Document model instead of Pydantic schema
-        documents = db.query(Document).all()
-        
-        logger.debug(f"Retrieved {len(documents)} documents")
-        return documents
-    except Exception as e:
-        # Log the error
-        logger.error(f"Error fetching documents: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
-    
-# Initialize services
-document_processor = DocumentProcessor()
-vector_store = VectorStore()
-
-def process_document_in_background(document_id: str, client_id: str, db: Session):
-    """Process a document in the background and store in vector database."""
-    # Get document from database
-    db_document = get_document(db, document_id)
-    if not db_document:
-        print(f"Document {document_id} not found")
-        return
-    
-    # Process the document into chunks
-    processed_chunks = document_processor.process_document(
-        {
-            "id": db_document.id,
-            "title": db_document.title,
-            "content": db_document.content,
-            "url": db_document.url
-        },
-        client_id
-    )
-    
-    # Store in vector database
-    texts = [chunk["content"] for chunk in processed_chunks]
-    metadatas = [chunk["metadata"] for chunk in processed_chunks]
-    vector_store.add_texts(texts, metadatas, client_id=client_id)
-    
-    # Update document with vector ID
-    db_document.vector_id = f"processed_{document_id}"
-    db.commit()
-
 @router.post("/", response_model=DocumentSchema, status_code=status.HTTP_201_CREATED)
 def create_new_document(
     document: DocumentCreate,
-    background_tasks: BackgroundTasks,
     current_client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
@@ -81,28 +43,227 @@ def create_new_document(
     # Create document in database
     db_document = create_document(db=db, document=document, client_id=current_client.id)
     
-    # Process document in background
-    background_tasks.add_task(
-        process_document_in_background, 
-        document_id=db_document.id, 
-        client_id=current_client.id,
-        db=db
-    )
+    # Process document in the background workers
+    enqueue(db, "process_document", {"document_id": db_document.id, "client_id": current_client.id})
     
     return db_document
 
-@router.get("/", response_model=List[DocumentSchema])
+async def iter_ndjson_documents(request: Request) -> AsyncIterator[DocumentCreate]:
+    """Parse documents from an NDJSON request body as it streams in."""
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes) -> Optional[DocumentCreate]:
+        if not line.strip():
+            return None
+        try:
+            return DocumentCreate(**json.loads(line))
+        except (ValueError, TypeError, ValidationError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid document on line {line_number}: {e}"
+            )
+
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            document = parse(line)
+            if document:
+                yield document
+    line_number += 1
+    document = parse(buffer)
+    if document:
+        yield document
+
+async def iter_multipart_documents(request: Request) -> AsyncIterator[DocumentCreate]:
+    """One document per uploaded text file, titled with its file name."""
+    # Starlette spools each file to disk while parsing, so large uploads are not held in memory
+    form = await request.form(max_files=settings.BULK_MAX_FILES)
+    try:
+        for _, value in form.multi_items():
+            if not isinstance(value, StarletteUploadFile):
+                continue
+            try:
+                content = (await value.read()).decode("utf-8")
+            except UnicodeDecodeError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"File '{value.filename}' is not UTF-8 text"
+                )
+            yield DocumentCreate(title=value.filename or "untitled", content=content)
+    finally:
+        await form.close()
+
+@router.post("/bulk", response_model=BulkDocumentResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_documents_bulk(
+    request: Request,
+    current_client: Client = Depends(get_current_client),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many documents in one request and index them with a single
+    background job.
+
+    The body is either NDJSON (one document object per line, as for
+    POST /api/documents/) or multipart/form-data with one text file per
+    document. Documents are inserted in batches within one transaction.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        documents = iter_multipart_documents(request)
+    elif content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        documents = iter_ndjson_documents(request)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/x-ndjson or multipart/form-data"
+        )
+
+    document_ids: List[str] = []
+    batch: List[DocumentCreate] = []
+    try:
+        async for document in documents:
+            batch.append(document)
+            if len(batch) >= settings.BULK_INSERT_BATCH_SIZE:
+                document_ids += await run_in_threadpool(insert_documents, db, batch, current_client.id)
+                batch = []
+        document_ids += await run_in_threadpool(insert_documents, db, batch, current_client.id)
+
+        if not document_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No documents in request")
+
+        # Commits the documents and the job together
+        job = await run_in_threadpool(
+            enqueue, db, "process_documents", {"document_ids": document_ids, "client_id": current_client.id}
+        )
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        raise
+
+    return BulkDocumentResponse(count=len(document_ids), document_ids=document_ids, job_id=job.id)
+
+async def iter_limited_body(request: Request) -> AsyncIterator[bytes]:
+    """The request body as it streams in, cut off once it passes MAX_UPLOAD_BYTES."""
+    size = 0
+    async for data in request.stream():
+        size += len(data)
+        if size > settings.MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {settings.MAX_UPLOAD_BYTES} bytes"
+            )
+        yield data
+
+@router.post("/upload", response_model=FileUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_document_file(
+    request: Request,
+    current_client: Client = Depends(get_current_client),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a PDF, DOCX, HTML, Markdown or text file as a document.
+
+    The body is multipart/form-data with the file in a `file` field. It is
+    parsed here rather than by FastAPI so that MAX_UPLOAD_BYTES is enforced
+    while the body streams in, not after all of it has been spooled. The
+    upload is then copied to UPLOAD_DIR in fixed-size pieces; text
+    extraction, chunking and embedding run page by page in a background
+    worker.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {settings.MAX_UPLOAD_BYTES} bytes"
+        )
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Send the file as multipart/form-data in a 'file' field"
+        )
+
+    try:
+        form = await MultiPartParser(request.headers, iter_limited_body(request), max_files=1).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    try:
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Send the file as multipart/form-data in a 'file' field"
+            )
+        return await store_uploaded_file(file, current_client, db)
+    finally:
+        await form.close()
+
+async def store_uploaded_file(file: StarletteUploadFile, current_client: Client, db: Session) -> FileUploadResponse:
+    """Copy an upload to UPLOAD_DIR and enqueue the job that extracts and indexes it."""
+    file_name = os.path.basename(file.filename or "")
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported file type; expected one of {', '.join(SUPPORTED_EXTENSIONS)}"
+        )
+
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}{extension}")
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                data = await file.read(1024 * 1024)
+                if not data:
+                    break
+                size += len(data)
+                await out.write(data)
+
+        def create_file_document():
+            # The text is filled in by the worker once it has been extracted
+            document = Document(
+                client_id=current_client.id,
+                title=file_name,
+                content="",
+                document_metadata={"file_name": file_name, "content_type": file.content_type, "size": size}
+            )
+            db.add(document)
+            db.flush()
+            job = enqueue(db, "process_file", {
+                "document_id": document.id,
+                "client_id": current_client.id,
+                "path": path,
+                "file_name": file_name
+            })
+            return document.id, job.id
+
+        document_id, job_id = await run_in_threadpool(create_file_document)
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return FileUploadResponse(document_id=document_id, job_id=job_id, file_name=file_name, size=size)
+
+@router.get("/", response_model=List[DocumentSummary])
 def read_documents(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=1000),
     current_client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    """Get all documents for the current client."""
-    documents = get_documents_by_client(
-        db, client_id=current_client.id, skip=skip, limit=limit
-    )
-    return documents
+    """
+    Get a page of the current client's documents, without their content.
+    Pass the X-Next-Cursor response header as `cursor` for the next page.
+    """
+    page = get_documents_by_client(db, client_id=current_client.id, after=cursor, limit=limit)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/{document_id}", response_model=DocumentSchema)
 def read_document(
@@ -120,7 +281,6 @@ def read_document(
 def update_document_info(
     document_id: str,
     document: DocumentUpdate,
-    background_tasks: BackgroundTasks,
     current_client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
@@ -134,12 +294,7 @@ def update_document_info(
     
     # If content was updated, reprocess the document
     if document.content:
-        background_tasks.add_task(
-            process_document_in_background, 
-            document_id=document_id, 
-            client_id=current_client.id,
-            db=db
-        )
+        enqueue(db, "process_document", {"document_id": document_id, "client_id": current_client.id})
     
     return updated_document
 
@@ -158,6 +313,7 @@ def delete_document_by_id(
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete document")
     
-    # TODO: Remove from vector store as well
+    # Remove the document's chunks from the vector store
+    enqueue(db, "delete_vectors", {"client_id": current_client.id, "document_id": document_id})
     
     return None
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+import os
+
+from app.database.session import engine_pool_stats
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    """
+    Connection pool state and checkout metrics of the worker process that
+    serves the request. Every API process has its own pools, so poll
+    repeatedly (or per worker) to see all of them.
+    """
+    return {"pid": os.getpid(), **engine_pool_stats()}
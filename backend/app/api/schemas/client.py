@@ -30,3 +30,7 @@ class ClientWithStats(Client):
     total_documents: int
     total_sessions: int
     total_messages: int
+
+class ClientDeletion(BaseModel):
+    client_id: str
+    job_id: str
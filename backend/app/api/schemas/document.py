@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict, Any
+from pydantic import AliasChoices, BaseModel, Field, HttpUrl
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 class DocumentBase(BaseModel):
@@ -18,6 +18,10 @@ class DocumentUpdate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 class DocumentInDB(DocumentBase):
+    # The model's column is document_metadata (metadata is reserved by SQLAlchemy)
+    metadata: Optional[Dict[str, Any]] = Field(
+        default={}, validation_alias=AliasChoices("document_metadata", "metadata")
+    )
     id: str
     client_id: str
     created_at: datetime
@@ -28,3 +32,26 @@ class DocumentInDB(DocumentBase):
 
 class Document(DocumentInDB):
     pass
+
+class DocumentSummary(BaseModel):
+    """A document in listings, without its content."""
+    id: str
+    client_id: str
+    title: str
+    url: Optional[str] = None
+    vector_id: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class BulkDocumentResponse(BaseModel):
+    count: int
+    document_ids: List[str]
+    job_id: str
+
+class FileUploadResponse(BaseModel):
+    document_id: str
+    job_id: str
+    file_name: str
+    size: int
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -7,6 +8,18 @@ load_dotenv()
 class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./chatbot.db")
+    # Used by the async routes; derived from DATABASE_URL (asyncpg, aiosqlite) when empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Connection pool, per engine and per process: each API/worker process can hold up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections for each of its sync and async engines
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Connections older than this are replaced, ahead of server or proxy idle timeouts; -1 disables
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Test connections on checkout so ones dropped by the server are replaced, not handed out
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
     
     # API settings
     API_PREFIX: str = "/api"
@@ -22,13 +35,101 @@ class Settings(BaseSettings):
     # Dimension for embeddings - set to 1024 to match existing Pinecone index
     # Options: 1536 (OpenAI) or 1024 (HuggingFace)
     EMBEDDINGS_DIMENSION: int = int(os.getenv("EMBEDDINGS_DIMENSION", "1024"))
+    # Directory caching document embeddings per model and text; empty disables the cache
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "")
     
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # API key -> client cache; a TTL of 0 disables it
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    # Unknown keys are remembered briefly so invalid-key floods don't reach the database
+    AUTH_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    # Share the cache between processes (e.g. redis://redis:6379/0); per process when empty
+    AUTH_CACHE_REDIS_URL: str = os.getenv("AUTH_CACHE_REDIS_URL", "")
     
     # Crawler settings
     MAX_PAGES_PER_CRAWL: int = 50
+    # Upper bound for the per-job max_pages override
+    MAX_PAGES_PER_CRAWL_LIMIT: int = int(os.getenv("MAX_PAGES_PER_CRAWL_LIMIT", "10000"))
+    # Persist the crawl frontier every N emitted pages so interrupted jobs can resume
+    CRAWL_CHECKPOINT_EVERY: int = int(os.getenv("CRAWL_CHECKPOINT_EVERY", "10"))
+    CRAWLER_USER_AGENT: str = os.getenv(
+        "CRAWLER_USER_AGENT", "AI Chatbot Crawler (+https://github.com/your-repo/ai-chatbot-platform)"
+    )
+    CRAWLER_REQUEST_TIMEOUT: float = float(os.getenv("CRAWLER_REQUEST_TIMEOUT", "10"))
+    # Concurrent fetches per crawl
+    CRAWLER_CONCURRENCY: int = int(os.getenv("CRAWLER_CONCURRENCY", "4"))
+    # Per-host request rate (requests/second); adapts between the min and max
+    CRAWLER_INITIAL_RATE: float = float(os.getenv("CRAWLER_INITIAL_RATE", "2.0"))
+    CRAWLER_MIN_RATE: float = float(os.getenv("CRAWLER_MIN_RATE", "0.2"))
+    CRAWLER_MAX_RATE: float = float(os.getenv("CRAWLER_MAX_RATE", "10.0"))
+    # Responses slower than this make the crawler back off
+    CRAWLER_TARGET_LATENCY: float = float(os.getenv("CRAWLER_TARGET_LATENCY", "1.0"))
+    # Times a URL is re-queued after a 429/503 response
+    CRAWLER_MAX_RETRIES: int = int(os.getenv("CRAWLER_MAX_RETRIES", "3"))
+    CRAWLER_RESPECT_ROBOTS: bool = os.getenv("CRAWLER_RESPECT_ROBOTS", "true").lower() == "true"
+    # Skip pages whose SimHash is within this many bits of an already crawled page
+    CRAWL_DEDUP_ENABLED: bool = os.getenv("CRAWL_DEDUP_ENABLED", "true").lower() == "true"
+    CRAWL_DEDUP_MAX_DISTANCE: int = int(os.getenv("CRAWL_DEDUP_MAX_DISTANCE", "3"))
+    # Record/replay response cache: off, record, replay or auto (replay hits, record misses)
+    CRAWLER_CACHE_DIR: str = os.getenv("CRAWLER_CACHE_DIR", "")
+    CRAWLER_CACHE_MODE: str = os.getenv("CRAWLER_CACHE_MODE", "off")
+    
+    # Document chunking, measured in tokens of the given tiktoken encoding ("bytes" counts
+    # UTF-8 bytes and needs no download; used when the encoding can't be loaded)
+    CHUNK_SIZE_TOKENS: int = int(os.getenv("CHUNK_SIZE_TOKENS", "256"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    CHUNK_ENCODING: str = os.getenv("CHUNK_ENCODING", "cl100k_base")
+    
+    # Bulk document uploads are inserted this many rows per executemany
+    BULK_INSERT_BATCH_SIZE: int = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+    BULK_MAX_FILES: int = int(os.getenv("BULK_MAX_FILES", "10000"))
+    # Uploaded files wait here until a worker extracts them; must be shared with the workers
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "chatbot-uploads"))
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+    
+    # Ingestion pipeline settings
+    # Bounded queue size between pipeline stages (pages/chunks in flight)
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "32"))
+    # Number of chunks embedded and upserted per batch
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    
+    # Background worker settings
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "2"))
+    WORKER_POLL_INTERVAL: float = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+    # A job whose lease expires without renewal is handed to another worker
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_MAX_SECONDS", "3600"))
+    
+    # Analytics rollups
+    # Hours are only rolled up once they ended this long ago, leaving time for late writes
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "300"))
+    ANALYTICS_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("ANALYTICS_COMPACTION_INTERVAL_SECONDS", "900"))
+    
+    # Chat turns are written behind the response, in batches; false writes them before responding
+    CHAT_WRITE_BUFFER_ENABLED: bool = os.getenv("CHAT_WRITE_BUFFER_ENABLED", "true").lower() == "true"
+    # A batch is written this long after its first row, or as soon as it reaches CHAT_FLUSH_MAX_ROWS
+    CHAT_FLUSH_INTERVAL_MS: float = float(os.getenv("CHAT_FLUSH_INTERVAL_MS", "10"))
+    CHAT_FLUSH_MAX_ROWS: int = int(os.getenv("CHAT_FLUSH_MAX_ROWS", "500"))
+    # When this many rows are waiting (e.g. the database is down), requests wait for a flush
+    CHAT_BUFFER_MAX_PENDING: int = int(os.getenv("CHAT_BUFFER_MAX_PENDING", "10000"))
+    # Chat exports are read from a server-side cursor this many rows at a time
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    
+    # Chat history retention: whole months older than this are moved to compressed files
+    # under CHAT_ARCHIVE_DIR and removed from the database; 0 keeps everything
+    CHAT_RETENTION_DAYS: int = int(os.getenv("CHAT_RETENTION_DAYS", "365"))
+    CHAT_ARCHIVE_DIR: str = os.getenv("CHAT_ARCHIVE_DIR", "./archive")
+    CHAT_ARCHIVE_INTERVAL_SECONDS: int = int(os.getenv("CHAT_ARCHIVE_INTERVAL_SECONDS", "86400"))
+    # Monthly chat_messages partitions (Postgres) are created this many months ahead
+    CHAT_PARTITION_MONTHS_AHEAD: int = int(os.getenv("CHAT_PARTITION_MONTHS_AHEAD", "2"))
+    
+    # Deleting a client removes its rows with DELETE statements of at most this many rows each
+    CLIENT_DELETE_BATCH_SIZE: int = int(os.getenv("CLIENT_DELETE_BATCH_SIZE", "5000"))
 
 settings = Settings()
@@ -0,0 +1,288 @@
+"""
+Session and message counts for the analytics dashboard.
+
+Counts come from per-client hourly and daily rollup tables, which a
+periodic compaction job (see compact) fills in up to a watermark. Reads
+merge the rollups before the watermark with the raw rows after it, so
+results are exact whether or not compaction has caught up.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import AnalyticsDaily, AnalyticsHourly, AnalyticsRollupState, ChatMessage, ChatSession
+
+# Upper bound on the points in one series (e.g. a year of hourly buckets is 8760)
+MAX_BUCKETS = 10000
+
+# Name of the rollup watermark row
+ROLLUP = "chat"
+
+# Rollup column -> (timestamp column, client column) of the raw rows it counts
+METRICS = {
+    "sessions": (ChatSession.start_time, ChatSession.client_id),
+    "messages": (ChatMessage.created_at, ChatMessage.client_id),
+}
+
+
+class Bucket(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+
+_STEPS = {
+    Bucket.HOUR: timedelta(hours=1),
+    Bucket.DAY: timedelta(days=1),
+    Bucket.WEEK: timedelta(weeks=1),
+}
+
+# SQLite has no date_trunc; weeks start on Monday like Postgres
+_SQLITE_FORMATS = {
+    Bucket.HOUR: lambda column: func.strftime("%Y-%m-%d %H:00:00", column),
+    Bucket.DAY: lambda column: func.date(column),
+    Bucket.WEEK: lambda column: func.date(column, "weekday 0", "-6 days"),
+}
+
+
+def truncate(value: datetime, bucket: Bucket) -> datetime:
+    """The start of the bucket value falls in."""
+    if bucket == Bucket.HOUR:
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == Bucket.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_starts(start: datetime, end: datetime, bucket: Bucket) -> List[datetime]:
+    """Start of every bucket from the one containing start to the one containing end."""
+    current = truncate(start, bucket)
+    step = _STEPS[bucket]
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def bucket_label(value: datetime, bucket: Bucket) -> str:
+    return value.strftime("%Y-%m-%d %H:00" if bucket == Bucket.HOUR else "%Y-%m-%d")
+
+
+def truncate_expression(column, bucket: Bucket, dialect: str):
+    """SQL expression for the start of column's bucket, or None if the dialect has none."""
+    if dialect == "postgresql":
+        return func.date_trunc(bucket.value, column)
+    if dialect == "sqlite":
+        return _SQLITE_FORMATS[bucket](column)
+    return None
+
+
+def _as_datetime(value: Any) -> datetime:
+    # SQLite returns the bucket as text, Postgres as a timestamp
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _count_raw(db: Session, timestamp_column, group_columns: Sequence, filters: Sequence,
+               bucket: Bucket) -> Dict[tuple, int]:
+    """
+    Row counts keyed by (*group_columns, bucket start) in a single GROUP BY
+    query. Databases without a truncation expression fetch the timestamps
+    (still in one query) and bucket them here.
+    """
+    expression = truncate_expression(timestamp_column, bucket, db.get_bind().dialect.name)
+    counts: Dict[tuple, int] = defaultdict(int)
+    if expression is not None:
+        rows = db.query(*group_columns, expression, func.count()).filter(*filters) \
+            .group_by(*group_columns, expression)
+        for *group, start, count in rows:
+            counts[(*group, _as_datetime(start))] += count
+    else:
+        for *group, timestamp in db.query(*group_columns, timestamp_column).filter(*filters):
+            counts[(*group, truncate(timestamp, bucket))] += 1
+    return counts
+
+
+def get_watermark(db: Session) -> Optional[datetime]:
+    return db.query(AnalyticsRollupState.rolled_up_until).filter(AnalyticsRollupState.name == ROLLUP).scalar()
+
+
+def rolled_up_counts(
+    db: Session,
+    client_id: str,
+    start: datetime,
+    bucket: Bucket,
+    metrics: Sequence[str] = tuple(METRICS)
+) -> Dict[str, Dict[datetime, int]]:
+    """
+    Counts per metric and bucket from start (aligned to the bucket) onwards.
+    Whole days before the watermark come from the daily rollup, the rest of
+    the watermark's day (or every hour, for hourly buckets) from the hourly
+    rollup, and everything after the watermark from the raw rows.
+    """
+    counts = {metric: defaultdict(int) for metric in metrics}
+    watermark = get_watermark(db)
+    since = start
+    if watermark is not None and watermark > start:
+        if bucket == Bucket.HOUR:
+            sources = [(AnalyticsHourly, start, watermark)]
+        else:
+            day = truncate(watermark, Bucket.DAY)
+            sources = [(AnalyticsDaily, start, day), (AnalyticsHourly, max(start, day), watermark)]
+        for model, lo, hi in sources:
+            if lo >= hi:
+                continue
+            rows = db.query(model.bucket_start, *[getattr(model, metric) for metric in metrics]).filter(
+                model.client_id == client_id,
+                model.bucket_start >= lo,
+                model.bucket_start < hi
+            )
+            for bucket_start, *values in rows:
+                key = truncate(bucket_start, bucket)
+                for metric, value in zip(metrics, values):
+                    counts[metric][key] += value
+        since = watermark
+
+    for metric in metrics:
+        timestamp_column, client_column = METRICS[metric]
+        raw = _count_raw(db, timestamp_column, (), (client_column == client_id, timestamp_column >= since), bucket)
+        for (key,), count in raw.items():
+            counts[metric][key] += count
+    return counts
+
+
+def series(
+    db: Session,
+    client_id: str,
+    metric: str,
+    days: int,
+    bucket: Bucket = Bucket.DAY,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Counts of a metric per bucket over the last `days` days, with empty buckets as zero."""
+    now = now or datetime.utcnow()
+    starts = bucket_starts(now - timedelta(days=days), now, bucket)
+    if not starts:
+        raise ValueError(f"days must not be negative, got {days}")
+    if len(starts) > MAX_BUCKETS:
+        raise ValueError(f"{len(starts)} {bucket.value} buckets requested, at most {MAX_BUCKETS} are allowed")
+
+    counts = rolled_up_counts(db, client_id, starts[0], bucket, (metric,))[metric]
+    return [{"date": bucket_label(start, bucket), "count": counts.get(start, 0)} for start in starts]
+
+
+def totals(db: Session, client_id: str, since: datetime) -> Dict[str, int]:
+    """
+    Total of each metric from since onwards. The rest of since's day is
+    counted from the raw rows, so the rollups' day alignment doesn't move the
+    window; the whole days after it come from the rollups.
+    """
+    next_day = truncate(since, Bucket.DAY) + timedelta(days=1)
+    counts = rolled_up_counts(db, client_id, next_day, Bucket.DAY)
+    result = {metric: sum(values.values()) for metric, values in counts.items()}
+    for metric, (timestamp_column, client_column) in METRICS.items():
+        result[metric] += db.query(func.count(timestamp_column)).filter(
+            client_column == client_id,
+            timestamp_column >= since,
+            timestamp_column < next_day
+        ).scalar()
+    return result
+
+
+def _rollup_hours(db: Session, lo: datetime, hi: datetime):
+    """Recompute the hourly rollup rows in [lo, hi) from the raw rows."""
+    rows: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for metric, (timestamp_column, client_column) in METRICS.items():
+        raw = _count_raw(
+            db, timestamp_column, (client_column,), (timestamp_column >= lo, timestamp_column < hi), Bucket.HOUR
+        )
+        for key, count in raw.items():
+            rows[key][metric] = count
+
+    db.query(AnalyticsHourly).filter(
+        AnalyticsHourly.bucket_start >= lo, AnalyticsHourly.bucket_start < hi
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(AnalyticsHourly.__table__.insert(), [
+            {"client_id": client_id, "bucket_start": bucket_start, **values}
+            for (client_id, bucket_start), values in rows.items()
+        ])
+
+
+def _rollup_days(db: Session, lo: datetime, hi: datetime):
+    """Recompute the daily rollup rows of the days in [lo, hi) from the hourly rollup."""
+    if lo >= hi:
+        return
+    rows: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    hourly = db.query(AnalyticsHourly.client_id, AnalyticsHourly.bucket_start,
+                      *[getattr(AnalyticsHourly, metric) for metric in METRICS]).filter(
+        AnalyticsHourly.bucket_start >= lo, AnalyticsHourly.bucket_start < hi
+    )
+    for client_id, bucket_start, *values in hourly:
+        day = rows[(client_id, truncate(bucket_start, Bucket.DAY))]
+        for metric, value in zip(METRICS, values):
+            day[metric] += value
+
+    db.query(AnalyticsDaily).filter(
+        AnalyticsDaily.bucket_start >= lo, AnalyticsDaily.bucket_start < hi
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(AnalyticsDaily.__table__.insert(), [
+            {"client_id": client_id, "bucket_start": bucket_start, **values}
+            for (client_id, bucket_start), values in rows.items()
+        ])
+
+
+def compact(
+    db: Session,
+    now: Optional[datetime] = None,
+    lag_seconds: Optional[int] = None,
+    window: timedelta = timedelta(days=7)
+) -> Dict[str, Any]:
+    """
+    Roll up every hour that ended at least lag_seconds ago, a window at a
+    time, advancing the watermark in the same transaction as each window's
+    rows. Rows written later with an earlier timestamp than the watermark
+    are not counted, hence the lag. Returns the new watermark and how many
+    hours were rolled up.
+    """
+    now = now or datetime.utcnow()
+    lag = settings.ANALYTICS_ROLLUP_LAG_SECONDS if lag_seconds is None else lag_seconds
+    target = truncate(now - timedelta(seconds=lag), Bucket.HOUR)
+    hours = 0
+
+    while True:
+        # Locked on Postgres so concurrent compactions take turns
+        state = db.query(AnalyticsRollupState).filter(AnalyticsRollupState.name == ROLLUP) \
+            .with_for_update().first()
+        if state is None:
+            first = [
+                db.query(func.min(timestamp_column)).scalar() for timestamp_column, _ in METRICS.values()
+            ]
+            first = [value for value in first if value is not None]
+            state = AnalyticsRollupState(
+                name=ROLLUP, rolled_up_until=truncate(min(first), Bucket.HOUR) if first else target
+            )
+            db.add(state)
+        lo = state.rolled_up_until
+        if lo >= target:
+            db.commit()
+            return {"rolled_up_until": lo.isoformat(), "hours": hours}
+        hi = min(lo + window, target)
+        _rollup_hours(db, lo, hi)
+        # Days that are now complete in the hourly rollup
+        _rollup_days(db, truncate(lo, Bucket.DAY), truncate(hi, Bucket.DAY))
+        state.rolled_up_until = hi
+        db.commit()
+        hours += int((hi - lo).total_seconds() // 3600)
@@ -0,0 +1,182 @@
+"""
+Cache of API key -> client, consulted on every authenticated request.
+
+Clients are cached as ClientRecord, a plain copy of the columns the routes
+use, so cached values never hold on to a database session. Unknown keys
+are cached too, for a shorter time, so a flood of invalid keys does not
+reach the database. Entries are dropped when a client is updated or
+deleted.
+
+The cache lives in each process unless AUTH_CACHE_REDIS_URL is set, in
+which case it is shared: an update in one API process is then seen by
+the others immediately instead of after the TTL.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_crud
+from app.database.crud import get_client_by_api_key
+
+# Cached in place of a client for keys that matched none
+_MISSING = object()
+
+
+class ClientRecord(NamedTuple):
+    id: str
+    name: str
+    website_url: str
+    api_key: str
+    is_active: bool
+    created_at: datetime
+    vector_index: Optional[str] = None
+    vector_namespace: Optional[str] = None
+    vector_migration_index: Optional[str] = None
+    vector_migration_namespace: Optional[str] = None
+
+    @classmethod
+    def from_client(cls, client) -> "ClientRecord":
+        return cls(**{field: getattr(client, field) for field in cls._fields})
+
+
+class MemoryBackend:
+    """Thread-safe TTL cache holding at most max_entries, dropping the oldest first."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                for expired in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                    del self._entries[expired]
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared cache in Redis. Keys are hashed so API keys are not stored in the clear."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("AUTH_CACHE_REDIS_URL requires the redis package")
+        self.redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return "auth:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raw = self.redis.get(self._key(key))
+        if raw is None:
+            return False, None
+        data = json.loads(raw)
+        if data is None:
+            return True, _MISSING
+        data["created_at"] = datetime.fromisoformat(data["created_at"]) if data["created_at"] else None
+        return True, ClientRecord(**data)
+
+    def set(self, key: str, value: Any, ttl: float):
+        if value is _MISSING:
+            data = None
+        else:
+            data = value._asdict()
+            data["created_at"] = value.created_at.isoformat() if value.created_at else None
+        self.redis.set(self._key(key), json.dumps(data), px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str):
+        self.redis.delete(self._key(key))
+
+    def clear(self):
+        for key in self.redis.scan_iter("auth:*"):
+            self.redis.delete(key)
+
+
+class ClientCache:
+    def __init__(self, backend=None, ttl: Optional[float] = None, negative_ttl: Optional[float] = None):
+        self.backend = backend or MemoryBackend(settings.AUTH_CACHE_MAX_ENTRIES)
+        self.ttl = settings.AUTH_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.negative_ttl = settings.AUTH_CACHE_NEGATIVE_TTL_SECONDS if negative_ttl is None else negative_ttl
+
+    def _cached(self, api_key: str) -> Tuple[bool, Optional[ClientRecord]]:
+        if self.ttl <= 0:
+            return False, None
+        found, value = self.backend.get(api_key)
+        return found, None if value is _MISSING else value
+
+    def _remember(self, api_key: str, client) -> Optional[ClientRecord]:
+        record = ClientRecord.from_client(client) if client else None
+        if self.ttl > 0:
+            if record is None:
+                self.backend.set(api_key, _MISSING, self.negative_ttl)
+            else:
+                self.backend.set(api_key, record, self.ttl)
+        return record
+
+    def get_client(self, db: Session, api_key: str) -> Optional[ClientRecord]:
+        """The active client with this API key, from the cache or else the database."""
+        found, record = self._cached(api_key)
+        if found:
+            return record
+        return self._remember(api_key, get_client_by_api_key(db, api_key))
+
+    async def aget_client(self, db: AsyncSession, api_key: str) -> Optional[ClientRecord]:
+        """get_client for an AsyncSession."""
+        found, record = self._cached(api_key)
+        if found:
+            return record
+        return self._remember(api_key, await async_crud.get_client_by_api_key(db, api_key))
+
+    def invalidate(self, api_key: str):
+        self.backend.delete(api_key)
+
+    @property
+    def max_staleness(self) -> float:
+        """How long other processes may keep serving an entry invalidated here."""
+        return 0.0 if isinstance(self.backend, RedisBackend) else self.ttl
+
+    def clear(self):
+        self.backend.clear()
+
+
+def _create_cache() -> ClientCache:
+    if settings.AUTH_CACHE_REDIS_URL:
+        return ClientCache(RedisBackend(settings.AUTH_CACHE_REDIS_URL))
+    return ClientCache()
+
+
+client_cache = _create_cache()
@@ -0,0 +1,282 @@
+"""
+Monthly partitions and cold-storage archival of chat history.
+
+On Postgres chat_messages is range-partitioned by month on created_at
+(chat_messages_p2024_03, ...), with a default partition catching anything
+else; ensure_partitions creates the coming months ahead of time. Other
+databases keep a single table and the same archival works on row ranges.
+
+archive_old_messages moves whole months older than CHAT_RETENTION_DAYS out
+of the database: each month's messages, with their session columns, are
+written to CHAT_ARCHIVE_DIR/chat_messages/<YYYY-MM>/<client id>.ndjson.gz
+and the month's partition is then detached and dropped (a catalog change,
+not a large DELETE). Sessions left without messages go with them. Months
+not yet rolled up into the analytics tables are never archived, so the
+dashboard's counts are unaffected.
+
+iter_archived_rows reads archived months back for exports, and
+delete_client_archive removes a deleted client's files.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.analytics import get_watermark
+from app.core.export import COLUMNS, FIELDS, json_value
+from app.database.models import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+TABLE = "chat_messages"
+DEFAULT_PARTITION = "chat_messages_default"
+
+# Rows deleted per statement when removing what partitions don't cover
+DELETE_BATCH_SIZE = 5000
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month: datetime) -> datetime:
+    return month_start(month_start(month) + timedelta(days=32))
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": TABLE}
+    ).first() is not None
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def create_partition(db: Session, month: datetime) -> bool:
+    """Create the partition of a month if it is missing, moving its rows out of the default partition."""
+    name = partition_name(month)
+    if _table_exists(db, name):
+        return False
+    bounds = {"lo": month, "hi": next_month(month)}
+    # DDL takes no bind parameters
+    values = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+    in_default = db.execute(
+        text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :lo AND created_at < :hi LIMIT 1"), bounds
+    ).first()
+    if in_default is None:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {TABLE} {values}"))
+    else:
+        # A partition can't be created over rows the default partition holds; move them into it first
+        db.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lo AND created_at < :hi "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        db.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} {values}"))
+    db.commit()
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def ensure_partitions(db: Session, now: Optional[datetime] = None, months_ahead: Optional[int] = None) -> List[str]:
+    """Create the partitions of this month and the next months_ahead months; the names created."""
+    if not is_partitioned(db):
+        return []
+    months_ahead = settings.CHAT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    month = month_start(now or datetime.utcnow())
+    created = []
+    for _ in range(months_ahead + 1):
+        if create_partition(db, month):
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+
+def archive_root() -> str:
+    return os.path.join(settings.CHAT_ARCHIVE_DIR, TABLE)
+
+
+def archive_file(month_dir: str, client_id: str) -> str:
+    return os.path.join(month_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", client_id) + ".ndjson.gz")
+
+
+def archived_months() -> List[datetime]:
+    """Months whose archive is complete, oldest first."""
+    root = archive_root()
+    if not os.path.isdir(root):
+        return []
+    months = []
+    for name in os.listdir(root):
+        if re.fullmatch(r"\d{4}-\d{2}", name):
+            months.append(datetime.strptime(name, "%Y-%m"))
+    return sorted(months)
+
+
+def archive_boundary() -> Optional[datetime]:
+    """Messages before this time are in the archive, not the database; None if nothing is archived."""
+    months = archived_months()
+    return next_month(months[-1]) if months else None
+
+
+def delete_client_archive(client_id: str) -> int:
+    """Remove a client's archived messages; the number of files removed."""
+    removed = 0
+    for month in archived_months():
+        path = archive_file(os.path.join(archive_root(), f"{month:%Y-%m}"), client_id)
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def _write_month(db: Session, month: datetime, batch_size: int) -> int:
+    """
+    Write a month's messages to one file per client; the number of rows
+    written. A month archived before is left as it is: its rows still in the
+    database are the rest of an interrupted delete, already in the archive.
+    """
+    final_dir = os.path.join(archive_root(), f"{month:%Y-%m}")
+    if os.path.isdir(final_dir):
+        logger.info(f"{month:%Y-%m} is already archived; finishing its delete")
+        return 0
+    tmp_dir = final_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    query = select(ChatMessage.client_id, *COLUMNS).join(ChatSession, ChatSession.id == ChatMessage.session_id).where(
+        ChatMessage.created_at >= month, ChatMessage.created_at < next_month(month)
+    ).order_by(ChatMessage.client_id, ChatMessage.created_at, ChatMessage.id)
+
+    count = 0
+    current_client, out = None, None
+    try:
+        # A server-side cursor, so a month is never held in memory
+        for client_id, *values in db.execute(query.execution_options(yield_per=batch_size)):
+            if client_id != current_client:
+                if out:
+                    out.close()
+                current_client = client_id
+                out = gzip.open(archive_file(tmp_dir, client_id), "wt", encoding="utf-8")
+            out.write(json.dumps({field: json_value(value) for field, value in zip(FIELDS, values)},
+                                 ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if out:
+            out.close()
+    db.rollback()
+
+    # The month only counts as archived once all of it is written
+    os.rename(tmp_dir, final_dir)
+    return count
+
+
+def _delete_month(db: Session, month: datetime, partitioned: bool):
+    lo, hi = month, next_month(month)
+    if partitioned:
+        name = partition_name(month)
+        if _table_exists(db, name):
+            db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+    # Rows not in a partition of their own (the default partition, or an unpartitioned table)
+    in_month = (ChatMessage.created_at >= lo, ChatMessage.created_at < hi)
+    while True:
+        batch = select(ChatMessage.id).where(*in_month).limit(DELETE_BATCH_SIZE).scalar_subquery()
+        deleted = db.query(ChatMessage).filter(*in_month, ChatMessage.id.in_(batch)).delete(synchronize_session=False)
+        db.commit()
+        if deleted < DELETE_BATCH_SIZE:
+            break
+
+
+def _delete_empty_sessions(db: Session, before: datetime) -> int:
+    """Sessions started before `before` that have no messages left."""
+    total = 0
+    empty = (ChatSession.start_time < before, ~exists().where(ChatMessage.session_id == ChatSession.id))
+    while True:
+        batch = select(ChatSession.id).where(*empty).limit(DELETE_BATCH_SIZE).scalar_subquery()
+        deleted = db.query(ChatSession).filter(ChatSession.id.in_(batch)).delete(synchronize_session=False)
+        db.commit()
+        total += deleted
+        if deleted < DELETE_BATCH_SIZE:
+            return total
+
+
+def archive_old_messages(
+    db: Session,
+    now: Optional[datetime] = None,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Archive and remove every month that ended more than retention_days ago
+    and has been rolled up into the analytics tables, oldest first.
+    """
+    now = now or datetime.utcnow()
+    retention_days = settings.CHAT_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    result = {"months": [], "messages": 0, "sessions": 0}
+    if retention_days <= 0:
+        return result
+
+    cutoff = month_start(now - timedelta(days=retention_days))
+    watermark = get_watermark(db)
+    if watermark is None:
+        logger.info("Nothing archived: chat history has not been rolled up into the analytics tables yet")
+        return result
+    cutoff = min(cutoff, month_start(watermark))
+
+    first = db.query(ChatMessage.created_at).order_by(ChatMessage.created_at).limit(1).scalar()
+    partitioned = is_partitioned(db)
+    month = month_start(first) if first else cutoff
+    while month < cutoff:
+        count = _write_month(db, month, batch_size)
+        _delete_month(db, month, partitioned)
+        logger.info(f"Archived {count} chat messages of {month:%Y-%m}")
+        result["months"].append(f"{month:%Y-%m}")
+        result["messages"] += count
+        month = next_month(month)
+    result["sessions"] = _delete_empty_sessions(db, cutoff)
+    return result
+
+
+def iter_archived_rows(
+    client_id: str,
+    start: datetime,
+    end: datetime,
+    batch_size: Optional[int] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """A client's archived messages created in [start, end), oldest first, in batches of export rows."""
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    batch = []
+    for month in archived_months():
+        if next_month(month) <= start or month >= end:
+            continue
+        path = archive_file(os.path.join(archive_root(), f"{month:%Y-%m}"), client_id)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if start <= datetime.fromisoformat(row["created_at"]) < end:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+    if batch:
+        yield batch
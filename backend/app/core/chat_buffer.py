@@ -0,0 +1,201 @@
+"""
+Write-behind buffer for chat sessions and messages.
+
+The chat route hands each turn to the buffer and responds straight away; a
+background task on the event loop writes the buffered rows in one
+transaction, CHAT_FLUSH_INTERVAL_MS after the first of them arrives or as
+soon as CHAT_FLUSH_MAX_ROWS are waiting. Ids and timestamps are assigned
+when a row is buffered, so responses can return them and analytics count
+the turn at the time it happened.
+
+Rows are only in memory until their batch commits: the application's
+shutdown flushes what is left, but a crashed process loses its last few
+milliseconds of turns. A session that is still buffered is visible to this
+process only (see pending_session), so a follow-up turn is accepted as long
+as it reaches the same process or arrives after the flush.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exc
+
+from app.config import settings
+from app.database.models import ChatMessage, ChatSession, generate_uuid
+
+logger = logging.getLogger(__name__)
+
+# Longest pause between retries while the database is unavailable
+MAX_RETRY_DELAY = 5.0
+
+
+class ChatWriteBuffer:
+    def __init__(
+        self,
+        engine=None,
+        flush_interval: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        max_pending: Optional[int] = None
+    ):
+        self._engine = engine
+        self.flush_interval = settings.CHAT_FLUSH_INTERVAL_MS / 1000 if flush_interval is None else flush_interval
+        self.max_rows = max_rows or settings.CHAT_FLUSH_MAX_ROWS
+        self.max_pending = max_pending or settings.CHAT_BUFFER_MAX_PENDING
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._messages: List[Dict[str, Any]] = []
+        # Sessions of the batch being written, still unreadable from the database
+        self._writing: Dict[str, Dict[str, Any]] = {}
+        self._loop = None
+        self._task = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.database.session import get_async_engine
+
+            self._engine = get_async_engine()
+        return self._engine
+
+    @property
+    def pending(self) -> int:
+        return len(self._sessions) + len(self._messages)
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the previous loop has gone away (e.g. between test clients)
+            self._loop = loop
+            self._has_rows = asyncio.Event()
+            self._full = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = None
+
+    def _signal(self):
+        if self.pending:
+            self._has_rows.set()
+            if self.pending >= self.max_rows:
+                self._full.set()
+
+    def _ensure_started(self):
+        self._bind()
+        if self._task is None:
+            self._task = self._loop.create_task(self._run())
+        self._signal()
+
+    async def _reserve(self):
+        self._ensure_started()
+        if self.pending >= self.max_pending:
+            # The database is not keeping up; hold the request until there is room
+            await self.flush()
+
+    async def add_session(self, client_id: str, user_id: Optional[str] = None) -> str:
+        """Buffer a new chat session and return its id."""
+        await self._reserve()
+        session_id = generate_uuid()
+        self._sessions[session_id] = {
+            "id": session_id,
+            "client_id": client_id,
+            "user_id": user_id,
+            "start_time": datetime.utcnow(),
+            "end_time": None,
+        }
+        self._ensure_started()
+        return session_id
+
+    async def add_message(self, client_id: str, session_id: str, user_message: str, bot_response: str) -> str:
+        """Buffer a chat message and return its id."""
+        await self._reserve()
+        message_id = generate_uuid()
+        self._messages.append({
+            "id": message_id,
+            "client_id": client_id,
+            "session_id": session_id,
+            "user_message": user_message,
+            "bot_response": bot_response,
+            "created_at": datetime.utcnow(),
+        })
+        self._ensure_started()
+        return message_id
+
+    def pending_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A session of this process that is not in the database yet."""
+        return self._sessions.get(session_id) or self._writing.get(session_id)
+
+    async def flush(self):
+        """Write everything buffered so far, returning once it is committed."""
+        self._bind()
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            sessions, self._sessions = self._sessions, {}
+            messages, self._messages = self._messages, []
+            self._has_rows.clear()
+            self._full.clear()
+            self._writing = sessions
+            try:
+                await self._write(sessions, messages)
+            except BaseException:
+                # Keep the rows, ahead of anything buffered meanwhile, for the next attempt
+                sessions.update(self._sessions)
+                self._sessions = sessions
+                self._messages = messages + self._messages
+                self._signal()
+                raise
+            finally:
+                self._writing = {}
+
+    async def _write(self, sessions: Dict[str, Dict[str, Any]], messages: List[Dict[str, Any]]):
+        try:
+            async with self.engine.begin() as connection:
+                if sessions:
+                    await connection.execute(ChatSession.__table__.insert(), list(sessions.values()))
+                if messages:
+                    await connection.execute(ChatMessage.__table__.insert(), messages)
+        except exc.IntegrityError:
+            # Some row can never be written (e.g. its client was deleted); write the rest one by one
+            await self._write_each(ChatSession, sessions.values())
+            await self._write_each(ChatMessage, messages)
+
+    async def _write_each(self, model, rows):
+        for row in rows:
+            try:
+                async with self.engine.begin() as connection:
+                    await connection.execute(model.__table__.insert(), row)
+            except exc.IntegrityError as e:
+                logger.error(f"Dropping {model.__tablename__} row {row['id']}: {e}")
+
+    async def _run(self):
+        delay = self.flush_interval
+        while True:
+            await self._has_rows.wait()
+            if self.pending < self.max_rows:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.flush()
+                delay = self.flush_interval
+            except Exception as e:
+                delay = min(max(delay * 2, 0.1), MAX_RETRY_DELAY)
+                logger.error(f"Failed to write {self.pending} buffered chat rows, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        """Stop the background task and write what is left, e.g. on shutdown."""
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            # Not in the middle of a flush, which could then be half written
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.pending:
+            await self.flush()
+
+
+chat_buffer = ChatWriteBuffer()
@@ -1,4 +1,7 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from langchain.llms import OpenAI
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import ConversationalRetrievalChain
@@ -9,9 +12,18 @@ from langchain_pinecone import PineconeVectorStore
 from app.config import settings
 from app.core.vector_store import VectorStore
 
+# Retrievers kept per (index, namespace), least recently used dropped first
+MAX_CACHED_RETRIEVERS = 1024
+
 class ChatbotEngine:
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
+        # Clients migrated to another index are served from a store per index
+        self.vector_stores = {vector_store.index_name: vector_store}
+        # Connecting to an index is a round trip to Pinecone, so it is done once per namespace
+        self.retrievers: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._retrievers_lock = threading.Lock()
+        self._vector_stores_lock = threading.Lock()
         self.llm = ChatOpenAI(
             temperature=0.7,
             model_name="gpt-3.5-turbo",
@@ -40,14 +52,50 @@ class ChatbotEngine:
             template=template
         )
     
-    def get_retrieval_chain(self, client_id: str, client_info: Dict[str, Any], session_id: str):
-        """Create a retrieval chain for the client."""
-        # Get vector store for this client
+    def get_vector_store(self, index_name: Optional[str] = None) -> VectorStore:
+        """The vector store for an index, whose embeddings match the index's model."""
+        index_name = index_name or self.vector_store.index_name
+        # Held while the store is built, so concurrent first requests build it once
+        with self._vector_stores_lock:
+            if index_name not in self.vector_stores:
+                self.vector_stores[index_name] = VectorStore(index_name)
+            return self.vector_stores[index_name]
+    
+    def cached_retriever(self, index_name: Optional[str], namespace: str):
+        """The retriever of a namespace if one was created before, else None."""
+        key = (index_name or self.vector_store.index_name, namespace)
+        with self._retrievers_lock:
+            retriever = self.retrievers.get(key)
+            if retriever is not None:
+                self.retrievers.move_to_end(key)
+            return retriever
+    
+    def get_retriever(self, index_name: Optional[str], namespace: str):
+        """The retriever of a namespace, created on first use."""
+        retriever = self.cached_retriever(index_name, namespace)
+        if retriever is not None:
+            return retriever
+        key = (index_name or self.vector_store.index_name, namespace)
+        vector_store = self.get_vector_store(index_name)
         retriever = PineconeVectorStore.from_existing_index(
-            index_name=self.vector_store.index_name,
-            embedding=self.vector_store.embeddings,
-            namespace=client_id
+            index_name=vector_store.index_name,
+            embedding=vector_store.embeddings,
+            namespace=namespace
         ).as_retriever(search_kwargs={"k": 5})
+        with self._retrievers_lock:
+            self.retrievers[key] = retriever
+            if len(self.retrievers) > MAX_CACHED_RETRIEVERS:
+                self.retrievers.popitem(last=False)
+        return retriever
+    
+    def get_retrieval_chain(self, 
+                            client_id: str, 
+                            client_info: Dict[str, Any], 
+                            session_id: str,
+                            index_name: Optional[str] = None,
+                            namespace: Optional[str] = None):
+        """Create a retrieval chain for the client."""
+        retriever = self.get_retriever(index_name, namespace or client_id)
         
         # Set up memory for this conversation
         memory = ConversationBufferMemory(
@@ -72,12 +120,33 @@ class ChatbotEngine:
                     query: str, 
                     client_id: str, 
                     client_info: Dict[str, Any], 
-                    session_id: str) -> str:
+                    session_id: str,
+                    index_name: Optional[str] = None,
+                    namespace: Optional[str] = None) -> str:
         """Get response for user query."""
         try:
-            chain = self.get_retrieval_chain(client_id, client_info, session_id)
+            chain = self.get_retrieval_chain(client_id, client_info, session_id, index_name, namespace)
             response = chain({"question": query})
             return response["answer"]
         except Exception as e:
             print(f"Error generating response: {e}")
             return "I'm sorry, I encountered an error processing your request. Please try again later."
+
+    async def aget_response(self,
+                            query: str,
+                            client_id: str,
+                            client_info: Dict[str, Any],
+                            session_id: str,
+                            index_name: Optional[str] = None,
+                            namespace: Optional[str] = None) -> str:
+        """Get response for user query without blocking the event loop."""
+        try:
+            if self.cached_retriever(index_name, namespace or client_id) is None:
+                # Creating it blocks (connecting to the index, maybe loading an embedding model)
+                await asyncio.to_thread(self.get_retriever, index_name, namespace or client_id)
+            chain = self.get_retrieval_chain(client_id, client_info, session_id, index_name, namespace)
+            response = await chain.ainvoke({"question": query})
+            return response["answer"]
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return "I'm sorry, I encountered an error processing your request. Please try again later."
@@ -0,0 +1,202 @@
+import logging
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import tiktoken
+
+# A segment ends after sentence punctuation (optionally followed by closing
+# quotes/brackets) or at a blank line. The whitespace that follows stays with
+# the next segment, which matches how tiktoken pre-tokenizes (" word").
+_SEGMENT_END_RE = re.compile(r"""[.!?][)"'\]]*(?=\s)|\n(?=[ \t]*\n)""")
+
+_WORD_START = 1
+_MID_CHARACTER = 2
+
+# Encoding name -> (byte length, first byte kind) per token id, built once
+_TOKEN_TABLES: Dict[str, Tuple[List[int], bytes]] = {}
+
+logger = logging.getLogger(__name__)
+
+# Name of the local encoding counting one token per UTF-8 byte
+BYTE_ENCODING = "bytes"
+
+# Encodings by name, loaded once per process
+_ENCODINGS: Dict[str, tiktoken.Encoding] = {}
+
+
+def byte_encoding() -> tiktoken.Encoding:
+    """
+    One token per byte. Needs no download and never counts fewer tokens than
+    a BPE encoding would, so chunks stay within the embedding model's limit.
+    """
+    return tiktoken.Encoding(
+        name=BYTE_ENCODING,
+        pat_str=r"\s+|\S+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+
+def load_encoding(name: str) -> tiktoken.Encoding:
+    """
+    A tiktoken encoding by name. tiktoken downloads the BPE file on first use
+    (into TIKTOKEN_CACHE_DIR if set); without it, e.g. offline, this falls
+    back to byte_encoding.
+    """
+    encoding = _ENCODINGS.get(name)
+    if encoding is None:
+        if name == BYTE_ENCODING:
+            encoding = byte_encoding()
+        else:
+            try:
+                encoding = tiktoken.get_encoding(name)
+            except Exception as e:
+                logger.warning(
+                    f"Could not load the {name} encoding ({e}); counting bytes instead. "
+                    f"Point TIKTOKEN_CACHE_DIR at a cache holding it to chunk by tokens offline"
+                )
+                encoding = byte_encoding()
+        _ENCODINGS[name] = encoding
+    return encoding
+
+
+class TokenChunker:
+    """
+    Split text into chunks of at most chunk_size tokens.
+
+    The text is tokenized once; sentence and paragraph ends found by a regex
+    pass are mapped onto token offsets, and the resulting segments are packed
+    greedily into chunks. Consecutive chunks share up to chunk_overlap tokens
+    of whole trailing segments. Chunk text is always a slice of the original
+    text, so nothing is lost to decode round-trips.
+
+    Any tiktoken-compatible encoding can be passed in, e.g. one matching the
+    embedding model's tokenizer; by default it is loaded by name with
+    load_encoding.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        encoding_name: str = "cl100k_base",
+        encoding: Optional[tiktoken.Encoding] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
+        self._encoding = encoding
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        if self._encoding is None:
+            self._encoding = load_encoding(self.encoding_name)
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def _token_table(self) -> Tuple[List[int], bytes]:
+        """Byte length and kind of first byte for every token id of the encoding."""
+        table = _TOKEN_TABLES.get(self.encoding.name)
+        if table is None:
+            lengths = [0] * self.encoding.n_vocab
+            kinds = bytearray(self.encoding.n_vocab)
+            for token in range(self.encoding.n_vocab):
+                try:
+                    token_bytes = self.encoding.decode_single_token_bytes(token)
+                except KeyError:
+                    continue
+                lengths[token] = len(token_bytes)
+                if token_bytes[:1].isspace():
+                    kinds[token] = _WORD_START
+                elif token_bytes and token_bytes[0] & 0xC0 == 0x80:
+                    # UTF-8 continuation byte: the token starts inside a character
+                    kinds[token] = _MID_CHARACTER
+            table = _TOKEN_TABLES[self.encoding.name] = (lengths, bytes(kinds))
+        return table
+
+    def _segment_ends(self, text: str) -> List[int]:
+        """Byte offsets at which sentence/paragraph segments of text end."""
+        ends = []
+        if text.isascii():
+            ends = [match.end() for match in _SEGMENT_END_RE.finditer(text)]
+        else:
+            position, byte_position = 0, 0
+            for match in _SEGMENT_END_RE.finditer(text):
+                byte_position += len(text[position:match.end()].encode("utf-8"))
+                position = match.end()
+                ends.append(byte_position)
+        return ends
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into token-bounded, overlapping chunks."""
+        return list(self.iter_text(text))
+
+    def iter_text(self, text: str) -> Iterator[str]:
+        """Yield the chunks of text one at a time."""
+        tokens = self.encoding.encode_ordinary(text)
+        if not tokens:
+            return
+        lengths, kinds = self._token_table()
+        # offsets[i] is the byte offset at which token i starts
+        offsets = [0]
+        offsets.extend(accumulate(map(lengths.__getitem__, tokens)))
+
+        def char_start(i):
+            return i == len(tokens) or kinds[tokens[i]] != _MID_CHARACTER
+
+        # Token indices to cut at: segment ends snapped back to the token
+        # they fall in (or just after), never inside a character
+        boundaries = [0]
+        for byte_end in self._segment_ends(text):
+            i = bisect_right(offsets, byte_end) - 1
+            while i > boundaries[-1] and not char_start(i):
+                i -= 1
+            if i > boundaries[-1]:
+                boundaries.append(i)
+        if boundaries[-1] != len(tokens):
+            boundaries.append(len(tokens))
+
+        # Segments longer than a chunk are cut at word starts where possible
+        cuts = [0]
+        for end in boundaries[1:]:
+            begin = cuts[-1]
+            while end - begin > self.chunk_size:
+                limit = begin + self.chunk_size
+                cut = limit
+                while cut > begin and kinds[tokens[cut]] != _WORD_START:
+                    cut -= 1
+                if cut == begin:
+                    cut = limit
+                    while cut > begin + 1 and not char_start(cut):
+                        cut -= 1
+                cuts.append(cut)
+                begin = cut
+            cuts.append(end)
+
+        # Pack whole pieces into chunks, carrying trailing pieces over as overlap
+        data = text.encode("utf-8")
+        first = 0
+        last_piece = len(cuts) - 1
+        while first < last_piece:
+            last = first + 1
+            while last < last_piece and cuts[last + 1] - cuts[first] <= self.chunk_size:
+                last += 1
+
+            chunk = data[offsets[cuts[first]]:offsets[cuts[last]]].decode("utf-8", errors="ignore").strip()
+            if chunk:
+                yield chunk
+            if last == last_piece:
+                break
+
+            next_first = last
+            while next_first - 1 > first and cuts[last] - cuts[next_first - 1] <= self.chunk_overlap:
+                next_first -= 1
+            first = next_first
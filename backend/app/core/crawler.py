@@ -1,18 +1,171 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Set, Optional
+from urllib.robotparser import RobotFileParser
+from collections import deque
+from typing import List, Dict, Set, Optional, Iterator
 
 from app.config import settings
+from app.core.http_cache import ResponseCache, REPLAY, OFF
+
+class HostRateLimiter:
+    """
+    Token bucket for a single host whose refill rate adapts to the host.
+
+    The rate grows additively while responses are fast and is cut
+    multiplicatively when responses get slow or the host answers 429/503.
+    Retry-After pauses the host entirely, and a robots.txt Crawl-delay caps
+    the maximum rate.
+    """
+    
+    def __init__(
+        self,
+        rate: float = None,
+        min_rate: float = None,
+        max_rate: float = None,
+        target_latency: float = None
+    ):
+        self.min_rate = min_rate or settings.CRAWLER_MIN_RATE
+        self.max_rate = max_rate or settings.CRAWLER_MAX_RATE
+        self.rate = min(rate or settings.CRAWLER_INITIAL_RATE, self.max_rate)
+        self.target_latency = target_latency or settings.CRAWLER_TARGET_LATENCY
+        self.tokens = 1.0
+        self.blocked_until = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def set_crawl_delay(self, delay: Optional[float]):
+        """Never request more often than robots.txt allows."""
+        if delay:
+            self.max_rate = min(self.max_rate, 1.0 / delay)
+            self.min_rate = min(self.min_rate, self.max_rate)
+            self.rate = min(self.rate, self.max_rate)
+    
+    def _refill(self, now: float):
+        # Burst is capped at one token so requests stay evenly spaced
+        self.tokens = min(1.0, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def acquire(self):
+        """Block until the host may be requested again."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait_for = max(self.blocked_until - now, (1.0 - self.tokens) / self.rate)
+            time.sleep(wait_for)
+    
+    def record(self, status_code: int, latency: float, retry_after: Optional[float] = None):
+        """Adapt the rate to a response."""
+        with self._lock:
+            if status_code in (429, 503):
+                self.rate = max(self.min_rate, self.rate / 2)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                self.tokens = 0.0
+            elif latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.75)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.25)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
 
 class WebCrawler:
-    def __init__(self, base_url: str, max_pages: int = None):
+    def __init__(
+        self,
+        base_url: str,
+        max_pages: int = None,
+        state: Optional[Dict] = None,
+        concurrency: int = None,
+        cache: Optional[ResponseCache] = None
+    ):
         self.base_url = base_url
         self.max_pages = max_pages or settings.MAX_PAGES_PER_CRAWL
+        self.concurrency = concurrency or settings.CRAWLER_CONCURRENCY
         self.visited_urls: Set[str] = set()
+        self.frontier = deque([base_url])
+        self.queued_urls: Set[str] = {base_url}
+        self.fetching_urls: Set[str] = set()
+        self.retries: Dict[str, int] = {}
+        self.pages_emitted = 0
+        # Every fetch counts against max_pages, including errors and retries
+        self.attempted = 0
         self.domain = urlparse(base_url).netloc
         
+        # One pooled session so connections are reused across fetches
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = settings.CRAWLER_USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Optional record/replay cache for offline runs and benchmarks
+        if cache is None and settings.CRAWLER_CACHE_DIR and settings.CRAWLER_CACHE_MODE != OFF:
+            cache = ResponseCache(settings.CRAWLER_CACHE_DIR, settings.CRAWLER_CACHE_MODE)
+        self.cache = cache
+        
+        self.limiters: Dict[str, HostRateLimiter] = {}
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._limiters_lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self.fetch_count = 0
+        self._crawl_started_at: Optional[float] = None
+        
+        if state:
+            self.restore(state)
+    
+    @property
+    def fetch_rate(self) -> float:
+        """Fetches per second achieved since the crawl started."""
+        if not self._crawl_started_at:
+            return 0.0
+        elapsed = time.monotonic() - self._crawl_started_at
+        return self.fetch_count / elapsed if elapsed > 0 else 0.0
+    
+    def host_rates(self) -> Dict[str, float]:
+        """Current adaptive request rate per host."""
+        return {host: round(limiter.rate, 3) for host, limiter in list(self.limiters.items())}
+    
+    def snapshot(self) -> Dict:
+        """Return the crawl state (frontier, visited set, emitted-page cursor) as JSON-safe data."""
+        return {
+            # URLs being fetched right now go back to the front of the frontier
+            "frontier": list(self.fetching_urls) + list(self.frontier),
+            "visited": list(self.visited_urls),
+            "emitted": self.pages_emitted,
+            "attempted": self.attempted
+        }
+    
+    def restore(self, state: Dict):
+        """Resume from a state produced by snapshot()."""
+        self.frontier = deque(dict.fromkeys(state.get("frontier") or []))
+        self.queued_urls = set(self.frontier)
+        self.visited_urls = set(state.get("visited") or [])
+        self.pages_emitted = state.get("emitted", 0)
+        self.attempted = state.get("attempted", len(self.visited_urls))
+        
     def is_valid_url(self, url: str) -> bool:
         """Check if URL is valid and belongs to the same domain."""
         parsed = urlparse(url)
@@ -65,52 +218,165 @@ class WebCrawler:
                 
         return links
     
-    def crawl(self) -> List[Dict]:
+    def _get_limiter(self, host: str) -> HostRateLimiter:
+        with self._limiters_lock:
+            if host in self.limiters:
+                return self.limiters[host]
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        # robots.txt is fetched under the host's own lock so fetches for other hosts are not held up
+        with host_lock:
+            if host not in self.limiters:
+                limiter = HostRateLimiter()
+                robots = self._load_robots(host)
+                if robots:
+                    limiter.set_crawl_delay(robots.crawl_delay(settings.CRAWLER_USER_AGENT))
+                self.limiters[host] = limiter
+            return self.limiters[host]
+    
+    def _load_robots(self, host: str) -> Optional[RobotFileParser]:
+        """Fetch and cache robots.txt for a host. Missing robots.txt allows everything."""
+        if not settings.CRAWLER_RESPECT_ROBOTS:
+            return None
+        if host not in self.robots:
+            scheme = urlparse(self.base_url).scheme or "https"
+            robots_url = f"{scheme}://{host}/robots.txt"
+            parser = None
+            try:
+                response = self._request(robots_url)
+                if response.status_code == 200:
+                    parser = RobotFileParser(robots_url)
+                    parser.parse(response.text.splitlines())
+            except Exception as e:
+                print(f"Could not fetch {robots_url}: {e}")
+            self.robots[host] = parser
+        return self.robots[host]
+    
+    def is_allowed(self, url: str) -> bool:
+        """Check robots.txt rules for the URL."""
+        host = urlparse(url).netloc
+        self._get_limiter(host)
+        robots = self.robots.get(host)
+        return robots is None or robots.can_fetch(settings.CRAWLER_USER_AGENT, url)
+    
+    def _request(self, url: str, limiter: Optional[HostRateLimiter] = None) -> requests.Response:
+        """GET a URL, going through the response cache when one is configured."""
+        if self.cache and self.cache.reads:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+            if self.cache.mode == REPLAY:
+                return ResponseCache.not_found(url)
+        
+        if limiter:
+            limiter.acquire()
+        started = time.monotonic()
+        response = self.session.get(url, timeout=settings.CRAWLER_REQUEST_TIMEOUT)
+        if limiter:
+            limiter.record(
+                response.status_code,
+                time.monotonic() - started,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+        
+        # Throttling responses are transient and must not be replayed
+        if self.cache and self.cache.writes and response.status_code not in (429, 503):
+            self.cache.put(url, response)
+        return response
+    
+    def fetch(self, url: str) -> requests.Response:
+        """Fetch a URL through its host's rate limiter."""
+        return self._request(url, self._get_limiter(urlparse(url).netloc))
+    
+    def _process_response(self, url: str, response: requests.Response) -> Optional[Dict]:
+        """Extract a page and enqueue its links. Returns None for pages not worth indexing."""
+        if response.status_code in (429, 503):
+            attempts = self.retries.get(url, 0) + 1
+            if attempts <= settings.CRAWLER_MAX_RETRIES:
+                print(f"Throttled on {url} ({response.status_code}), retrying later")
+                self.retries[url] = attempts
+                self.frontier.append(url)
+            else:
+                print(f"Giving up on {url} after {attempts - 1} retries")
+            return None
+        if response.status_code != 200:
+            print(f"Failed to crawl {url}: Status code {response.status_code}")
+            return None
+            
+        self.visited_urls.add(url)
+        html = response.text
+        
+        # Extract content
+        text = self.extract_text(html)
+        title = self.extract_title(html)
+        
+        # Find new links before handing the page downstream
+        links = self.get_links(html, url)
+        for link in links:
+            if link not in self.queued_urls:
+                self.queued_urls.add(link)
+                self.frontier.append(link)
+        
+        if len(text) > 100:  # Only include pages with substantial content
+            self.pages_emitted += 1
+            return {
+                "url": url,
+                "title": title,
+                "content": text
+            }
+        return None
+    
+    def iter_pages(self) -> Iterator[Dict]:
         """
-        Crawl the website starting from base_url.
-        Returns a list of dictionaries with page content.
+        Crawl the website starting from base_url, yielding each page as soon
+        as it has been fetched and extracted.
+        
+        Up to `concurrency` fetches run at once; each host's rate limiter
+        decides how fast they actually go. Parsing happens on the calling
+        thread, so crawler state is only ever mutated here.
         """
-        to_visit = [self.base_url]
-        results = []
+        self._crawl_started_at = self._crawl_started_at or time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawl-fetch")
+        in_progress = {}
         
-        while to_visit and len(self.visited_urls) < self.max_pages:
-            current_url = to_visit.pop(0)
-            
-            if current_url in self.visited_urls:
-                continue
+        try:
+            while True:
+                while (
+                    self.frontier
+                    and len(in_progress) < self.concurrency
+                    and self.attempted + len(in_progress) < self.max_pages
+                ):
+                    url = self.frontier.popleft()
+                    if url in self.visited_urls or url in self.fetching_urls:
+                        continue
+                    if not self.is_allowed(url):
+                        print(f"Skipping {url}: disallowed by robots.txt")
+                        continue
+                    print(f"Crawling: {url}")
+                    self.fetching_urls.add(url)
+                    in_progress[pool.submit(self.fetch, url)] = url
                 
-            try:
-                print(f"Crawling: {current_url}")
-                response = requests.get(
-                    current_url, 
-                    timeout=10,
-                    headers={
-                        'User-Agent': 'AI Chatbot Crawler (+https://github.com/your-repo/ai-chatbot-platform)'
-                    }
-                )
-                if response.status_code != 200:
-                    print(f"Failed to crawl {current_url}: Status code {response.status_code}")
-                    continue
-                    
-                self.visited_urls.add(current_url)
-                html = response.text
-                
-                # Extract content
-                text = self.extract_text(html)
-                title = self.extract_title(html)
-                
-                if len(text) > 100:  # Only include pages with substantial content
-                    results.append({
-                        "url": current_url,
-                        "title": title,
-                        "content": text
-                    })
-                
-                # Find new links
-                links = self.get_links(html, current_url)
-                to_visit.extend(links)
-                
-            except Exception as e:
-                print(f"Error crawling {current_url}: {e}")
+                if not in_progress:
+                    break
                 
-        return results
+                done, _ = wait(in_progress, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_progress.pop(future)
+                    self.fetching_urls.discard(url)
+                    self.fetch_count += 1
+                    self.attempted += 1
+                    try:
+                        page = self._process_response(url, future.result())
+                    except Exception as e:
+                        print(f"Error crawling {url}: {e}")
+                        continue
+                    if page:
+                        yield page
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def crawl(self) -> List[Dict]:
+        """
+        Crawl the website starting from base_url.
+        Returns a list of dictionaries with page content.
+        """
+        return list(self.iter_pages())
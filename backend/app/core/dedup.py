@@ -0,0 +1,96 @@
+import hashlib
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash of the text's word shingles.
+
+    Texts that share most of their shingles get fingerprints that differ in
+    only a few bits, so near-duplicates can be found by Hamming distance.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = Counter([" ".join(words)])
+    else:
+        shingles = Counter(
+            " ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)
+        )
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        h = _hash64(shingle)
+        for bit in range(FINGERPRINT_BITS):
+            if h >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    In-memory LSH index over SimHash fingerprints.
+
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints
+    within max_distance bits of each other must agree exactly on at least one
+    band (pigeonhole), so only pages sharing a band bucket are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        width = FINGERPRINT_BITS // band_count
+        self._bands: List[Tuple[int, int]] = []
+        for i in range(band_count):
+            start = i * width
+            end = FINGERPRINT_BITS if i == band_count - 1 else start + width
+            self._bands.append((start, (1 << (end - start)) - 1))
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [defaultdict(list) for _ in self._bands]
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def _band_keys(self, fingerprint: int):
+        return [(fingerprint >> start) & mask for start, mask in self._bands]
+
+    def find(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[str]:
+        """Return the key of an indexed near-duplicate other than exclude, if any."""
+        with self._lock:
+            for buckets, band_key in zip(self._buckets, self._band_keys(fingerprint)):
+                for other, key in buckets.get(band_key, ()):
+                    if key != exclude and hamming_distance(fingerprint, other) <= self.max_distance:
+                        return key
+        return None
+
+    def add(self, fingerprint: int, key: str):
+        with self._lock:
+            for buckets, band_key in zip(self._buckets, self._band_keys(fingerprint)):
+                buckets[band_key].append((fingerprint, key))
+            self.size += 1
+
+    def check_and_add(self, fingerprint: int, key: str) -> Optional[str]:
+        """Return the key of a near-duplicate, or index the fingerprint and return None."""
+        duplicate_of = self.find(fingerprint, exclude=key)
+        if duplicate_of is None:
+            self.add(fingerprint, key)
+        return duplicate_of
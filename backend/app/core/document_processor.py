@@ -1,82 +1,141 @@
-from typing import List, Dict, Any
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+from app.config import settings
+from app.core.chunker import TokenChunker
+
+class ChunkSource:
+    """
+    Per-document fields shared by every chunk of a document, page or file,
+    so they are stored once rather than copied into each chunk.
+    """
+    __slots__ = ("id_prefix", "title", "url", "client_id", "metadata")
+
+    def __init__(self, id_prefix: str, title: str, metadata: Dict[str, Any],
+                 url: Optional[str] = None, client_id: Optional[str] = None):
+        self.id_prefix = id_prefix
+        self.title = title
+        self.url = url
+        self.client_id = client_id
+        self.metadata = metadata
+
+class Chunk:
+    """A chunk of text and its position within its source."""
+    __slots__ = ("content", "index", "source")
+
+    def __init__(self, content: str, index: int, source: ChunkSource):
+        self.content = content
+        self.index = index
+        self.source = source
+
+    @property
+    def chunk_id(self) -> str:
+        return f"{self.source.id_prefix}_{self.index}"
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.source.url
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return {**self.source.metadata, "chunk": self.index}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The chunk in the dict format returned by the list-based methods."""
+        chunk = {"content": self.content, "title": self.source.title}
+        if self.source.url is not None:
+            chunk["url"] = self.source.url
+        chunk["chunk_id"] = self.chunk_id
+        if self.source.client_id is not None:
+            chunk["client_id"] = self.source.client_id
+        chunk["metadata"] = self.metadata
+        return chunk
 
 class DocumentProcessor:
-    def __init__(self, chunk_size=1000, chunk_overlap=200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
+    def __init__(self, chunk_size=None, chunk_overlap=None, encoding_name=None):
+        # Chunk sizes are in tokens, matching the limits of the embedder and LLM
+        self.text_splitter = TokenChunker(
+            chunk_size=chunk_size or settings.CHUNK_SIZE_TOKENS,
+            chunk_overlap=settings.CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap,
+            encoding_name=encoding_name or settings.CHUNK_ENCODING,
+        )
+
+    def _iter_chunks(self, text: Union[str, Iterable[str]], source: ChunkSource) -> Iterator[Chunk]:
+        # Text can also be given as sections (e.g. PDF pages); chunks never span sections
+        sections = [text] if isinstance(text, str) else text
+        i = 0
+        for section in sections:
+            for content in self.text_splitter.iter_text(section):
+                yield Chunk(content, i, source)
+                i += 1
+
+    def iter_crawled_chunks(self, page: Dict) -> Iterator[Chunk]:
+        """
+        Lazily chunk a crawled page.
+        """
+        source = ChunkSource(
+            id_prefix=page["url"],
+            title=page["title"],
+            url=page["url"],
+            metadata={
+                "source": page["url"],
+                "title": page["title"]
+            }
+        )
+        return self._iter_chunks(page["content"], source)
+
+    def iter_document_chunks(self, document: Dict, client_id: str) -> Iterator[Chunk]:
+        """
+        Lazily chunk a single document. Its content may be a string or an
+        iterable of sections.
+        """
+        source = ChunkSource(
+            id_prefix=document["id"],
+            title=document["title"],
+            url=document.get("url", ""),
+            client_id=client_id,
+            metadata={
+                "source": document.get("url", document["id"]),
+                "title": document["title"],
+                "document_id": document["id"],
+                "client_id": client_id
+            }
+        )
+        return self._iter_chunks(document["content"], source)
+
+    def iter_file_chunks(self, file_content: Union[str, Iterable[str]], file_name: str, client_id: str) -> Iterator[Chunk]:
+        """
+        Lazily chunk the text of a file, given as a string or an iterable of
+        sections (see app.core.file_extractors).
+        """
+        source = ChunkSource(
+            id_prefix=file_name,
+            title=file_name,
+            client_id=client_id,
+            metadata={
+                "source": file_name,
+                "title": file_name,
+                "client_id": client_id
+            }
         )
-    
+        return self._iter_chunks(file_content, source)
+
     def process_crawled_data(self, crawled_data: List[Dict]) -> List[Dict]:
         """
         Process crawled website data into chunks suitable for embedding.
         """
-        processed_chunks = []
-        
-        for page in crawled_data:
-            chunks = self.text_splitter.split_text(page["content"])
-            
-            for i, chunk in enumerate(chunks):
-                processed_chunks.append({
-                    "content": chunk,
-                    "title": page["title"],
-                    "url": page["url"],
-                    "chunk_id": f"{page['url']}_{i}",
-                    "metadata": {
-                        "source": page["url"],
-                        "title": page["title"],
-                        "chunk": i
-                    }
-                })
-                
-        return processed_chunks
-    
+        return [
+            chunk.to_dict()
+            for page in crawled_data
+            for chunk in self.iter_crawled_chunks(page)
+        ]
+
     def process_document(self, document: Dict, client_id: str) -> List[Dict]:
         """
         Process a single document into chunks suitable for embedding.
         """
-        chunks = self.text_splitter.split_text(document["content"])
-        processed_chunks = []
-        
-        for i, chunk in enumerate(chunks):
-            processed_chunks.append({
-                "content": chunk,
-                "title": document["title"],
-                "url": document.get("url", ""),
-                "chunk_id": f"{document['id']}_{i}",
-                "client_id": client_id,
-                "metadata": {
-                    "source": document.get("url", document["id"]),
-                    "title": document["title"],
-                    "document_id": document["id"],
-                    "client_id": client_id,
-                    "chunk": i
-                }
-            })
-            
-        return processed_chunks
-    
+        return [chunk.to_dict() for chunk in self.iter_document_chunks(document, client_id)]
+
     def process_file(self, file_content: str, file_name: str, client_id: str) -> List[Dict]:
         """
         Process a file into chunks suitable for embedding.
         """
-        chunks = self.text_splitter.split_text(file_content)
-        processed_chunks = []
-        
-        for i, chunk in enumerate(chunks):
-            processed_chunks.append({
-                "content": chunk,
-                "title": file_name,
-                "chunk_id": f"{file_name}_{i}",
-                "client_id": client_id,
-                "metadata": {
-                    "source": file_name,
-                    "title": file_name,
-                    "client_id": client_id,
-                    "chunk": i
-                }
-            })
-            
-        return processed_chunks
+        return [chunk.to_dict() for chunk in self.iter_file_chunks(file_content, file_name, client_id)]
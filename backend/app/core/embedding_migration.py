@@ -0,0 +1,233 @@
+"""
+Online re-embedding of a client's knowledge base into a new index or
+namespace (blue/green):
+
+1. start_migration records the target on the client, so every writer that
+   starts from then on writes to both the live namespace and the new one.
+2. wait_for_jobs waits out background jobs that were already running and
+   so only write to the live namespace.
+3. backfill re-embeds the client's documents and crawled pages from the
+   database into the target, in parallel, throttled batches.
+4. switch_reads points the client's reads at the target in one UPDATE.
+
+Chat keeps reading from the live namespace until the switch. The old
+namespace can be deleted once API processes have dropped their cached
+copy of the client (see app.core.auth_cache).
+"""
+
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.auth_cache import client_cache
+from app.core.job_queue import RUNNING
+from app.core.vector_routing import VectorTarget, migration_target, read_target
+from app.database import models
+
+logger = logging.getLogger(__name__)
+
+
+def start_migration(db: Session, client_id: str, target: VectorTarget) -> List[Tuple[str, int]]:
+    """
+    Start dual-writing the client's vectors to target. Returns the
+    (id, attempts) of the jobs running at that moment; see wait_for_jobs.
+    Starting a migration that is already in progress is a no-op.
+    """
+    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    if client is None:
+        raise ValueError(f"Client {client_id} not found")
+    if read_target(client) == target:
+        raise ValueError(f"Client {client_id} already reads from {target.index_name}/{target.namespace}")
+    current = migration_target(client)
+    if current is not None and current != target:
+        raise ValueError(f"Client {client_id} is already migrating to {current.index_name}/{current.namespace}")
+
+    client.vector_migration_index = target.index_name
+    client.vector_migration_namespace = target.namespace
+    db.commit()
+    return list(
+        db.query(models.BackgroundJob.id, models.BackgroundJob.attempts)
+        .filter(models.BackgroundJob.status == RUNNING)
+    )
+
+
+def wait_for_jobs(db: Session, jobs: List[Tuple[str, int]], poll_seconds: float = 5.0):
+    """
+    Wait until the given job attempts have finished or lost their lease. A
+    retry loads the client again and so writes to both targets.
+    """
+    pending = dict(jobs)
+    while pending:
+        rows = db.query(
+            models.BackgroundJob.id,
+            models.BackgroundJob.status,
+            models.BackgroundJob.attempts,
+            models.BackgroundJob.locked_until
+        ).filter(models.BackgroundJob.id.in_(list(pending)))
+        now = datetime.utcnow()
+        pending = {
+            job_id: attempts for job_id, status, attempts, locked_until in rows
+            if status == RUNNING and attempts == pending[job_id] and locked_until and locked_until > now
+        }
+        # End the read transaction so the next poll sees new commits
+        db.rollback()
+        if pending:
+            logger.info(f"Waiting for {len(pending)} running jobs to finish")
+            time.sleep(poll_seconds)
+
+
+def iter_client_chunks(db: Session, client_id: str, document_processor) -> Iterator:
+    """Chunks of the client's documents and of the latest indexed version of each crawled page."""
+    documents = db.query(
+        models.Document.id, models.Document.title, models.Document.content, models.Document.url
+    ).filter(models.Document.client_id == client_id).yield_per(100)
+    for document_id, title, content, url in documents:
+        yield from document_processor.iter_document_chunks(
+            {"id": document_id, "title": title, "content": content, "url": url},
+            client_id
+        )
+
+    pages = db.query(
+        models.CrawledPage.url, models.CrawledPage.title, models.CrawledPage.content
+    ).filter(
+        models.CrawledPage.client_id == client_id,
+        models.CrawledPage.status == "indexed"
+    ).order_by(models.CrawledPage.url, models.CrawledPage.created_at.desc()).yield_per(100)
+    previous_url = None
+    for url, title, content in pages:
+        if url == previous_url or content is None:
+            continue
+        previous_url = url
+        yield from document_processor.iter_crawled_chunks(
+            {"url": url, "title": title or "", "content": zlib.decompress(content).decode("utf-8")}
+        )
+
+
+class RateLimiter:
+    """Spaces calls out to at most rate per second across threads; no rate means no limit."""
+
+    def __init__(self, rate: Optional[float] = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def backfill(
+    db: Session,
+    client_id: str,
+    vector_store,
+    namespace: str,
+    document_processor,
+    batch_size: Optional[int] = None,
+    workers: int = 4,
+    max_batches_per_second: Optional[float] = None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Re-embed every chunk of the client's knowledge base into namespace of
+    vector_store. Batches are embedded and upserted on a thread pool, at
+    most max_batches_per_second of them, while the database is read and
+    chunked on the calling thread. Returns the number of chunks written.
+    """
+    batch_size = batch_size or settings.EMBED_BATCH_SIZE
+    limiter = RateLimiter(max_batches_per_second)
+
+    def write(batch) -> int:
+        limiter.wait()
+        texts = [chunk.content for chunk in batch]
+        vector_store.upsert_embeddings(
+            ids=[chunk.chunk_id for chunk in batch],
+            embeddings=vector_store.embed_texts(texts),
+            texts=texts,
+            metadatas=[chunk.metadata for chunk in batch],
+            namespace=namespace
+        )
+        return len(batch)
+
+    count = 0
+    chunks = iter_client_chunks(db, client_id, document_processor)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+
+        def collect():
+            nonlocal in_flight, count
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                count += future.result()
+            if on_progress:
+                on_progress(count)
+
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                break
+            in_flight.add(pool.submit(write, batch))
+            # Bound the chunks held in memory while the embedder catches up
+            if len(in_flight) >= workers * 2:
+                collect()
+        while in_flight:
+            collect()
+    return count
+
+
+def switch_reads(db: Session, client_id: str) -> Optional[VectorTarget]:
+    """
+    Point the client's reads at its migration target and end the migration,
+    in a single UPDATE. Returns the target reads came from before, or None
+    if no migration was in progress.
+    """
+    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    target = migration_target(client) if client is not None else None
+    if target is None:
+        return None
+    previous = read_target(client)
+
+    result = db.execute(
+        update(models.Client)
+        .where(
+            models.Client.id == client_id,
+            models.Client.vector_migration_namespace == target.namespace
+        )
+        .values(
+            vector_index=target.index_name,
+            vector_namespace=target.namespace,
+            vector_migration_index=None,
+            vector_migration_namespace=None
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        return None
+    client_cache.invalidate(client.api_key)
+    return previous
+
+
+def abort_migration(db: Session, client_id: str) -> Optional[VectorTarget]:
+    """Stop dual-writing and return the abandoned target, if there was one."""
+    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    target = migration_target(client) if client is not None else None
+    if target is not None:
+        client.vector_migration_index = None
+        client.vector_migration_namespace = None
+        db.commit()
+    return target
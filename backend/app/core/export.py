@@ -0,0 +1,141 @@
+"""
+Streaming export of a client's chat messages, with their sessions.
+
+Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time and
+encoded (and compressed) as they arrive, so an export holds one batch in
+memory however many rows it has. Months that app.core.chat_archive has
+moved out of the database are read back from the archive files.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from enum import Enum
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database.models import ChatMessage, ChatSession
+
+# Export columns, one row per message
+COLUMNS = (
+    ChatMessage.session_id,
+    ChatSession.user_id,
+    ChatSession.start_time.label("session_start"),
+    ChatSession.end_time.label("session_end"),
+    ChatMessage.id.label("message_id"),
+    ChatMessage.created_at,
+    ChatMessage.user_message,
+    ChatMessage.bot_response,
+)
+FIELDS = [column.key for column in COLUMNS]
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def as_naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert timezone-aware bounds to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def export_query(client_id: str, start: datetime, end: datetime):
+    """A client's messages created in [start, end), oldest first."""
+    return select(*COLUMNS).join(ChatSession, ChatSession.id == ChatMessage.session_id).where(
+        ChatMessage.client_id == client_id,
+        ChatMessage.created_at >= as_naive_utc(start),
+        ChatMessage.created_at < as_naive_utc(end)
+    ).order_by(ChatMessage.created_at, ChatMessage.id)
+
+
+def json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({field: json_value(value) for field, value in zip(FIELDS, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows, header: bool = False) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows([json_value(value) for value in row] for row in rows)
+    return out.getvalue()
+
+
+async def iter_export(
+    client_id: str,
+    start: datetime,
+    end: datetime,
+    format: ExportFormat = ExportFormat.NDJSON,
+    compress: bool = False,
+    engine=None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    The export as byte chunks, gzip-compressed if compress, one or less per
+    batch of rows. Months moved to the archive are read from there.
+    """
+    from app.core.chat_archive import archive_boundary, iter_archived_rows
+
+    if engine is None:
+        from app.database.session import get_async_engine
+
+        engine = get_async_engine()
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    # wbits=31 writes a gzip stream rather than raw zlib
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    def encode_rows(rows) -> bytes:
+        return encode(_encode_csv(rows) if format == ExportFormat.CSV else _encode_ndjson(rows))
+
+    if format == ExportFormat.CSV:
+        yield encode(_encode_csv([], header=True))
+
+    start, end = as_naive_utc(start), as_naive_utc(end)
+    boundary = archive_boundary()
+    if boundary is not None and start < boundary:
+        # Archived months first; they all precede what is still in the database
+        archived = iter_archived_rows(client_id, start, min(end, boundary), batch_size)
+        while True:
+            # Reading and decompressing the files blocks, so it happens off the event loop
+            rows = await asyncio.to_thread(next, archived, None)
+            if rows is None:
+                break
+            yield encode_rows([[row[field] for field in FIELDS] for row in rows])
+        start = boundary
+
+    if start < end:
+        # Its own connection: the request's session is closed once the response starts
+        async with engine.connect() as connection:
+            query = export_query(client_id, start, end).execution_options(yield_per=batch_size)
+            result = await connection.stream(query)
+            async for rows in result.partitions():
+                chunk = encode_rows(rows)
+                if chunk:
+                    yield chunk
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,107 @@
+import os
+import re
+from typing import Callable, Dict, Iterator
+
+from bs4 import BeautifulSoup
+
+# Plain text and Markdown are read line by line and cut into sections of
+# roughly this many characters, at a blank line where possible
+MAX_SECTION_CHARS = 64 * 1024
+
+_MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+
+class UnsupportedFileType(ValueError):
+    pass
+
+
+def _iter_line_sections(path: str, starts_section: Callable[[str], bool] = lambda line: False) -> Iterator[str]:
+    section = []
+    size = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            blank = not line.strip()
+            if section and (starts_section(line) or size >= MAX_SECTION_CHARS * 2 or
+                            (blank and size >= MAX_SECTION_CHARS)):
+                yield "".join(section)
+                section, size = [], 0
+            section.append(line)
+            size += len(line)
+    if section:
+        yield "".join(section)
+
+
+def iter_text_sections(path: str) -> Iterator[str]:
+    return _iter_line_sections(path)
+
+
+def iter_markdown_sections(path: str) -> Iterator[str]:
+    """One section per heading."""
+    return _iter_line_sections(path, lambda line: bool(_MARKDOWN_HEADING_RE.match(line)))
+
+
+def iter_html_sections(path: str) -> Iterator[str]:
+    """The visible text of the page."""
+    with open(path, "rb") as f:
+        soup = BeautifulSoup(f, "html.parser")
+    for element in soup(["script", "style", "noscript"]):
+        element.decompose()
+    yield soup.get_text(separator="\n", strip=True)
+
+
+def iter_pdf_sections(path: str) -> Iterator[str]:
+    """One section per page; pages are parsed as they are read."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedFileType("PDF support requires the pypdf package")
+
+    reader = PdfReader(path)
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if text.strip():
+            yield text
+
+
+def iter_docx_sections(path: str) -> Iterator[str]:
+    """One section per heading."""
+    try:
+        import docx
+    except ImportError:
+        raise UnsupportedFileType("DOCX support requires the python-docx package")
+
+    section = []
+    for paragraph in docx.Document(path).paragraphs:
+        style = paragraph.style.name if paragraph.style is not None else ""
+        if section and style.startswith("Heading"):
+            yield "\n\n".join(section)
+            section = []
+        if paragraph.text.strip():
+            section.append(paragraph.text)
+    if section:
+        yield "\n\n".join(section)
+
+
+EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {
+    ".pdf": iter_pdf_sections,
+    ".docx": iter_docx_sections,
+    ".html": iter_html_sections,
+    ".htm": iter_html_sections,
+    ".md": iter_markdown_sections,
+    ".markdown": iter_markdown_sections,
+    ".txt": iter_text_sections,
+}
+
+SUPPORTED_EXTENSIONS = tuple(EXTRACTORS)
+
+
+def iter_file_sections(path: str, file_name: str) -> Iterator[str]:
+    """
+    Extract the text of a file as a sequence of sections (pages, headings
+    or blocks of paragraphs) so large files never have to be held in memory
+    as a single string. The type is taken from file_name's extension.
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in EXTRACTORS:
+        raise UnsupportedFileType(f"Unsupported file type '{extension or file_name}'")
+    return EXTRACTORS[extension](path)
@@ -0,0 +1,119 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+OFF = "off"
+RECORD = "record"    # always fetch live and store the response
+REPLAY = "replay"    # never touch the network; misses become 404s
+AUTO = "auto"        # replay hits, fetch and record misses
+
+MODES = (OFF, RECORD, REPLAY, AUTO)
+
+# Headers worth keeping; everything else is noise for replay
+KEPT_HEADERS = ("content-type", "retry-after", "location")
+
+
+class ResponseCache:
+    """
+    On-disk store of HTTP responses keyed by URL.
+
+    Each response is one gzip-compressed JSON file named after the SHA-256 of
+    its URL, sharded into subdirectories by the first two hex digits. The
+    format is simple enough to inspect with zcat and to check into a fixture
+    directory for offline tests and benchmarks.
+    """
+
+    def __init__(self, path: str, mode: str = AUTO):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in (REPLAY, AUTO)
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in (RECORD, AUTO)
+
+    def _file_for(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, key[:2], f"{key}.json.gz")
+
+    def get(self, url: str) -> Optional[requests.Response]:
+        """Return the recorded response for url, or None on a miss."""
+        try:
+            with gzip.open(self._file_for(url), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return self._to_response(entry)
+
+    def put(self, url: str, response: requests.Response):
+        """Record a response for url."""
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() in KEPT_HEADERS
+            },
+            "encoding": response.encoding,
+            "body": base64.b64encode(response.content).decode("ascii"),
+        }
+        file_path = self._file_for(url)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Write then rename so a crashed recording never leaves a truncated entry
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, file_path)
+
+    def entries(self) -> Iterator[Dict]:
+        """Iterate over every recorded entry (body still base64-encoded)."""
+        if not os.path.isdir(self.path):
+            return
+        for shard in sorted(os.listdir(self.path)):
+            shard_path = os.path.join(self.path, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in sorted(os.listdir(shard_path)):
+                if name.endswith(".json.gz"):
+                    with gzip.open(os.path.join(shard_path, name), "rt", encoding="utf-8") as f:
+                        yield json.load(f)
+
+    @staticmethod
+    def _to_response(entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.url = entry["url"]
+        response.status_code = entry["status_code"]
+        response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        response.headers["X-Cache"] = "hit"
+        response.encoding = entry.get("encoding")
+        response._content = base64.b64decode(entry["body"])
+        return response
+
+    @staticmethod
+    def not_found(url: str) -> requests.Response:
+        """Response used for replay misses."""
+        response = requests.Response()
+        response.url = url
+        response.status_code = 404
+        response.headers = CaseInsensitiveDict({"X-Cache": "miss"})
+        response._content = b""
+        return response
@@ -0,0 +1,364 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.crawler import WebCrawler
+from app.core.dedup import SimHashIndex, simhash
+from app.core.document_processor import Chunk, DocumentProcessor
+from app.core.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Sentinels passed between stages
+_DONE = object()
+_IDLE = object()
+
+STAGES = ("crawl", "chunk", "embed", "upsert")
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        rate = self.items_out / self.busy_seconds if self.busy_seconds else 0.0
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(rate, 2)
+        }
+
+
+class IngestionPipeline:
+    """
+    Streams pages from a WebCrawler through chunking, embedding and upserting.
+
+    Each stage runs in its own thread and stages are connected by bounded
+    queues, so a slow stage applies back-pressure upstream and the number of
+    pages and chunks held in memory never exceeds the queue sizes.
+
+    Every checkpoint_every pages the crawl stage captures a checkpoint of the
+    crawler state. Pages that were emitted but not yet fully upserted are
+    moved back to the front of the checkpoint's frontier, so resuming from it
+    never loses a page that was still sitting in a queue.
+    """
+
+    def __init__(
+        self,
+        crawler: WebCrawler,
+        document_processor: DocumentProcessor,
+        vector_store: VectorStore,
+        client_id: str,
+        queue_size: int = None,
+        batch_size: int = None,
+        checkpoint_every: int = None,
+        page_sink: Optional[Callable[[Dict, int], None]] = None,
+        dedup_index: Optional[SimHashIndex] = None,
+        indexed_sink: Optional[Callable[[List[str]], None]] = None
+    ):
+        self.crawler = crawler
+        self.document_processor = document_processor
+        self.vector_store = vector_store
+        self.client_id = client_id
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        self.checkpoint_every = checkpoint_every or settings.CRAWL_CHECKPOINT_EVERY
+        # Called with each page and its chunk count once it has been chunked
+        self.page_sink = page_sink
+        # Called with the URLs whose vectors are now all written
+        self.indexed_sink = indexed_sink
+        # Near-duplicate pages are recorded but never chunked or embedded
+        self.dedup_index = dedup_index
+        self.duplicates = 0
+        self.stats = {name: StageStats(name) for name in STAGES}
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._started_at: Optional[float] = None
+        # url -> chunks not yet upserted (None until the page has been chunked)
+        self._in_flight: Dict[str, Optional[int]] = {}
+        self._in_flight_lock = threading.Lock()
+        self._checkpoint: Optional[Dict[str, Any]] = None
+        # (sink, args) from the stage threads, written out by the calling thread
+        self._records: Optional[queue.Queue] = None
+
+    def run(
+        self,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress_interval: float = 5.0,
+        on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the pipeline to completion and return the final stage counters.
+
+        on_progress and on_checkpoint are always called from the calling
+        thread, every progress_interval seconds, so they can safely share the
+        caller's database session. page_sink and indexed_sink are called
+        from the calling thread too, in the order the stages reported, so
+        the caller is the only writer. If a stage fails, a final checkpoint
+        is passed to on_checkpoint before the error is raised.
+        """
+        self._started_at = time.monotonic()
+
+        pages = queue.Queue(maxsize=self.queue_size)
+        chunks = queue.Queue(maxsize=max(self.queue_size, self.batch_size * 2))
+        embedded = queue.Queue(maxsize=self.queue_size)
+        self._records = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            self._start_stage("crawl", self._crawl_stage, pages),
+            self._start_stage("chunk", self._chunk_stage, pages, chunks),
+            self._start_stage("embed", self._embed_stage, chunks, embedded),
+            self._start_stage("upsert", self._upsert_stage, embedded),
+        ]
+
+        saved_checkpoint = None
+        next_progress = time.monotonic() + progress_interval
+        try:
+            while any(thread.is_alive() for thread in threads):
+                self._write_record(timeout=0.5)
+                if time.monotonic() < next_progress:
+                    continue
+                next_progress = time.monotonic() + progress_interval
+                if on_progress:
+                    on_progress(self.snapshot())
+                checkpoint = self._checkpoint
+                if on_checkpoint and checkpoint is not saved_checkpoint:
+                    on_checkpoint(checkpoint)
+                    saved_checkpoint = checkpoint
+            # Every stage has stopped; write out what they left queued
+            while self._write_record():
+                pass
+        except BaseException:
+            self.stop()
+            for thread in threads:
+                thread.join()
+            raise
+
+        if self._error:
+            # All stages have stopped, so the crawler state can be read here
+            if on_checkpoint:
+                on_checkpoint(self.checkpoint())
+            raise self._error
+
+        return self.snapshot()
+
+    def stop(self):
+        """Ask all stages to stop after their current item."""
+        self._stop.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current per-stage counters."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        snapshot = {
+            "elapsed_seconds": round(elapsed, 3),
+            "stages": {name: stats.as_dict() for name, stats in self.stats.items()}
+        }
+        if self.dedup_index is not None:
+            pages = self.stats["chunk"].items_in
+            snapshot["duplicates"] = self.duplicates
+            snapshot["duplicate_ratio"] = round(self.duplicates / pages, 4) if pages else 0.0
+        if hasattr(self.crawler, "fetch_rate"):
+            snapshot["fetch_rate"] = round(self.crawler.fetch_rate, 2)
+            snapshot["host_rates"] = self.crawler.host_rates()
+        return snapshot
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        Crawler state with in-flight pages moved back to the frontier.
+        Must be called from the crawl thread or after the pipeline stopped.
+        """
+        state = self.crawler.snapshot()
+        with self._in_flight_lock:
+            in_flight = list(self._in_flight)
+        pending = set(in_flight)
+        state["frontier"] = in_flight + [url for url in state["frontier"] if url not in pending]
+        state["visited"] = [url for url in state["visited"] if url not in pending]
+        state["emitted"] = state["emitted"] - len(in_flight)
+        return state
+
+    def _ack_chunks(self, url: str, count: int) -> bool:
+        """Record that count chunks of url were upserted; True once all of them are."""
+        with self._in_flight_lock:
+            remaining = self._in_flight.get(url)
+            if remaining is None:
+                return False
+            remaining -= count
+            if remaining <= 0:
+                del self._in_flight[url]
+                return True
+            self._in_flight[url] = remaining
+            return False
+
+    def _write_record(self, timeout: Optional[float] = None) -> bool:
+        """Pass one queued record to its sink; False if there was none."""
+        try:
+            sink, args = self._records.get(timeout=timeout) if timeout else self._records.get_nowait()
+        except queue.Empty:
+            return False
+        sink(*args)
+        return True
+
+    def _start_stage(self, name: str, target: Callable, *queues) -> threading.Thread:
+        def runner():
+            try:
+                target(*queues)
+            except Exception as e:
+                logger.exception(f"Ingestion stage '{name}' failed: {e}")
+                if self._error is None:
+                    self._error = e
+                self._stop.set()
+
+        thread = threading.Thread(target=runner, name=f"ingest-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Put with back-pressure, giving up only when the pipeline is stopping."""
+        while True:
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+
+    def _get(self, q: queue.Queue, idle_timeout: Optional[float] = None) -> Any:
+        """Get the next item, _IDLE after idle_timeout, or _DONE when stopping."""
+        waited = 0.0
+        while True:
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+                waited += 0.5
+                if idle_timeout is not None and waited >= idle_timeout:
+                    return _IDLE
+
+    def _crawl_stage(self, out: queue.Queue):
+        stats = self.stats["crawl"]
+        pages = self.crawler.iter_pages()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                page = next(pages, _DONE)
+                stats.busy_seconds += time.monotonic() - started
+                if page is _DONE:
+                    break
+                stats.items_in += 1
+                with self._in_flight_lock:
+                    self._in_flight[page["url"]] = None
+                if not self._put(out, page):
+                    break
+                stats.items_out += 1
+                if stats.items_out % self.checkpoint_every == 0:
+                    self._checkpoint = self.checkpoint()
+        finally:
+            pages.close()
+            self._put(out, _DONE)
+
+    def _chunk_stage(self, inq: queue.Queue, out: queue.Queue):
+        stats = self.stats["chunk"]
+        try:
+            while True:
+                page = self._get(inq)
+                if page is _DONE:
+                    break
+                stats.items_in += 1
+
+                started = time.monotonic()
+                if self.dedup_index is not None:
+                    page["simhash"] = simhash(page["content"])
+                    page["duplicate_of"] = self.dedup_index.check_and_add(page["simhash"], page["url"])
+                if page.get("duplicate_of"):
+                    self.duplicates += 1
+                    page_chunks = []
+                else:
+                    page_chunks = list(self.document_processor.iter_crawled_chunks(page))
+                stats.busy_seconds += time.monotonic() - started
+
+                if self.page_sink and not self._put(self._records, (self.page_sink, (page, len(page_chunks)))):
+                    return
+
+                # Count chunks before they go downstream so acks can't race ahead
+                with self._in_flight_lock:
+                    if page_chunks:
+                        self._in_flight[page["url"]] = len(page_chunks)
+                    else:
+                        self._in_flight.pop(page["url"], None)
+
+                for chunk in page_chunks:
+                    if not self._put(out, chunk):
+                        return
+                    stats.items_out += 1
+        finally:
+            self._put(out, _DONE)
+
+    def _embed_stage(self, inq: queue.Queue, out: queue.Queue):
+        stats = self.stats["embed"]
+        batch: List[Chunk] = []
+
+        def flush() -> bool:
+            started = time.monotonic()
+            embeddings = self.vector_store.embed_texts([chunk.content for chunk in batch])
+            stats.busy_seconds += time.monotonic() - started
+            stats.items_out += len(batch)
+            return self._put(out, (list(batch), embeddings))
+
+        try:
+            while True:
+                # Flush a partial batch when the crawler is slower than the embedder
+                chunk = self._get(inq, idle_timeout=1.0)
+                if chunk is _IDLE:
+                    if batch:
+                        if not flush():
+                            return
+                        batch.clear()
+                    continue
+                if chunk is _DONE:
+                    if batch and not self._stop.is_set():
+                        flush()
+                    break
+                stats.items_in += 1
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    if not flush():
+                        return
+                    batch.clear()
+        finally:
+            self._put(out, _DONE)
+
+    def _upsert_stage(self, inq: queue.Queue):
+        stats = self.stats["upsert"]
+        while True:
+            item = self._get(inq)
+            if item is _DONE:
+                break
+            batch, embeddings = item
+            stats.items_in += len(batch)
+
+            started = time.monotonic()
+            self.vector_store.upsert_embeddings(
+                ids=[chunk.chunk_id for chunk in batch],
+                embeddings=embeddings,
+                texts=[chunk.content for chunk in batch],
+                metadatas=[chunk.metadata for chunk in batch],
+                client_id=self.client_id
+            )
+            stats.busy_seconds += time.monotonic() - started
+            stats.items_out += len(batch)
+
+            # The only acknowledgement: a page leaves _in_flight, and can be
+            # checkpointed as visited, once all its vectors are written
+            indexed = [chunk.url for chunk in batch if self._ack_chunks(chunk.url, 1)]
+            if indexed and self.indexed_sink and not self._put(self._records, (self.indexed_sink, (indexed,))):
+                return
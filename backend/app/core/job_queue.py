@@ -0,0 +1,208 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    commit: bool = True
+) -> BackgroundJob:
+    """Persist a job for the worker processes to pick up."""
+    job = BackgroundJob(
+        kind=kind,
+        payload=payload or {},
+        status=PENDING,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=run_at or datetime.utcnow()
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def _claimable(now: datetime):
+    """Jobs that are due, or running under a lease that has expired with attempts left."""
+    return or_(
+        and_(BackgroundJob.status == PENDING, BackgroundJob.run_at <= now),
+        and_(
+            BackgroundJob.status == RUNNING,
+            BackgroundJob.locked_until < now,
+            BackgroundJob.attempts < BackgroundJob.max_attempts
+        )
+    )
+
+
+def _fail_abandoned(db: Session, now: datetime) -> int:
+    """
+    Fail jobs whose lease expired on their last attempt: their worker died
+    (e.g. killed for running out of memory) every time they ran.
+    """
+    result = db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.status == RUNNING,
+            BackgroundJob.locked_until < now,
+            BackgroundJob.attempts >= BackgroundJob.max_attempts
+        )
+        .values(
+            status=FAILED,
+            locked_by=None,
+            locked_until=None,
+            completed_at=now,
+            last_error="Lease expired on the last attempt; the worker stopped without finishing the job"
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount:
+        logger.error(f"Failed {result.rowcount} jobs whose worker stopped on their last attempt")
+    return result.rowcount
+
+
+def claim_job(
+    db: Session,
+    worker_id: str,
+    kinds: Optional[Iterable[str]] = None,
+    lease_seconds: Optional[int] = None
+) -> Optional[BackgroundJob]:
+    """
+    Lease the next runnable job to worker_id.
+
+    Postgres uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers
+    never block on each other. Databases without SKIP LOCKED (SQLite) pick a
+    candidate and claim it with a conditional UPDATE, retrying if another
+    worker won the race. A job whose lease expires on its last attempt is
+    failed instead of being leased again.
+    """
+    now = datetime.utcnow()
+    locked_until = now + timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+    _fail_abandoned(db, now)
+
+    query = db.query(BackgroundJob).filter(_claimable(now))
+    if kinds:
+        query = query.filter(BackgroundJob.kind.in_(list(kinds)))
+    query = query.order_by(BackgroundJob.run_at)
+
+    if db.get_bind().dialect.name == "postgresql":
+        job = query.with_for_update(skip_locked=True).first()
+        if job is None:
+            db.rollback()
+            return None
+        job.status = RUNNING
+        job.locked_by = worker_id
+        job.locked_until = locked_until
+        job.attempts += 1
+        db.commit()
+        return job
+
+    for _ in range(5):
+        candidate_id = query.with_entities(BackgroundJob.id).limit(1).scalar()
+        if candidate_id is None:
+            db.rollback()
+            return None
+        result = db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == candidate_id, _claimable(now))
+            .values(
+                status=RUNNING,
+                locked_by=worker_id,
+                locked_until=locked_until,
+                attempts=BackgroundJob.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.query(BackgroundJob).filter(BackgroundJob.id == candidate_id).first()
+    return None
+
+
+def renew_lease(db: Session, job_id: str, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+    """Extend a running job's lease. Returns False if the lease was lost."""
+    locked_until = datetime.utcnow() + timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+    result = db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == RUNNING,
+            BackgroundJob.locked_by == worker_id
+        )
+        .values(locked_until=locked_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _schedule_next_run(db: Session, job: BackgroundJob):
+    """
+    Enqueue the next run of a recurring job, one with interval_seconds in its
+    payload. Done when a run finishes, never from the handler, so a retried
+    run can't add a second copy to the schedule.
+    """
+    interval = (job.payload or {}).get("interval_seconds")
+    if interval:
+        enqueue(
+            db,
+            job.kind,
+            job.payload,
+            run_at=datetime.utcnow() + timedelta(seconds=interval),
+            max_attempts=job.max_attempts,
+            commit=False
+        )
+
+
+def complete_job(db: Session, job: BackgroundJob, result: Optional[Any] = None):
+    """Mark a job as finished, keeping the handler's result if it returned one."""
+    job.status = COMPLETED
+    job.result = result
+    job.locked_by = None
+    job.locked_until = None
+    job.completed_at = datetime.utcnow()
+    _schedule_next_run(db, job)
+    db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at JOB_RETRY_BACKOFF_MAX_SECONDS."""
+    delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(delay, settings.JOB_RETRY_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail_job(db: Session, job: BackgroundJob, error: str):
+    """Schedule a retry with backoff, or give up once max_attempts is reached."""
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = FAILED
+        job.completed_at = datetime.utcnow()
+        logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts: {error}")
+        _schedule_next_run(db, job)
+    else:
+        job.status = PENDING
+        job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        logger.warning(f"Job {job.id} ({job.kind}) failed, retrying at {job.run_at}: {error}")
+    db.commit()
@@ -0,0 +1,417 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import io
+import logging
+import os
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import models
+from app.schemas.crawlers import CrawlerStatus
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> handler(db, payload); a returned value is stored as the job's result
+TASK_HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], Any]] = {}
+
+# Services are created lazily so that each worker process builds its own
+# embedding model and Pinecone client, and importing this module stays cheap.
+_services: Dict[str, Any] = {}
+
+
+def task(kind: str):
+    """Register a function as the handler for a job kind."""
+    def decorator(func):
+        TASK_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def get_document_processor():
+    if "document_processor" not in _services:
+        from app.core.document_processor import DocumentProcessor
+        _services["document_processor"] = DocumentProcessor()
+    return _services["document_processor"]
+
+
+def get_vector_store(index_name: str = None):
+    key = "vector_store"
+    if index_name and index_name != settings.PINECONE_INDEX_NAME:
+        key = f"vector_store:{index_name}"
+    if key not in _services:
+        from app.core.vector_store import VectorStore
+        _services[key] = VectorStore(index_name)
+    return _services[key]
+
+
+def get_client_vector_store(db: Session, client_id: str):
+    """
+    The vector store writes for a client go through: its live namespace,
+    plus the new one while an embedding migration is in progress.
+    """
+    from app.core.vector_routing import client_vector_store
+
+    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    return client_vector_store(client, get_vector_store, client_id=client_id)
+
+
+def processed_vector_id(document_id: str) -> str:
+    """Set on a document once its chunks are in the vector store."""
+    return f"processed_{document_id}"
+
+
+def store_crawled_page(db: Session, job_id: str, client_id: str, page: Dict[str, Any], chunk_count: int):
+    """Insert or update the crawled_pages row for a page of this job."""
+    crawled_page = db.query(models.CrawledPage).filter(
+        models.CrawledPage.job_id == job_id,
+        models.CrawledPage.url == page["url"]
+    ).first()
+    if crawled_page is None:
+        crawled_page = models.CrawledPage(job_id=job_id, client_id=client_id, url=page["url"])
+        db.add(crawled_page)
+    crawled_page.title = page["title"]
+    crawled_page.set_text(page["content"])
+    crawled_page.chunk_count = chunk_count
+    crawled_page.simhash = format(page["simhash"], "016x") if page.get("simhash") is not None else None
+    crawled_page.duplicate_of = page.get("duplicate_of")
+    if crawled_page.duplicate_of:
+        crawled_page.status = "duplicate"
+    else:
+        # "chunked" until mark_pages_indexed: its vectors are still on their way
+        crawled_page.status = "chunked" if chunk_count else "skipped"
+    db.commit()
+
+
+def mark_pages_indexed(db: Session, job_id: str, urls: List[str]):
+    """Record that every vector of these pages of the job has been upserted."""
+    db.query(models.CrawledPage).filter(
+        models.CrawledPage.job_id == job_id,
+        models.CrawledPage.url.in_(urls),
+        models.CrawledPage.status == "chunked"
+    ).update({"status": "indexed"}, synchronize_session=False)
+    db.commit()
+
+
+def load_dedup_index(db: Session, job_id: str):
+    """Rebuild the job's near-duplicate index from pages stored before a resume."""
+    from app.core.dedup import SimHashIndex
+
+    index = SimHashIndex(max_distance=settings.CRAWL_DEDUP_MAX_DISTANCE)
+    rows = db.query(models.CrawledPage.url, models.CrawledPage.simhash).filter(
+        models.CrawledPage.job_id == job_id,
+        models.CrawledPage.simhash.isnot(None),
+        models.CrawledPage.status != "duplicate"
+    )
+    for url, fingerprint in rows:
+        index.add(int(fingerprint, 16), url)
+    return index
+
+
+def refresh_crawl_counters(db: Session, job: models.CrawlerJob):
+    """Recompute the job's counters from its crawled pages."""
+    indexed = models.CrawledPage.status == "indexed"
+    pages_crawled, pages_indexed, pages_duplicate, chunks_indexed, bytes_crawled = db.query(
+        func.count(models.CrawledPage.id),
+        func.coalesce(func.sum(case((indexed, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((models.CrawledPage.status == "duplicate", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((indexed, models.CrawledPage.chunk_count), else_=0)), 0),
+        func.coalesce(func.sum(models.CrawledPage.size), 0)
+    ).filter(models.CrawledPage.job_id == job.id).one()
+    job.pages_crawled = pages_crawled
+    job.pages_indexed = pages_indexed
+    job.pages_duplicate = pages_duplicate
+    job.chunks_indexed = chunks_indexed
+    job.bytes_crawled = bytes_crawled
+
+
+@task("crawl")
+def run_crawl(db: Session, payload: Dict[str, Any]):
+    """
+    Crawl a website and stream every page through chunking, embedding and
+    upserting into the client's vector namespace. A job that was interrupted
+    (worker restart, lease expiry, retry after a failure) resumes from its
+    last checkpoint instead of starting over.
+    """
+    from app.core.crawler import WebCrawler
+    from app.core.ingestion import IngestionPipeline
+
+    job = db.query(models.CrawlerJob).filter(models.CrawlerJob.id == payload["crawler_job_id"]).first()
+    if not job:
+        logger.warning(f"Crawler job {payload['crawler_job_id']} not found")
+        return
+
+    try:
+        job.status = CrawlerStatus.RUNNING.value
+        job.error = None
+        db.commit()
+
+        if job.checkpoint:
+            logger.info(
+                f"Resuming crawl {job.id} from checkpoint at {job.checkpointed_at} "
+                f"({job.checkpoint.get('emitted', 0)} pages already indexed)"
+            )
+
+        # The pipeline calls every sink from this thread, so they all share the job's session
+        job_id, client_id = job.id, job.client_id
+
+        def record_page(page, chunk_count):
+            store_crawled_page(db, job_id, client_id, page, chunk_count)
+
+        def record_indexed(urls):
+            mark_pages_indexed(db, job_id, urls)
+
+        pipeline = IngestionPipeline(
+            crawler=WebCrawler(job.url, max_pages=job.max_pages, state=job.checkpoint),
+            document_processor=get_document_processor(),
+            vector_store=get_client_vector_store(db, client_id),
+            client_id=client_id,
+            page_sink=record_page,
+            dedup_index=load_dedup_index(db, job_id) if settings.CRAWL_DEDUP_ENABLED else None,
+            indexed_sink=record_indexed
+        )
+
+        def record_progress(stats):
+            job.stats = stats
+            refresh_crawl_counters(db, job)
+            db.commit()
+
+        def record_checkpoint(state):
+            job.checkpoint = state
+            job.checkpointed_at = datetime.utcnow()
+            db.commit()
+
+        stats = pipeline.run(on_progress=record_progress, on_checkpoint=record_checkpoint)
+
+        job.status = CrawlerStatus.COMPLETED.value
+        job.completed_at = datetime.utcnow()
+        job.stats = stats
+        job.checkpoint = None
+        refresh_crawl_counters(db, job)
+        db.commit()
+
+    except Exception as e:
+        # Record the failure on the crawler job; the queue decides whether to retry
+        db.rollback()
+        job.status = CrawlerStatus.FAILED.value
+        job.completed_at = datetime.utcnow()
+        job.error = str(e)
+        refresh_crawl_counters(db, job)
+        db.commit()
+        raise
+
+
+@task("process_document")
+def run_process_document(db: Session, payload: Dict[str, Any]):
+    """Chunk a stored document and add it to the client's vector namespace."""
+    document_id = payload["document_id"]
+    client_id = payload["client_id"]
+
+    db_document = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not db_document:
+        logger.warning(f"Document {document_id} not found")
+        return
+
+    # Unknown while reprocessing, so reconciliation leaves every chunk alone
+    db_document.chunk_count = None
+    db.commit()
+
+    # Chunks are embedded and upserted in batches as they are produced
+    chunks = get_document_processor().iter_document_chunks(
+        {
+            "id": db_document.id,
+            "title": db_document.title,
+            "content": db_document.content,
+            "url": db_document.url
+        },
+        client_id
+    )
+    vector_store = get_client_vector_store(db, client_id)
+    chunk_count = vector_store.add_chunks(chunks)
+    db_document.chunk_count = chunk_count
+    db_document.vector_id = processed_vector_id(document_id)
+    db.commit()
+
+    # Drop the tail left over if an update produced fewer chunks than before
+    stale = vector_store.delete_chunks(db_document.id, keep=chunk_count)
+    if stale:
+        logger.info(f"Deleted {stale} stale chunks of document {db_document.id}")
+
+
+@task("process_documents")
+def run_process_documents(db: Session, payload: Dict[str, Any]):
+    """
+    Chunk and index a batch of documents created together (bulk upload).
+    Chunks from consecutive documents share embedding batches.
+    """
+    document_ids = payload["document_ids"]
+    client_id = payload["client_id"]
+    document_processor = get_document_processor()
+    chunk_counts: Dict[str, int] = {}
+
+    def iter_chunks():
+        batch_size = settings.BULK_INSERT_BATCH_SIZE
+        for start in range(0, len(document_ids), batch_size):
+            rows = db.query(
+                models.Document.id, models.Document.title, models.Document.content, models.Document.url
+            ).filter(models.Document.id.in_(document_ids[start:start + batch_size]))
+            for document_id, title, content, url in rows:
+                chunk_counts[document_id] = 0
+                for chunk in document_processor.iter_document_chunks(
+                    {"id": document_id, "title": title, "content": content, "url": url},
+                    client_id
+                ):
+                    chunk_counts[document_id] += 1
+                    yield chunk
+
+    count = get_client_vector_store(db, client_id).add_chunks(iter_chunks())
+    db.bulk_update_mappings(models.Document, [
+        {"id": document_id, "chunk_count": chunk_count, "vector_id": processed_vector_id(document_id)}
+        for document_id, chunk_count in chunk_counts.items()
+    ])
+    db.commit()
+    logger.info(f"Indexed {count} chunks from {len(document_ids)} documents for client {client_id}")
+
+
+@task("process_file")
+def run_process_file(db: Session, payload: Dict[str, Any]):
+    """
+    Extract the text of an uploaded file section by section (e.g. PDF pages)
+    and stream its chunks into the client's vector namespace. The extracted
+    text becomes the document's content and the upload is removed.
+    """
+    from app.core.file_extractors import iter_file_sections
+
+    path = payload["path"]
+    client_id = payload["client_id"]
+    db_document = db.query(models.Document).filter(models.Document.id == payload["document_id"]).first()
+    if not db_document:
+        logger.warning(f"Document {payload['document_id']} not found")
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    text = io.StringIO()
+    section_count = 0
+
+    def sections():
+        nonlocal section_count
+        for section in iter_file_sections(path, payload["file_name"]):
+            section_count += 1
+            text.write(section.strip())
+            text.write("\n\n")
+            yield section
+
+    chunks = get_document_processor().iter_document_chunks(
+        {"id": db_document.id, "title": db_document.title, "content": sections()},
+        client_id
+    )
+    chunk_count = get_client_vector_store(db, client_id).add_chunks(chunks)
+
+    db_document.content = text.getvalue().strip()
+    db_document.chunk_count = chunk_count
+    db_document.vector_id = processed_vector_id(db_document.id)
+    db_document.document_metadata = {
+        **(db_document.document_metadata or {}),
+        "sections": section_count,
+        "chunks": chunk_count
+    }
+    db.commit()
+    os.remove(path)
+
+
+@task("delete_vectors")
+def run_delete_vectors(db: Session, payload: Dict[str, Any]):
+    """
+    Remove the vectors of a deleted document, or the namespaces of a deleted
+    client (payload "targets": [{"index_name", "namespace"}], defaulting to
+    the namespace named after the client).
+    """
+    if payload.get("document_id"):
+        vector_store = get_client_vector_store(db, payload["client_id"])
+        deleted = vector_store.delete_chunks(payload["document_id"])
+        logger.info(f"Deleted {deleted} vectors of document {payload['document_id']}")
+        return {"deleted": deleted}
+
+    return {"deleted_namespaces": delete_namespaces(payload)}
+
+
+def delete_namespaces(payload: Dict[str, Any]):
+    """Drop the vector namespaces of a deleted client; the namespaces dropped."""
+    targets = payload.get("targets") or [
+        {"index_name": None, "namespace": payload.get("namespace") or payload["client_id"]}
+    ]
+    for target in targets:
+        if not get_vector_store(target["index_name"]).delete_by_client(target["namespace"]):
+            raise RuntimeError(f"Could not delete namespace {target['namespace']}")
+    return [target["namespace"] for target in targets]
+
+
+@task("delete_client")
+def run_delete_client(db: Session, payload: Dict[str, Any]):
+    """
+    Delete a client: its rows in batches, its archived chat history and its
+    vector namespaces (payload "targets" as for delete_vectors). Every step
+    is idempotent, so a retried job picks up where the last attempt failed.
+    """
+    from app.core.chat_archive import delete_client_archive
+    from app.database.crud import delete_client
+
+    client_id = payload["client_id"]
+    if delete_client(db, client_id, payload.get("batch_size")):
+        logger.info(f"Deleted the rows of client {client_id}")
+    archived_files = delete_client_archive(client_id)
+    return {"archived_files": archived_files, "deleted_namespaces": delete_namespaces(payload)}
+
+
+@task("reconcile_vectors")
+def run_reconcile_vectors(db: Session, payload: Dict[str, Any]):
+    """
+    Delete vectors that no longer belong to a document or crawled page and
+    return the report. With interval_seconds in the payload the queue
+    schedules the next run once this one has finished.
+    """
+    from app.core.vector_gc import reconcile
+
+    report = reconcile(
+        db,
+        get_vector_store(),
+        client_ids=payload.get("client_ids"),
+        dry_run=payload.get("dry_run", False)
+    )
+    logger.info(f"Vector reconciliation reclaimed {report['reclaimed']} vectors")
+    return report
+
+
+@task("compact_analytics")
+def run_compact_analytics(db: Session, payload: Dict[str, Any]):
+    """
+    Roll finished hours of chat sessions and messages up into the analytics
+    tables. With interval_seconds in the payload the queue schedules the
+    next run once this one has finished.
+    """
+    from app.core.analytics import compact
+
+    result = compact(db)
+    logger.info(f"Analytics rolled up until {result['rolled_up_until']} ({result['hours']} hours)")
+    return result
+
+
+@task("archive_chat_history")
+def run_archive_chat_history(db: Session, payload: Dict[str, Any]):
+    """
+    Create the coming months' chat_messages partitions and move months older
+    than CHAT_RETENTION_DAYS to the archive. With interval_seconds in the
+    payload the queue schedules the next run once this one has finished.
+    """
+    from app.core.chat_archive import archive_old_messages, ensure_partitions
+
+    created = ensure_partitions(db)
+    result = archive_old_messages(db, retention_days=payload.get("retention_days"))
+    result["partitions_created"] = created
+    logger.info(
+        f"Archived {result['messages']} chat messages of {len(result['months'])} months, "
+        f"created {len(created)} partitions"
+    )
+    return result
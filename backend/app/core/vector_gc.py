@@ -0,0 +1,151 @@
+import logging
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import models
+
+logger = logging.getLogger(__name__)
+
+# Vectors whose ids don't follow "{owner}_{i}" are judged by their metadata,
+# fetched this many at a time
+FETCH_BATCH_SIZE = 100
+
+
+def _live_chunk_counts(db: Session, client_id: str):
+    """
+    Chunk count per vector id owner for the client: documents by id and
+    crawled pages by URL. None means the count is unknown and every chunk
+    index is kept.
+    """
+    documents = dict(
+        db.query(models.Document.id, models.Document.chunk_count)
+        .filter(models.Document.client_id == client_id)
+    )
+    pages = dict(
+        db.query(models.CrawledPage.url, func.max(models.CrawledPage.chunk_count))
+        # Pages still being upserted ("chunked") own their vectors too
+        .filter(models.CrawledPage.client_id == client_id, models.CrawledPage.status.in_(["indexed", "chunked"]))
+        .group_by(models.CrawledPage.url)
+    )
+    return documents, pages
+
+
+def find_orphans(db: Session, vector_store, client_id: str, namespace: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare the vectors in a client's namespace with its documents and
+    crawled pages. Returns the orphaned ids and counts for the report.
+    """
+    namespace = namespace or client_id
+    # Vectors first, then the rows that own them: a document or page created
+    # in between is then in the snapshot rather than judged deleted
+    vector_ids = list(vector_store.list_ids(namespace))
+    documents, pages = _live_chunk_counts(db, client_id)
+    orphans: List[str] = []
+    unrecognized: List[str] = []
+    total = 0
+
+    for vector_id in vector_ids:
+        total += 1
+        owner, _, index = vector_id.rpartition("_")
+        if not owner or not index.isdigit():
+            unrecognized.append(vector_id)
+        elif owner in documents or owner in pages:
+            chunk_count = documents[owner] if owner in documents else pages[owner]
+            if chunk_count is not None and int(index) >= chunk_count:
+                orphans.append(vector_id)
+        elif _is_document_id(owner) or "://" in owner:
+            # A deleted document, or a page no longer indexed by any crawl
+            orphans.append(vector_id)
+        else:
+            unrecognized.append(vector_id)
+
+    # Vectors written with random ids (e.g. by LangChain's from_texts) are
+    # judged by the document_id in their metadata, and kept if they have none
+    unknown = 0
+    for start in range(0, len(unrecognized), FETCH_BATCH_SIZE):
+        batch = unrecognized[start:start + FETCH_BATCH_SIZE]
+        metadata = vector_store.fetch_metadata(batch, namespace)
+        for vector_id in batch:
+            document_id = metadata.get(vector_id, {}).get("document_id")
+            if document_id and document_id not in documents:
+                orphans.append(vector_id)
+            else:
+                unknown += 1
+
+    return {"namespace": namespace, "vectors": total, "orphans": orphans, "unknown": unknown}
+
+
+def _is_document_id(value: str) -> bool:
+    try:
+        return str(uuid.UUID(value)) == value
+    except ValueError:
+        return False
+
+
+def _namespace_owners(db: Session, index_name: str) -> Dict[str, str]:
+    """
+    Client id per namespace in the index: each client's live namespace and
+    the target of an embedding migration in progress.
+    """
+    owners = {}
+    rows = db.query(
+        models.Client.id,
+        models.Client.vector_index,
+        models.Client.vector_namespace,
+        models.Client.vector_migration_index,
+        models.Client.vector_migration_namespace
+    )
+    for client_id, vector_index, namespace, migration_index, migration_namespace in rows:
+        if (vector_index or settings.PINECONE_INDEX_NAME) == index_name:
+            owners[namespace or client_id] = client_id
+        if migration_namespace and (migration_index or settings.PINECONE_INDEX_NAME) == index_name:
+            owners[migration_namespace] = client_id
+    return owners
+
+
+def reconcile(
+    db: Session,
+    vector_store,
+    client_ids: Optional[Iterable[str]] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Delete orphaned vectors: chunks of deleted documents and pages, chunks
+    left over when a document was reprocessed into fewer chunks, and whole
+    namespaces no client reads from or migrates to (deleted clients, old
+    versions left by an embedding migration). Returns a report of what
+    was (or, with dry_run, would be) reclaimed.
+    """
+    # Namespaces before their owners, for the same reason as in find_orphans
+    namespace_counts = vector_store.list_namespaces()
+    owners = _namespace_owners(db, getattr(vector_store, "index_name", settings.PINECONE_INDEX_NAME))
+    report: Dict[str, Any] = {"dry_run": dry_run, "namespaces": [], "deleted_namespaces": {}, "reclaimed": 0}
+
+    if client_ids is None:
+        namespaces = sorted(set(owners) & set(namespace_counts))
+        # The default namespace ("") holds vectors written without a client
+        for namespace in sorted(set(namespace_counts) - set(owners) - {""}):
+            report["deleted_namespaces"][namespace] = namespace_counts[namespace]
+            report["reclaimed"] += namespace_counts[namespace]
+            if not dry_run:
+                vector_store.delete_by_client(namespace)
+            logger.info(f"Namespace {namespace} belongs to no client ({namespace_counts[namespace]} vectors)")
+    else:
+        client_ids = set(client_ids)
+        namespaces = sorted(namespace for namespace, client_id in owners.items() if client_id in client_ids)
+
+    for namespace in namespaces:
+        result = find_orphans(db, vector_store, owners[namespace], namespace)
+        orphans = result.pop("orphans")
+        deleted = 0 if dry_run else vector_store.delete_ids(orphans, result["namespace"])
+        result.update(orphans=len(orphans), deleted=deleted)
+        report["namespaces"].append(result)
+        report["reclaimed"] += len(orphans)
+        if orphans:
+            logger.info(f"Namespace {result['namespace']}: {len(orphans)} orphaned of {result['vectors']} vectors")
+
+    return report
@@ -0,0 +1,117 @@
+from itertools import islice
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from app.config import settings
+
+
+class VectorTarget(NamedTuple):
+    index_name: str
+    namespace: str
+
+
+def read_target(client) -> VectorTarget:
+    """The index and namespace the client's chat reads from."""
+    return VectorTarget(
+        client.vector_index or settings.PINECONE_INDEX_NAME,
+        client.vector_namespace or client.id
+    )
+
+
+def migration_target(client) -> Optional[VectorTarget]:
+    """The target of the client's embedding migration, if one is in progress."""
+    if not client.vector_migration_namespace:
+        return None
+    return VectorTarget(
+        client.vector_migration_index or settings.PINECONE_INDEX_NAME,
+        client.vector_migration_namespace
+    )
+
+
+def write_targets(client) -> List[VectorTarget]:
+    """Every target the client's writes and deletes must reach."""
+    targets = [read_target(client)]
+    target = migration_target(client)
+    if target is not None and target != targets[0]:
+        targets.append(target)
+    return targets
+
+
+class ClientVectorStore:
+    """
+    The vector store as seen by a single client's writers. Writes go to the
+    client's live namespace and, while an embedding migration is running, to
+    its new one as well, re-embedding with the new index's model when that
+    differs. Namespace and client_id arguments are accepted for
+    compatibility with VectorStore and ignored.
+    """
+
+    def __init__(self, targets: List[tuple]):
+        # (VectorStore, namespace) pairs, the one chat reads from first
+        self.targets = targets
+        self.primary, self.namespace = targets[0]
+
+    @property
+    def index_name(self) -> str:
+        return self.primary.index_name
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self.primary.embed_texts(texts)
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas=None, client_id=None, namespace=None):
+        for vector_store, target_namespace in self.targets:
+            same_model = getattr(vector_store, "embedding_model", None) == getattr(self.primary, "embedding_model", None)
+            vector_store.upsert_embeddings(
+                ids=ids,
+                embeddings=embeddings if same_model else vector_store.embed_texts(texts),
+                texts=texts,
+                metadatas=metadatas,
+                namespace=target_namespace
+            )
+
+    def add_chunks(self, chunks: Iterable[Any], client_id=None, namespace=None, batch_size=None) -> int:
+        """Embed and upsert chunks in batches, like VectorStore.add_chunks."""
+        batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        chunks = iter(chunks)
+        count = 0
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                return count
+            texts = [chunk.content for chunk in batch]
+            self.upsert_embeddings(
+                ids=[chunk.chunk_id for chunk in batch],
+                embeddings=self.embed_texts(texts),
+                texts=texts,
+                metadatas=[chunk.metadata for chunk in batch]
+            )
+            count += len(batch)
+
+    def delete_chunks(self, id_prefix: str, namespace=None, keep: int = 0) -> int:
+        """Delete chunks from every target; returns the count deleted from the live one."""
+        counts = [
+            vector_store.delete_chunks(id_prefix, namespace=target_namespace, keep=keep)
+            for vector_store, target_namespace in self.targets
+        ]
+        return counts[0]
+
+    def delete_ids(self, ids: Iterable[str], namespace=None) -> int:
+        ids = list(ids)
+        counts = [
+            vector_store.delete_ids(ids, target_namespace)
+            for vector_store, target_namespace in self.targets
+        ]
+        return counts[0]
+
+
+def client_vector_store(client, get_store: Callable[[Optional[str]], Any],
+                        client_id: Optional[str] = None) -> ClientVectorStore:
+    """
+    Build the ClientVectorStore for a client row, with get_store(index_name)
+    returning a VectorStore per index. A client that no longer exists is
+    given its default namespace.
+    """
+    if client is None:
+        return ClientVectorStore([(get_store(None), client_id)])
+    return ClientVectorStore([
+        (get_store(target.index_name), target.namespace) for target in write_targets(client)
+    ])
@@ -1,30 +1,32 @@
 import os
 from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from langchain_openai import OpenAIEmbeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_pinecone import PineconeVectorStore 
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 import logging
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Embedding model for each supported index dimension
+EMBEDDING_MODELS = {
+    1536: "text-embedding-ada-002",
+    1024: "BAAI/bge-large-en-v1.5",
+}
+
 class VectorStore:
-    def __init__(self, index_name: str = None):
+    def __init__(self, index_name: str = None, dimension: int = None):
         self.index_name = index_name or settings.PINECONE_INDEX_NAME
         
-        # Check if we should use OpenAI or HuggingFace embeddings
-        if settings.EMBEDDINGS_DIMENSION == 1536:
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-ada-002", 
-                openai_api_key=settings.OPENAI_API_KEY
-            )
-            self.dimension = 1536
-        else:
-            # Use HuggingFace embeddings for 1024 dimensions (to match existing index)
-            self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-large-en-v1.5")
-            self.dimension = 1024
+        # Use OpenAI embeddings for 1536 dimensions, HuggingFace otherwise
+        # (1024, to match the existing index). The dimension only matters for
+        # a new index; an existing one keeps its own (see _verify_dimensions).
+        self._set_embeddings(dimension or settings.EMBEDDINGS_DIMENSION)
         
         # Initialize Pinecone client
         self.pc = Pinecone(
@@ -32,10 +34,10 @@ class VectorStore:
         )
         
         # Get or create index
-        if settings.PINECONE_INDEX_NAME not in self.pc.list_indexes().names():
-            logger.info(f"Creating new Pinecone index with dimension {self.dimension}")
+        if self.index_name not in self.pc.list_indexes().names():
+            logger.info(f"Creating new Pinecone index {self.index_name} with dimension {self.dimension}")
             self.pc.create_index(
-                name=settings.PINECONE_INDEX_NAME,
+                name=self.index_name,
                 dimension=self.dimension,  # Use the dimension matching our embeddings
                 metric="cosine",
                 spec=ServerlessSpec(
@@ -48,7 +50,28 @@ class VectorStore:
             self._verify_dimensions()
         
         # Connect to the index
-        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
+        self.index = self.pc.Index(self.index_name)
+    
+    def _set_embeddings(self, dimension: int):
+        self.dimension = 1536 if dimension == 1536 else 1024
+        self.embedding_model = EMBEDDING_MODELS[self.dimension]
+        if self.dimension == 1536:
+            embeddings = OpenAIEmbeddings(
+                model=self.embedding_model,
+                openai_api_key=settings.OPENAI_API_KEY
+            )
+        else:
+            embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+        
+        if settings.EMBEDDING_CACHE_DIR:
+            # Keyed by model as well as text, so switching models never returns stale vectors
+            embeddings = CacheBackedEmbeddings.from_bytes_store(
+                embeddings,
+                LocalFileStore(settings.EMBEDDING_CACHE_DIR),
+                namespace=self.embedding_model,
+                batch_size=settings.EMBED_BATCH_SIZE
+            )
+        self.embeddings = embeddings
         
     def _verify_dimensions(self):
         """Verify that the index dimensions match our embeddings dimensions"""
@@ -63,14 +86,8 @@ class VectorStore:
                 )
                 
                 # Switch to embeddings that match the index dimension
-                if index_dimension == 1024:
-                    self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-large-en-v1.5")
-                elif index_dimension == 1536:
-                    self.embeddings = OpenAIEmbeddings(
-                        model="text-embedding-ada-002",
-                        openai_api_key=settings.OPENAI_API_KEY
-                    )
-                self.dimension = index_dimension
+                if index_dimension in EMBEDDING_MODELS:
+                    self._set_embeddings(index_dimension)
         except Exception as e:
             logger.error(f"Error verifying index dimensions: {e}")
 
@@ -79,7 +96,8 @@ class VectorStore:
         texts: List[str], 
         metadatas: Optional[List[Dict[str, Any]]] = None, 
         client_id: Optional[str] = None,
-        namespace: Optional[str] = None
+        namespace: Optional[str] = None,
+        ids: Optional[List[str]] = None
     ):
         """Add texts to the vector store with optional metadata."""
         if client_id and not namespace:
@@ -91,6 +109,7 @@ class VectorStore:
                 embedding=self.embeddings, 
                 index_name=self.index_name,
                 metadatas=metadatas,
+                ids=ids,
                 namespace=namespace
             )
             return vector_store
@@ -98,6 +117,67 @@ class VectorStore:
             logger.error(f"Error adding texts to vector store: {e}")
             raise e
     
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts without writing them to the index."""
+        return self.embeddings.embed_documents(texts)
+    
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        client_id: Optional[str] = None,
+        namespace: Optional[str] = None
+    ):
+        """
+        Upsert pre-computed embeddings. The text is stored under the same
+        metadata key PineconeVectorStore reads back during retrieval.
+        """
+        if client_id and not namespace:
+            namespace = client_id
+        
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = [
+            {"id": vector_id, "values": values, "metadata": {**metadata, "text": text}}
+            for vector_id, values, text, metadata in zip(ids, embeddings, texts, metadatas)
+        ]
+        try:
+            self.index.upsert(vectors=vectors, namespace=namespace)
+        except Exception as e:
+            logger.error(f"Error upserting vectors: {e}")
+            raise e
+    
+    def add_chunks(
+        self,
+        chunks: Iterable[Any],
+        client_id: Optional[str] = None,
+        namespace: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Embed and upsert chunks (see DocumentProcessor.iter_*_chunks) in
+        batches, pulling from the iterable lazily so only one batch is held
+        in memory. Returns the number of chunks written.
+        """
+        batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        chunks = iter(chunks)
+        count = 0
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                return count
+            texts = [chunk.content for chunk in batch]
+            self.upsert_embeddings(
+                ids=[chunk.chunk_id for chunk in batch],
+                embeddings=self.embed_texts(texts),
+                texts=texts,
+                metadatas=[chunk.metadata for chunk in batch],
+                client_id=client_id,
+                namespace=namespace
+            )
+            count += len(batch)
+    
     def similarity_search(
         self, 
         query: str, 
@@ -115,6 +195,48 @@ class VectorStore:
         
         return vector_store.similarity_search(query, k=top_k)
     
+    def list_ids(self, namespace: str, prefix: Optional[str] = None) -> Iterator[str]:
+        """Iterate over every vector id in a namespace, optionally only those starting with prefix."""
+        kwargs = {"namespace": namespace}
+        if prefix:
+            kwargs["prefix"] = prefix
+        for ids in self.index.list(**kwargs):
+            yield from ids
+    
+    def list_namespaces(self) -> Dict[str, int]:
+        """Vector count per namespace."""
+        stats = self.index.describe_index_stats()
+        return {name: summary.vector_count for name, summary in stats.namespaces.items()}
+    
+    def fetch_metadata(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        """Metadata of the given vectors, keyed by id; missing ids are left out."""
+        response = self.index.fetch(ids=ids, namespace=namespace)
+        return {vector_id: dict(vector.metadata or {}) for vector_id, vector in response.vectors.items()}
+    
+    def delete_ids(self, ids: Iterable[str], namespace: str, batch_size: int = 1000) -> int:
+        """Delete vectors by id in batches (Pinecone accepts up to 1000 ids per call)."""
+        ids = iter(ids)
+        count = 0
+        while True:
+            batch = list(islice(ids, batch_size))
+            if not batch:
+                return count
+            self.index.delete(ids=batch, namespace=namespace)
+            count += len(batch)
+    
+    def delete_chunks(self, id_prefix: str, namespace: str, keep: int = 0) -> int:
+        """
+        Delete the vectors of chunks "{id_prefix}_{i}" with i >= keep, e.g. all
+        of a deleted document's chunks, or the tail left over when a document
+        is reprocessed into fewer chunks.
+        """
+        prefix = f"{id_prefix}_"
+        stale = [
+            vector_id for vector_id in self.list_ids(namespace, prefix=prefix)
+            if vector_id[len(prefix):].isdigit() and int(vector_id[len(prefix):]) >= keep
+        ]
+        return self.delete_ids(stale, namespace)
+    
     def delete_by_client(self, client_id: str):
         """Delete all vectors for a client."""
         try:
@@ -0,0 +1,166 @@
+"""
+Async equivalents of app.database.crud for routes that run on the event
+loop, using an AsyncSession from get_async_db.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import crud
+from app.database.models import Client, Document, ChatSession, ChatMessage
+from app.database.pagination import Cursor, Page, keyset, page
+from app.api.schemas import client as client_schemas
+from app.api.schemas import document as document_schemas
+from app.api.schemas import chat as chat_schemas
+
+# Client CRUD operations
+async def create_client(db: AsyncSession, client: client_schemas.ClientCreate):
+    """Create a new client"""
+    db_client = Client(
+        name=client.name,
+        website_url=str(client.website_url) if client.website_url else None,
+        api_key=str(uuid.uuid4())
+    )
+    db.add(db_client)
+    await db.commit()
+    await db.refresh(db_client)
+    return db_client
+
+async def get_client(db: AsyncSession, client_id: str):
+    """Get a client by ID"""
+    return await db.scalar(select(Client).where(Client.id == client_id))
+
+async def get_client_by_api_key(db: AsyncSession, api_key: str):
+    """Get a client by API key"""
+    return await db.scalar(select(Client).where(Client.api_key == api_key, Client.is_active == True))
+
+async def get_clients(db: AsyncSession, after: Optional[Cursor] = None, limit: int = 100) -> Page:
+    """Get a page of clients in creation order, starting after the cursor position"""
+    query = keyset(select(Client), Client.created_at, Client.id, after, limit)
+    return page((await db.scalars(query)).all(), limit)
+
+async def update_client(db: AsyncSession, client_id: str, client: client_schemas.ClientUpdate):
+    """Update a client"""
+    db_client = await get_client(db, client_id)
+    if db_client:
+        for key, value in client.dict(exclude_unset=True).items():
+            setattr(db_client, key, value)
+        await db.commit()
+        await db.refresh(db_client)
+        crud._invalidate_cached_client(db_client.api_key)
+    return db_client
+
+async def delete_client(db: AsyncSession, client_id: str, batch_size: Optional[int] = None):
+    """Delete a client and everything it owns in batches, see crud.delete_client"""
+    return await db.run_sync(crud.delete_client, client_id, batch_size)
+
+# Document CRUD operations
+async def create_document(db: AsyncSession, document: document_schemas.DocumentCreate, client_id: str):
+    """Create a new document"""
+    db_document = Document(
+        client_id=client_id,
+        title=document.title,
+        content=document.content,
+        url=str(document.url) if document.url else None,
+        document_metadata=document.metadata or {}
+    )
+    db.add(db_document)
+    await db.commit()
+    await db.refresh(db_document)
+    return db_document
+
+async def insert_documents(
+    db: AsyncSession,
+    documents: List[document_schemas.DocumentCreate],
+    client_id: str,
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """Insert a batch of documents with one executemany and return their ids. The caller commits."""
+    return await db.run_sync(crud.insert_documents, documents, client_id, ids)
+
+async def get_document(db: AsyncSession, document_id: str):
+    """Get a document by ID"""
+    return await db.scalar(select(Document).where(Document.id == document_id))
+
+async def get_documents_by_client(
+    db: AsyncSession, client_id: str, after: Optional[Cursor] = None, limit: int = 100
+) -> Page:
+    """Get a page of a client's documents (without content) in creation order, starting after the cursor position"""
+    query = select(*crud.DOCUMENT_SUMMARY_COLUMNS).where(Document.client_id == client_id)
+    return page((await db.execute(keyset(query, Document.created_at, Document.id, after, limit))).all(), limit)
+
+async def update_document(db: AsyncSession, document_id: str, document: document_schemas.DocumentUpdate):
+    """Update a document"""
+    db_document = await get_document(db, document_id)
+    if db_document:
+        for key, value in document.dict(exclude_unset=True).items():
+            setattr(db_document, key, value)
+        await db.commit()
+        await db.refresh(db_document)
+    return db_document
+
+async def delete_document(db: AsyncSession, document_id: str):
+    """Delete a document"""
+    db_document = await get_document(db, document_id)
+    if db_document:
+        await db.delete(db_document)
+        await db.commit()
+        return True
+    return False
+
+# Chat CRUD operations
+async def create_chat_session(db: AsyncSession, client_id: str, user_id: str = None):
+    """Create a new chat session"""
+    session = ChatSession(
+        client_id=client_id,
+        user_id=user_id
+    )
+    db.add(session)
+    await db.commit()
+    return session
+
+async def get_chat_session(db: AsyncSession, session_id: str):
+    """Get a chat session by ID"""
+    return await db.scalar(select(ChatSession).where(ChatSession.id == session_id))
+
+async def end_chat_session(db: AsyncSession, session_id: str):
+    """End a chat session"""
+    session = await get_chat_session(db, session_id)
+    if session:
+        session.end_time = datetime.utcnow()
+        await db.commit()
+    return session
+
+async def create_chat_message(db: AsyncSession, chat_message: chat_schemas.ChatMessageCreate):
+    """Create a new chat message"""
+    message = ChatMessage(
+        client_id=chat_message.client_id,
+        session_id=chat_message.session_id,
+        user_message=chat_message.user_message,
+        bot_response=chat_message.bot_response
+    )
+    db.add(message)
+    await db.commit()
+    return message
+
+async def get_chat_messages_by_session(
+    db: AsyncSession, session_id: str, after: Optional[Cursor] = None, limit: int = 100
+) -> Page:
+    """Get a page of a session's chat messages in order, starting after the cursor position"""
+    query = select(ChatMessage).where(ChatMessage.session_id == session_id)
+    return page((await db.scalars(keyset(query, ChatMessage.created_at, ChatMessage.id, after, limit))).all(), limit)
+
+# Analytics CRUD operations
+async def get_client_analytics(db: AsyncSession, client_id: str, days: int = 30):
+    """Get analytics for a client for the specified number of days, read from the rollups"""
+    # The rollup queries are shared with the sync path; run_sync executes them
+    # through the async driver on the event loop, not in a thread
+    return await db.run_sync(crud.get_client_analytics, client_id, days)
+
+async def save_analytics_snapshot(db: AsyncSession, client_id: str):
+    """Save current analytics snapshot"""
+    return await db.run_sync(crud.save_analytics_snapshot, client_id)
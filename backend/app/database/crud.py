@@ -1,9 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
 from datetime import datetime, timedelta
+from typing import List, Optional
 import uuid
 
-from app.database.models import Client, Document, ChatSession, ChatMessage, Analytics
+from app.config import settings
+from app.database.models import (
+    Client, Document, ChatSession, ChatMessage, Analytics, AnalyticsDaily, AnalyticsHourly, CrawledPage, CrawlerJob
+)
+from app.core.analytics import totals
+from app.database.pagination import Cursor, Page, keyset, page
 from app.api.schemas import client as client_schemas
 from app.api.schemas import document as document_schemas
 from app.api.schemas import chat as chat_schemas
@@ -29,9 +35,9 @@ def get_client_by_api_key(db: Session, api_key: str):
     """Get a client by API key"""
     return db.query(Client).filter(Client.api_key == api_key, Client.is_active == True).first()
 
-def get_clients(db: Session, skip: int = 0, limit: int = 100):
-    """Get all clients with pagination"""
-    return db.query(Client).offset(skip).limit(limit).all()
+def get_clients(db: Session, after: Optional[Cursor] = None, limit: int = 100) -> Page:
+    """Get a page of clients in creation order, starting after the cursor position"""
+    return page(keyset(db.query(Client), Client.created_at, Client.id, after, limit).all(), limit)
 
 def update_client(db: Session, client_id: str, client: client_schemas.ClientUpdate):
     """Update a client"""
@@ -41,16 +47,57 @@ def update_client(db: Session, client_id: str, client: client_schemas.ClientUpda
             setattr(db_client, key, value)
         db.commit()
         db.refresh(db_client)
+        _invalidate_cached_client(db_client.api_key)
     return db_client
 
-def delete_client(db: Session, client_id: str):
-    """Delete a client"""
+def deactivate_client(db: Session, client_id: str):
+    """Disable a client's API key ahead of its deletion"""
     db_client = db.query(Client).filter(Client.id == client_id).first()
     if db_client:
-        db.delete(db_client)
+        db_client.is_active = False
         db.commit()
-        return True
-    return False
+        _invalidate_cached_client(db_client.api_key)
+    return db_client
+
+# A client's rows, children first, each with the column its batches are picked by
+CLIENT_TABLES = [
+    (CrawledPage, CrawledPage.id),
+    (CrawlerJob, CrawlerJob.id),
+    (ChatMessage, ChatMessage.id),
+    (ChatSession, ChatSession.id),
+    (Document, Document.id),
+    (Analytics, Analytics.id),
+    (AnalyticsHourly, AnalyticsHourly.bucket_start),
+    (AnalyticsDaily, AnalyticsDaily.bucket_start),
+]
+
+def delete_client(db: Session, client_id: str, batch_size: Optional[int] = None):
+    """
+    Delete a client and everything it owns with set-based DELETEs of at most
+    batch_size rows, each committed on its own so no statement holds locks
+    for long and no rows are loaded into the session.
+    """
+    api_key = db.query(Client.api_key).filter(Client.id == client_id).scalar()
+    if api_key is None:
+        return False
+    batch_size = batch_size or settings.CLIENT_DELETE_BATCH_SIZE
+    for model, key in CLIENT_TABLES:
+        owned = model.client_id == client_id
+        while True:
+            batch = select(key).where(owned).limit(batch_size).scalar_subquery()
+            deleted = db.query(model).filter(owned, key.in_(batch)).delete(synchronize_session=False)
+            db.commit()
+            if deleted < batch_size:
+                break
+    db.query(Client).filter(Client.id == client_id).delete(synchronize_session=False)
+    db.commit()
+    _invalidate_cached_client(api_key)
+    return True
+
+def _invalidate_cached_client(api_key: str):
+    # Imported here because the cache looks clients up through this module
+    from app.core.auth_cache import client_cache
+    client_cache.invalidate(api_key)
 
 # Document CRUD operations
 def create_document(db: Session, document: document_schemas.DocumentCreate, client_id: str):
@@ -67,13 +114,44 @@ def create_document(db: Session, document: document_schemas.DocumentCreate, clie
     db.refresh(db_document)
     return db_document
 
+def insert_documents(
+    db: Session,
+    documents: List[document_schemas.DocumentCreate],
+    client_id: str,
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """Insert a batch of documents with one executemany and return their ids. The caller commits."""
+    now = datetime.utcnow()
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
+    rows = [
+        {
+            "id": document_id,
+            "client_id": client_id,
+            "title": document.title,
+            "content": document.content,
+            "url": str(document.url) if document.url else None,
+            "document_metadata": document.metadata or {},
+            "created_at": now
+        }
+        for document_id, document in zip(ids, documents)
+    ]
+    if rows:
+        db.execute(Document.__table__.insert(), rows)
+    return [row["id"] for row in rows]
+
 def get_document(db: Session, document_id: str):
     """Get a document by ID"""
     return db.query(Document).filter(Document.id == document_id).first()
 
-def get_documents_by_client(db: Session, client_id: str, skip: int = 0, limit: int = 100):
-    """Get all documents for a client with pagination"""
-    return db.query(Document).filter(Document.client_id == client_id).offset(skip).limit(limit).all()
+# Columns of document listings; content is only loaded for a single document
+DOCUMENT_SUMMARY_COLUMNS = (
+    Document.id, Document.client_id, Document.title, Document.url, Document.vector_id, Document.created_at
+)
+
+def get_documents_by_client(db: Session, client_id: str, after: Optional[Cursor] = None, limit: int = 100) -> Page:
+    """Get a page of a client's documents (without content) in creation order, starting after the cursor position"""
+    query = db.query(*DOCUMENT_SUMMARY_COLUMNS).filter(Document.client_id == client_id)
+    return page(keyset(query, Document.created_at, Document.id, after, limit).all(), limit)
 
 def update_document(db: Session, document_id: str, document: document_schemas.DocumentUpdate):
     """Update a document"""
@@ -132,24 +210,18 @@ def create_chat_message(db: Session, chat_message: chat_schemas.ChatMessageCreat
     db.refresh(message)
     return message
 
-def get_chat_messages_by_session(db: Session, session_id: str):
-    """Get all chat messages for a session"""
-    return db.query(ChatMessage).filter(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at).all()
+def get_chat_messages_by_session(db: Session, session_id: str, after: Optional[Cursor] = None, limit: int = 100) -> Page:
+    """Get a page of a session's chat messages in order, starting after the cursor position"""
+    query = db.query(ChatMessage).filter(ChatMessage.session_id == session_id)
+    return page(keyset(query, ChatMessage.created_at, ChatMessage.id, after, limit).all(), limit)
 
 # Analytics CRUD operations
 def get_client_analytics(db: Session, client_id: str, days: int = 30):
-    """Get analytics for a client for the specified number of days"""
+    """Get analytics for a client for the specified number of days, read from the rollups"""
     date_from = datetime.utcnow() - timedelta(days=days)
-    
-    # Get session count
-    session_count = db.query(func.count(ChatSession.id))\
-        .filter(ChatSession.client_id == client_id, ChatSession.start_time >= date_from)\
-        .scalar()
-    
-    # Get message count
-    message_count = db.query(func.count(ChatMessage.id))\
-        .filter(ChatMessage.client_id == client_id, ChatMessage.created_at >= date_from)\
-        .scalar()
+    counts = totals(db, client_id, date_from)
+    session_count = counts["sessions"]
+    message_count = counts["messages"]
     
     # Get average messages per session
     avg_messages = 0
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Boolean, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Boolean, Integer, Index, LargeBinary, UniqueConstraint, PrimaryKeyConstraint, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+import hashlib
 import uuid
+import zlib
 from datetime import datetime
 
 from app.database.session import Base
@@ -19,11 +21,24 @@ class Client(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Relationships
-    documents = relationship("Document", back_populates="client", cascade="all, delete")
-    chat_sessions = relationship("ChatSession", back_populates="client", cascade="all, delete")
-    chat_messages = relationship("ChatMessage", back_populates="client", cascade="all, delete")
+    # Where the client's vectors are read from; NULL means the default index
+    # and a namespace named after the client
+    vector_index = Column(String, nullable=True)
+    vector_namespace = Column(String, nullable=True)
+    # Target of an embedding migration in progress; writes go to both
+    vector_migration_index = Column(String, nullable=True)
+    vector_migration_namespace = Column(String, nullable=True)
+    
+    # Relationships; children are never loaded to delete a client, crud.delete_client removes them in bulk
+    documents = relationship("Document", back_populates="client", cascade="all, delete", passive_deletes=True)
+    chat_sessions = relationship("ChatSession", back_populates="client", cascade="all, delete", passive_deletes=True)
+    chat_messages = relationship("ChatMessage", back_populates="client", cascade="all, delete", passive_deletes=True)
     crawler_jobs = relationship("CrawlerJob", back_populates="client")
+    
+    __table_args__ = (
+        # Keyset pagination of the client list
+        Index("ix_clients_created_at_id", "created_at", "id"),
+    )
 
 class Document(Base):
     __tablename__ = "documents"
@@ -35,10 +50,17 @@ class Document(Base):
     url = Column(String, nullable=True)
     document_metadata = Column(JSON, default={})
     vector_id = Column(String, nullable=True)
+    # Chunks currently indexed as vectors "{id}_0" .. "{id}_{chunk_count - 1}"
+    chunk_count = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     client = relationship("Client", back_populates="documents")
+    
+    __table_args__ = (
+        # A client's documents in creation order
+        Index("ix_documents_client_id_created_at", "client_id", "created_at", "id"),
+    )
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -51,21 +73,49 @@ class ChatSession(Base):
     
     # Relationships
     client = relationship("Client", back_populates="chat_sessions")
-    messages = relationship("ChatMessage", back_populates="session", cascade="all, delete")
+    messages = relationship("ChatMessage", back_populates="session", cascade="all, delete", passive_deletes=True)
+    
+    __table_args__ = (
+        # Per-client range counts (covering), and time windows across clients for analytics compaction
+        Index("ix_chat_sessions_client_id_start_time", "client_id", "start_time"),
+        Index("ix_chat_sessions_start_time", "start_time"),
+    )
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(String, default=generate_uuid)
     client_id = Column(String, ForeignKey("clients.id"), nullable=False)
     session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=False)
     user_message = Column(Text, nullable=False)
     bot_response = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     client = relationship("Client", back_populates="chat_messages")
     session = relationship("ChatSession", back_populates="messages")
+    
+    __table_args__ = (
+        # Postgres requires the partition key in the primary key; rows are still identified by id
+        PrimaryKeyConstraint("id", "created_at"),
+        # Per-client range counts (covering), and time windows across clients for analytics compaction
+        Index("ix_chat_messages_client_id_created_at", "client_id", "created_at"),
+        Index("ix_chat_messages_created_at", "created_at"),
+        # A session's messages in order, without a sort, paginated by (created_at, id)
+        Index("ix_chat_messages_session_id_created_at_id", "session_id", "created_at", "id"),
+        # Monthly partitions on Postgres, created ahead of time and archived by app.core.chat_archive
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+# Rows outside every monthly partition land here instead of failing
+event.listen(
+    ChatMessage.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS chat_messages_default PARTITION OF chat_messages DEFAULT").execute_if(
+        dialect="postgresql"
+    )
+)
 
 class Analytics(Base):
     __tablename__ = "analytics"
@@ -80,6 +130,32 @@ class Analytics(Base):
     # Relationships
     client = relationship("Client")
 
+class AnalyticsHourly(Base):
+    """Session and message counts per client and hour, written by analytics compaction."""
+    __tablename__ = "analytics_hourly"
+    
+    client_id = Column(String, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    messages = Column(Integer, nullable=False, default=0)
+
+class AnalyticsDaily(Base):
+    """Session and message counts per client and day, summed from analytics_hourly."""
+    __tablename__ = "analytics_daily"
+    
+    client_id = Column(String, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    messages = Column(Integer, nullable=False, default=0)
+
+class AnalyticsRollupState(Base):
+    """How far the rollups are complete: rows before rolled_up_until are counted in them."""
+    __tablename__ = "analytics_rollup_state"
+    
+    name = Column(String, primary_key=True)
+    rolled_up_until = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class CrawlerJob(Base):
     __tablename__ = "crawler_jobs"
     
@@ -89,7 +165,106 @@ class CrawlerJob(Base):
     status = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
-    result_data = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    stats = Column(JSON, nullable=True)
+    max_pages = Column(Integer, nullable=True)
+    
+    # Counters aggregated from crawled_pages; page content lives there
+    pages_crawled = Column(Integer, nullable=False, default=0, server_default="0")
+    pages_indexed = Column(Integer, nullable=False, default=0, server_default="0")
+    chunks_indexed = Column(Integer, nullable=False, default=0, server_default="0")
+    bytes_crawled = Column(Integer, nullable=False, default=0, server_default="0")
+    pages_duplicate = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Crawler frontier, visited set and emitted-page cursor of an unfinished crawl
+    checkpoint = deferred(Column(JSON, nullable=True))
+    checkpointed_at = Column(DateTime, nullable=True)
 
     # Relationship to the client
     client = relationship("Client", back_populates="crawler_jobs")
+    pages = relationship("CrawledPage", back_populates="job", cascade="all, delete", passive_deletes=True)
+    
+    @property
+    def duplicate_ratio(self) -> float:
+        """Share of crawled pages skipped as near-duplicates."""
+        if not self.pages_crawled:
+            return 0.0
+        return round((self.pages_duplicate or 0) / self.pages_crawled, 4)
+    
+    @property
+    def result_data(self):
+        """Summary of the crawl, kept for API compatibility."""
+        summary = {
+            "pages_crawled": self.pages_crawled or 0,
+            "pages_indexed": self.pages_indexed or 0,
+            "pages_duplicate": self.pages_duplicate or 0,
+            "duplicate_ratio": self.duplicate_ratio,
+            "chunks_indexed": self.chunks_indexed or 0,
+            "bytes_crawled": self.bytes_crawled or 0
+        }
+        if self.error:
+            summary["error"] = self.error
+        return summary
+
+class CrawledPage(Base):
+    __tablename__ = "crawled_pages"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_id = Column(String, ForeignKey("crawler_jobs.id", ondelete="CASCADE"), nullable=False)
+    client_id = Column(String, ForeignKey("clients.id"), nullable=False)
+    url = Column(String, nullable=False)
+    title = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=False)
+    status = Column(String, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    # 64-bit SimHash of the text as hex, and the URL this page near-duplicates
+    simhash = Column(String(16), nullable=True)
+    duplicate_of = Column(String, nullable=True)
+    # zlib-compressed UTF-8 text, only loaded when explicitly requested
+    content = deferred(Column(LargeBinary, nullable=True))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    job = relationship("CrawlerJob", back_populates="pages")
+    
+    __table_args__ = (
+        UniqueConstraint("job_id", "url", name="uq_crawled_pages_job_url"),
+        # A client's indexed pages by URL (vector reconciliation, re-embedding)
+        Index("ix_crawled_pages_client_id_status_url", "client_id", "status", "url"),
+    )
+    
+    def set_text(self, text: str):
+        """Store text compressed, updating its hash and size."""
+        raw = text.encode("utf-8")
+        self.content = zlib.compress(raw)
+        self.content_hash = hashlib.sha256(raw).hexdigest()
+        self.size = len(raw)
+    
+    @property
+    def text(self) -> str:
+        if self.content is None:
+            return ""
+        return zlib.decompress(self.content).decode("utf-8")
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, default={})
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    # Whatever the handler returned, e.g. a reconciliation report
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_background_jobs_status_run_at", "status", "run_at"),
+    )
@@ -0,0 +1,60 @@
+"""
+Keyset pagination on (created_at, id).
+
+Each page is fetched with WHERE (created_at, id) > (last created_at, last
+id) ORDER BY created_at, id LIMIT n, which an index on those columns answers
+by seeking straight to the position, however deep into the list it is. The
+position travels between requests as an opaque cursor.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor of the next page, absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Position after which a page starts: the (created_at, id) of the previous page's last row
+Cursor = Tuple[datetime, str]
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    data = json.dumps([created_at.isoformat(), id]).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """The position encoded by encode_cursor; ValueError if cursor is not one."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(data)
+        return datetime.fromisoformat(created_at), str(id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset(query, created_column, id_column, after: Optional[Cursor], limit: int):
+    """
+    Restrict a Query or select() to the page after `after`, fetching one extra
+    row so page() can tell whether another page follows.
+    """
+    if after is not None:
+        query = query.filter(tuple_(created_column, id_column) > tuple_(*after))
+    return query.order_by(created_column, id_column).limit(limit + 1)
+
+
+def page(rows: List[Any], limit: int, created_attribute: str = "created_at") -> Page:
+    """The rows of a keyset() query as a page, with the cursor of the next one if there is one."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return Page(rows, None)
+    last = rows[limit - 1]
+    return Page(rows[:limit], encode_cursor(getattr(last, created_attribute), last.id))
@@ -0,0 +1,130 @@
+"""
+Connection pool configuration and instrumentation.
+
+Both engines use a QueuePool sized from the DB_POOL_* settings and
+instrumented to record, per process, how long checkouts waited for a
+connection and how many gave up after DB_POOL_TIMEOUT. pool_stats()
+combines these with the pool's live state for the metrics endpoint.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+
+class PoolMetrics:
+    """Checkout counters of one pool, shared by the threads using it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.peak_checked_out = 0
+
+    def record(self, waited: float, checked_out: int = 0, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _InstrumentedPool:
+    """Times every checkout; the time includes opening a new connection when the pool grows."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # Keep counting across engine.dispose() and invalidation
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url, asynchronous: bool = False) -> Dict[str, Any]:
+    """create_engine/create_async_engine keyword arguments for a database URL."""
+    url = make_url(url)
+    options: Dict[str, Any] = {}
+    if url.get_backend_name() == "sqlite":
+        if not asynchronous:
+            options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # Each connection would be a separate empty database; keep SQLAlchemy's default pool
+            return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Configuration, live state and checkout metrics of an engine's pool."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # Connections open beyond size; SQLAlchemy reports unused slots as negative overflow
+            overflow=max(pool.overflow(), 0),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
@@ -1,21 +1,60 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.database.pool import engine_options, pool_stats
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    # For SQLite only
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Async drivers for the sync DATABASE_URL's database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine = None
+_AsyncSessionLocal = None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL with its driver swapped for the async one (asyncpg, aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def get_async_engine():
+    """The async engine, created on first use so the async drivers are only needed when used."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, asynchronous=True))
+        # Objects stay usable after commit without another round-trip to refresh them
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+def engine_pool_stats():
+    """Pool stats of this process's engines; the async engine's once it has been used."""
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(_async_engine.sync_engine) if _async_engine is not None else None,
+    }
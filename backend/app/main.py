@@ -1,10 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import uvicorn
 
 from app.core.config import settings
-from app.api.routes import clients, documents, chat, analytics
+from app.api.routes import clients, documents, chat, analytics, crawlers, metrics
+from app.core.chat_buffer import chat_buffer
+from app.database.pagination import NEXT_CURSOR_HEADER
 
 # Configure logging
 logging.basicConfig(
@@ -13,7 +16,13 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S"
 )
 
-app = FastAPI(title="AI Chatbot Platform API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write the chat turns still waiting in the buffer before the process exits
+    await chat_buffer.close()
+
+app = FastAPI(title="AI Chatbot Platform API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -22,13 +31,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginated listings return the next page's cursor in a header
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include API routers
 app.include_router(clients.router, prefix="/api/clients", tags=["clients"])
+app.include_router(crawlers.router, prefix="/api/clients", tags=["crawlers"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 async def root():
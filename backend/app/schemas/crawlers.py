@@ -27,6 +27,35 @@ class CrawlerResponse(CrawlerBase):
     created_at: datetime
     completed_at: Optional[datetime] = None
     result_data: Optional[Dict[str, Any]] = None
+    stats: Optional[Dict[str, Any]] = None
+    max_pages: Optional[int] = None
+    checkpointed_at: Optional[datetime] = None
+    pages_crawled: int = 0
+    pages_indexed: int = 0
+    chunks_indexed: int = 0
+    bytes_crawled: int = 0
+    pages_duplicate: int = 0
+    duplicate_ratio: float = 0.0
     
     class Config:
         from_attributes = True
+
+
+class CrawledPageResponse(BaseModel):
+    id: str
+    job_id: str
+    url: str
+    title: Optional[str] = None
+    content_hash: str
+    status: str
+    size: int
+    chunk_count: int
+    duplicate_of: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class CrawledPageDetail(CrawledPageResponse):
+    text: str
@@ -0,0 +1,158 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Polls the background_jobs table and runs one job at a time.
+
+    While a job runs, a heartbeat thread keeps renewing its lease; if the
+    process dies the lease expires and another worker picks the job up.
+    """
+
+    def __init__(self, worker_id: str, kinds: Optional[List[str]] = None):
+        self.worker_id = worker_id
+        self.kinds = kinds
+        self.lease_seconds = settings.JOB_LEASE_SECONDS
+        self._stopping = threading.Event()
+
+    def stop(self, *args):
+        """Finish the current job and exit."""
+        self._stopping.set()
+
+    def run(self):
+        from app.database.session import SessionLocal
+        from app.core.job_queue import claim_job
+
+        logger.info(f"Worker {self.worker_id} started")
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                job = claim_job(db, self.worker_id, kinds=self.kinds, lease_seconds=self.lease_seconds)
+                if job is None:
+                    self._stopping.wait(settings.WORKER_POLL_INTERVAL)
+                    continue
+                self.run_job(db, job)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} error: {e}")
+                self._stopping.wait(settings.WORKER_POLL_INTERVAL)
+            finally:
+                db.close()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def run_job(self, db, job):
+        from app.core.job_queue import complete_job, fail_job
+        from app.core.tasks import TASK_HANDLERS
+
+        handler = TASK_HANDLERS.get(job.kind)
+        if handler is None:
+            fail_job(db, job, f"No handler registered for job kind '{job.kind}'")
+            return
+
+        logger.info(f"Running job {job.id} ({job.kind}), attempt {job.attempts}")
+        heartbeat_done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job.id, heartbeat_done), daemon=True
+        )
+        heartbeat.start()
+        started = time.monotonic()
+        try:
+            result = handler(db, dict(job.payload or {}))
+        except Exception as e:
+            db.rollback()
+            logger.debug(traceback.format_exc())
+            fail_job(db, job, f"{type(e).__name__}: {e}")
+        else:
+            complete_job(db, job, result)
+            logger.info(f"Job {job.id} ({job.kind}) completed in {time.monotonic() - started:.1f}s")
+        finally:
+            heartbeat_done.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        from app.database.session import SessionLocal
+        from app.core.job_queue import renew_lease
+
+        while not done.wait(self.lease_seconds / 3):
+            db = SessionLocal()
+            try:
+                if not renew_lease(db, job_id, self.worker_id, self.lease_seconds):
+                    logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing lease on job {job_id}: {e}")
+            finally:
+                db.close()
+
+
+def _run_worker_process(worker_id: str, kinds: Optional[List[str]]):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s:%(name)s:%(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    worker = Worker(worker_id, kinds)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+        help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--kinds", type=str, default=None,
+        help="Comma-separated job kinds to run (default: all)"
+    )
+    args = parser.parse_args()
+    kinds = [kind.strip() for kind in args.kinds.split(",")] if args.kinds else None
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    if args.concurrency <= 1:
+        _run_worker_process(f"{prefix}:0", kinds)
+        return
+
+    # Each worker gets its own process, so CPU-heavy chunking and embedding
+    # run in parallel and a crash only takes down a single job.
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_run_worker_process, args=(f"{prefix}:{i}", kinds), name=f"worker-{i}")
+        for i in range(args.concurrency)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    """
+    Run the background workers.
+
+    Example:
+        python -m app.worker --concurrency 4
+    """
+    main()
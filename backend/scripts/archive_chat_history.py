@@ -0,0 +1,59 @@
+"""
+Move old chat history out of the database into compressed archive files.
+
+Usage:
+   python scripts/archive_chat_history.py                      # archive now
+   python scripts/archive_chat_history.py --retention-days 180
+   python scripts/archive_chat_history.py --enqueue            # every CHAT_ARCHIVE_INTERVAL_SECONDS
+
+Whole months older than the retention period are written to
+CHAT_ARCHIVE_DIR/chat_messages/<YYYY-MM>/<client id>.ndjson.gz and removed
+from the database; on Postgres their chat_messages partitions are dropped
+and the coming months' partitions are created. Chat exports still include
+archived months. --enqueue hands the work to the background workers, and
+the job then reschedules itself; it also keeps future partitions in place.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database.session import SessionLocal
+from app.core.job_queue import enqueue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive chat history older than the retention period")
+    parser.add_argument("--retention-days", type=int, default=None,
+                        help=f"Keep this many days in the database (default: {settings.CHAT_RETENTION_DAYS})")
+    parser.add_argument("--enqueue", action="store_true", help="Run as a recurring background job")
+    parser.add_argument("--interval", type=int, default=settings.CHAT_ARCHIVE_INTERVAL_SECONDS,
+                        help="With --enqueue, repeat every N seconds")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.enqueue:
+            payload = {"interval_seconds": args.interval}
+            if args.retention_days is not None:
+                payload["retention_days"] = args.retention_days
+            job = enqueue(db, "archive_chat_history", payload)
+            print(f"Enqueued archive_chat_history job {job.id}")
+            return
+
+        from app.core.chat_archive import archive_old_messages, ensure_partitions
+
+        result = archive_old_messages(db, retention_days=args.retention_days)
+        result["partitions_created"] = ensure_partitions(db)
+        print(json.dumps(result, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
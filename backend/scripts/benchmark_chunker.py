@@ -0,0 +1,105 @@
+"""
+Chunking benchmark: TokenChunker vs LangChain's RecursiveCharacterTextSplitter.
+
+Usage:
+   python scripts/benchmark_chunker.py --size-mb 2
+   python scripts/benchmark_chunker.py --file ./some-large-document.txt
+
+Compares the token-aware chunker used by DocumentProcessor against the
+character splitter it replaced and against the same splitter measuring
+length with tiktoken (its token-aware mode), on identical input.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.chunker import TokenChunker
+
+WORDS = (
+    "shipping returns warranty order account payment delivery product support "
+    "refund invoice subscription pricing discount store hours contact policy "
+    "the a of to and in is for with on our your you we can will"
+).split()
+
+
+def synthetic_text(size_bytes: int, seed: int) -> str:
+    """Generate paragraphs of sentences until the text reaches size_bytes."""
+    rng = random.Random(seed)
+    paragraphs = []
+    size = 0
+    while size < size_bytes:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+            sentences.append(" ".join(words).capitalize() + rng.choice(".?!"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def time_splitter(name: str, split, text: str, repeat: int, count_tokens):
+    best = None
+    chunks = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = split(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    sizes = [count_tokens(chunk) for chunk in chunks]
+    print(
+        f"{name:<28} {best:8.3f}s {len(text) / best / 1e6:8.2f} MB/s "
+        f"chunks={len(chunks):<6} tokens/chunk avg={sum(sizes) / len(sizes):.0f} max={max(sizes)}"
+    )
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document chunkers")
+    parser.add_argument("--file", help="Text file to chunk (defaults to synthetic text)")
+    parser.add_argument("--size-mb", type=float, default=1.0, help="Size of the synthetic text")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Chunk size in tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="Chunk overlap in tokens")
+    parser.add_argument("--chars-per-token", type=float, default=4.0,
+                        help="Conversion used to size the character splitter")
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(int(args.size_mb * 1e6), args.seed)
+
+    chunker = TokenChunker(args.chunk_size, args.chunk_overlap, encoding_name=args.encoding)
+    count_tokens = chunker.count_tokens
+    char_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=int(args.chunk_size * args.chars_per_token),
+        chunk_overlap=int(args.chunk_overlap * args.chars_per_token),
+        length_function=len,
+    )
+    tiktoken_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        length_function=count_tokens,
+    )
+
+    print(f"Input: {len(text) / 1e6:.2f} MB, {count_tokens(text)} tokens ({args.encoding})")
+    baseline = time_splitter("RecursiveCharacter (chars)", char_splitter.split_text, text, args.repeat, count_tokens)
+    token_baseline = time_splitter("RecursiveCharacter (tokens)", tiktoken_splitter.split_text, text, 1, count_tokens)
+    best = time_splitter("TokenChunker", chunker.split_text, text, args.repeat, count_tokens)
+    print(f"TokenChunker speedup: {baseline / best:.1f}x vs chars, {token_baseline / best:.1f}x vs tokens")
+
+
+if __name__ == "__main__":
+    main()
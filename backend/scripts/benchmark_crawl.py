@@ -0,0 +1,195 @@
+"""
+Reproducible crawl-throughput benchmark.
+
+Works against a fixed corpus of recorded responses so results do not depend
+on a live site or network access:
+
+1. Record a corpus from a real site (or generate a synthetic one for CI):
+   python scripts/benchmark_crawl.py record https://example.com --corpus ./corpus --max-pages 200
+   python scripts/benchmark_crawl.py synth --corpus ./corpus --pages 500
+
+2. Benchmark the crawler against it:
+   python scripts/benchmark_crawl.py run --corpus ./corpus --concurrency 8
+
+`run` serves the corpus from a local stand-in HTTP server, so fetching,
+rate limiting and parsing are all exercised over real sockets.
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.crawler import WebCrawler, HostRateLimiter
+from app.core.http_cache import ResponseCache, RECORD
+
+SYNTHETIC_ORIGIN = "http://corpus.local"
+MANIFEST = "manifest.json"
+
+WORDS = (
+    "shipping returns warranty order account payment delivery product support "
+    "refund invoice subscription pricing discount store hours contact policy"
+).split()
+
+
+def write_manifest(corpus: str, start_url: str):
+    with open(os.path.join(corpus, MANIFEST), "w") as f:
+        json.dump({"start_url": start_url}, f)
+
+
+def read_manifest(corpus: str) -> dict:
+    with open(os.path.join(corpus, MANIFEST)) as f:
+        return json.load(f)
+
+
+def record(args):
+    """Crawl a live site, storing every response in the corpus."""
+    cache = ResponseCache(args.corpus, RECORD)
+    crawler = WebCrawler(args.url, max_pages=args.max_pages, cache=cache)
+    pages = crawler.crawl()
+    write_manifest(args.corpus, args.url)
+    print(f"Recorded {crawler.fetch_count} responses ({len(pages)} pages) into {args.corpus}")
+
+
+def synth(args):
+    """Generate a deterministic synthetic site with a random link graph."""
+    rng = random.Random(args.seed)
+    cache = ResponseCache(args.corpus, RECORD)
+    urls = [f"{SYNTHETIC_ORIGIN}/"] + [f"{SYNTHETIC_ORIGIN}/page/{i}" for i in range(1, args.pages)]
+
+    for i, url in enumerate(urls):
+        paragraphs = "".join(
+            "<p>" + " ".join(rng.choice(WORDS) for _ in range(80)) + "</p>"
+            for _ in range(args.paragraphs)
+        )
+        # Keep every page reachable: link to the next page plus a few random ones
+        targets = {urls[(i + 1) % len(urls)]} | {rng.choice(urls) for _ in range(args.links)}
+        links = "".join(f'<a href="{urlparse(target).path}">link</a>' for target in sorted(targets))
+        html = f"<html><head><title>Page {i}</title></head><body>{paragraphs}{links}</body></html>"
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response.encoding = "utf-8"
+        response._content = html.encode("utf-8")
+        cache.put(url, response)
+
+    write_manifest(args.corpus, urls[0])
+    print(f"Generated {len(urls)} synthetic pages in {args.corpus}")
+
+
+def make_handler(entries: dict, origin: str, delay: float):
+    class CorpusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            entry = entries.get(self.path)
+            if entry is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            if delay:
+                time.sleep(delay)
+            body = base64.b64decode(entry["body"])
+            # Point absolute links at the stand-in server
+            body = body.replace(origin.encode(), self.server.local_origin.encode())
+            self.send_response(entry["status_code"])
+            for name, value in (entry.get("headers") or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return CorpusHandler
+
+
+def run(args):
+    """Serve the corpus locally and measure crawl throughput."""
+    manifest = read_manifest(args.corpus)
+    start = urlparse(manifest["start_url"])
+    origin = f"{start.scheme}://{start.netloc}"
+
+    entries = {}
+    for entry in ResponseCache(args.corpus).entries():
+        parsed = urlparse(entry["url"])
+        if f"{parsed.scheme}://{parsed.netloc}" == origin:
+            entries[parsed.path or "/"] = entry
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(entries, origin, args.latency))
+    server.local_origin = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = []
+    try:
+        for _ in range(args.repeat):
+            crawler = WebCrawler(
+                server.local_origin + (start.path or "/"),
+                max_pages=args.max_pages or len(entries),
+                concurrency=args.concurrency,
+                cache=None
+            )
+            if args.unlimited:
+                # Measure raw crawler throughput without politeness limits
+                crawler.limiters[urlparse(server.local_origin).netloc] = HostRateLimiter(
+                    rate=1e6, min_rate=1e6, max_rate=1e6
+                )
+            started = time.monotonic()
+            pages = sum(1 for _ in crawler.iter_pages())
+            elapsed = time.monotonic() - started
+            results.append((pages, crawler.fetch_count, elapsed))
+            print(
+                f"pages={pages} fetches={crawler.fetch_count} elapsed={elapsed:.2f}s "
+                f"pages/sec={pages / elapsed:.1f} fetch_rate={crawler.fetch_rate:.1f}/s"
+            )
+    finally:
+        server.shutdown()
+
+    best = max(pages / elapsed for pages, _, elapsed in results)
+    print(f"Best of {len(results)}: {best:.1f} pages/sec over {len(entries)} corpus entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl throughput benchmark against a recorded corpus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record a corpus from a live site")
+    record_parser.add_argument("url")
+    record_parser.add_argument("--corpus", required=True)
+    record_parser.add_argument("--max-pages", type=int, default=100)
+    record_parser.set_defaults(func=record)
+
+    synth_parser = subparsers.add_parser("synth", help="Generate a synthetic corpus")
+    synth_parser.add_argument("--corpus", required=True)
+    synth_parser.add_argument("--pages", type=int, default=200)
+    synth_parser.add_argument("--paragraphs", type=int, default=5)
+    synth_parser.add_argument("--links", type=int, default=5)
+    synth_parser.add_argument("--seed", type=int, default=42)
+    synth_parser.set_defaults(func=synth)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark the crawler against a corpus")
+    run_parser.add_argument("--corpus", required=True)
+    run_parser.add_argument("--concurrency", type=int, default=None)
+    run_parser.add_argument("--max-pages", type=int, default=None)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency in seconds")
+    run_parser.add_argument("--unlimited", action="store_true", help="Disable per-host rate limiting")
+    run_parser.set_defaults(func=run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Bulk import a directory or archive of documents for a client.
+
+Usage:
+   python scripts/bulk_import.py CLIENT_ID ./knowledge-base
+   python scripts/bulk_import.py CLIENT_ID ./export.zip --workers 16 --embed-batch-size 512
+
+Files are read and chunked in parallel across a process pool, one worker per
+core by default. Chunks are embedded and upserted in large batches from the
+main process, and the documents of each batch are then committed to the
+database.
+
+Progress is appended to a manifest file (default:
+<client id>-<source>.import-manifest in the current directory). Re-running
+the same command skips every file recorded there for the client, so an
+interrupted import picks up where it stopped, while importing the same
+source for another client imports everything again.
+Document ids are derived from the client and file path, so a file that was
+half-written when the import stopped is overwritten rather than duplicated.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tarfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.schemas.document import DocumentCreate
+from app.database.crud import insert_documents
+from app.database.models import Client, Document
+from app.database.session import SessionLocal
+from app.core.document_processor import DocumentProcessor
+from app.core.vector_routing import client_vector_store
+from app.core.vector_store import VectorStore
+
+DEFAULT_EXTENSIONS = ".txt,.md,.markdown,.html,.htm"
+
+# Set in each worker process by init_worker
+_processor = None
+
+
+def init_worker():
+    global _processor
+    _processor = DocumentProcessor()
+
+
+def extract_text(name: str, data: bytes) -> str:
+    text = data.decode("utf-8", errors="replace")
+    if name.lower().endswith((".html", ".htm")):
+        text = BeautifulSoup(text, "html.parser").get_text(separator="\n", strip=True)
+    return text
+
+
+def chunk_file(document_id: str, key: str, client_id: str, path: str = None, data: bytes = None):
+    """Read and chunk one file in a worker process."""
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+    title = os.path.basename(key)
+    content = extract_text(key, data)
+    chunks = [
+        (chunk.chunk_id, chunk.content, chunk.metadata)
+        for chunk in _processor.iter_document_chunks(
+            {"id": document_id, "title": title, "content": content}, client_id
+        )
+    ]
+    return key, document_id, title, content, chunks
+
+
+def iter_sources(source: str, extensions):
+    """Yield (key, path, data) for every importable file under source."""
+    def wanted(name):
+        return name.lower().endswith(extensions)
+
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if wanted(name):
+                    yield os.path.relpath(path, source), path, None
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and wanted(info.filename):
+                    yield info.filename, None, archive.read(info)
+    elif tarfile.is_tarfile(source):
+        # Members are read in order so compressed tarballs are streamed once
+        with tarfile.open(source) as archive:
+            for member in archive:
+                if member.isfile() and wanted(member.name):
+                    yield member.name, None, archive.extractfile(member).read()
+    else:
+        raise SystemExit(f"{source} is not a directory, zip or tar archive")
+
+
+def load_manifest(path: str, client_id: str):
+    """Keys of the files the manifest records as imported for client_id."""
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("client_id") == client_id:
+                        done.add(entry["key"])
+    return done
+
+
+class Importer:
+    def __init__(self, client_id: str, manifest_path: str, embed_batch_size: int, upsert_batch_size: int):
+        self.client_id = client_id
+        self.manifest_path = manifest_path
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.db = SessionLocal()
+        # Writes reach the client's live namespace and any embedding migration target
+        client = self.db.query(Client).filter(Client.id == client_id).first()
+        self.vector_store = client_vector_store(client, lru_cache(maxsize=None)(VectorStore), client_id=client_id)
+        # Chunked files waiting to be embedded and committed
+        self.pending = []
+        self.pending_chunks = 0
+        self.documents = 0
+        self.chunks = 0
+        self.started = time.monotonic()
+
+    def add(self, result):
+        self.pending.append(result)
+        self.pending_chunks += len(result[4])
+        if self.pending_chunks >= self.embed_batch_size:
+            self.flush()
+
+    def flush(self):
+        """Embed and upsert the pending files' chunks, then commit their documents."""
+        if not self.pending:
+            return
+        chunks = [chunk for result in self.pending for chunk in result[4]]
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start:start + self.embed_batch_size]
+            embeddings = self.vector_store.embed_texts([content for _, content, _ in batch])
+            for offset in range(0, len(batch), self.upsert_batch_size):
+                part = slice(offset, offset + self.upsert_batch_size)
+                self.vector_store.upsert_embeddings(
+                    ids=[chunk_id for chunk_id, _, _ in batch[part]],
+                    embeddings=embeddings[part],
+                    texts=[content for _, content, _ in batch[part]],
+                    metadatas=[metadata for _, _, metadata in batch[part]],
+                    client_id=self.client_id
+                )
+
+        ids = [document_id for _, document_id, _, _, _ in self.pending]
+        try:
+            # Replace rows left behind by an import that stopped before updating the manifest
+            self.db.query(Document).filter(Document.id.in_(ids)).delete(synchronize_session=False)
+            insert_documents(
+                self.db,
+                [DocumentCreate(title=title, content=content) for _, _, title, content, _ in self.pending],
+                self.client_id,
+                ids=ids
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        with open(self.manifest_path, "a") as f:
+            for key, document_id, _, _, file_chunks in self.pending:
+                f.write(json.dumps({
+                    "client_id": self.client_id, "key": key, "document_id": document_id, "chunks": len(file_chunks)
+                }) + "\n")
+
+        self.documents += len(self.pending)
+        self.chunks += len(chunks)
+        self.pending = []
+        self.pending_chunks = 0
+        self.report()
+
+    def report(self, final: bool = False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(
+            f"{'Done: ' if final else ''}{self.documents} docs, {self.chunks} chunks in {elapsed:.1f}s "
+            f"({self.documents / elapsed:.1f} docs/sec, {self.chunks / elapsed:.1f} chunks/sec)"
+        )
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import documents for a client")
+    parser.add_argument("client_id")
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) archive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Chunking processes")
+    parser.add_argument("--embed-batch-size", type=int, default=256)
+    parser.add_argument("--upsert-batch-size", type=int, default=100)
+    parser.add_argument("--extensions", default=DEFAULT_EXTENSIONS, help="Comma-separated file extensions")
+    parser.add_argument("--manifest", help="Checkpoint file listing imported files")
+    args = parser.parse_args()
+
+    source_name = os.path.basename(os.path.normpath(args.source))
+    manifest_path = args.manifest or f"{args.client_id}-{source_name}.import-manifest"
+    extensions = tuple(ext.strip().lower() for ext in args.extensions.split(",") if ext.strip())
+    done = load_manifest(manifest_path, args.client_id)
+    if done:
+        print(f"Skipping {len(done)} files already imported according to {manifest_path}")
+
+    db = SessionLocal()
+    try:
+        if not db.query(Client).filter(Client.id == args.client_id).first():
+            raise SystemExit(f"Client {args.client_id} not found")
+    finally:
+        db.close()
+
+    importer = Importer(args.client_id, manifest_path, args.embed_batch_size, args.upsert_batch_size)
+    skipped = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+            in_flight = set()
+
+            def collect():
+                nonlocal in_flight
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    importer.add(future.result())
+
+            for key, path, data in iter_sources(args.source, extensions):
+                if key in done:
+                    skipped += 1
+                    continue
+                document_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{args.client_id}/{key}"))
+                in_flight.add(pool.submit(chunk_file, document_id, key, args.client_id, path, data))
+                # Bound the files held in memory while the embedder catches up
+                if len(in_flight) >= args.workers * 4:
+                    collect()
+
+            while in_flight:
+                collect()
+        importer.flush()
+    finally:
+        importer.close()
+
+    importer.report(final=True)
+    if skipped:
+        print(f"Skipped {skipped} previously imported files")
+
+
+if __name__ == "__main__":
+    main()
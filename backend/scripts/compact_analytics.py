@@ -0,0 +1,50 @@
+"""
+Roll chat sessions and messages up into the hourly and daily analytics tables.
+
+Usage:
+   python scripts/compact_analytics.py                # catch up now
+   python scripts/compact_analytics.py --enqueue      # every ANALYTICS_COMPACTION_INTERVAL_SECONDS
+   python scripts/compact_analytics.py --enqueue --interval 300
+
+The analytics endpoints read the rollups up to the point compaction has
+reached and the raw tables after it, so the less compaction lags behind,
+the less raw data each dashboard query scans. --enqueue hands the work to
+the background workers, and the job then reschedules itself.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database.session import SessionLocal
+from app.core.job_queue import enqueue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll chat activity up into the analytics tables")
+    parser.add_argument("--enqueue", action="store_true", help="Run as a recurring background job")
+    parser.add_argument("--interval", type=int, default=settings.ANALYTICS_COMPACTION_INTERVAL_SECONDS,
+                        help="With --enqueue, repeat every N seconds")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.enqueue:
+            job = enqueue(db, "compact_analytics", {"interval_seconds": args.interval})
+            print(f"Enqueued compact_analytics job {job.id}")
+            return
+
+        from app.core.analytics import compact
+
+        print(json.dumps(compact(db), indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ Script to fix dimension mismatch between Pinecone index and embeddings.
 This will either:
 1. Update your config to match the existing index dimension
 2. Or recreate the index with your desired dimension (WARNING: this will delete all existing data)
+
+To change embedding models without downtime, use scripts/migrate_embeddings.py
+instead: it re-embeds every client into a new index while chat keeps serving.
 """
 
 import os
@@ -41,7 +44,7 @@ def recreate_index(index_name, api_key, environment, new_dimension):
     # Create a new index with the vector store helper
     # This will use the dimension from settings
     print(f"Creating new index {index_name} with dimension {new_dimension}...")
-    vs = VectorStore(index_name)
+    vs = VectorStore(index_name, dimension=new_dimension)
     print(f"Index {index_name} created with dimension {new_dimension}.")
 
 def update_env_file(dimension):
@@ -0,0 +1,126 @@
+"""
+Bursty load test for the database connection pool.
+
+Usage:
+   DATABASE_URL=postgresql://... python scripts/load_test_pool.py
+   python scripts/load_test_pool.py --threads 40 --bursts 5 --hold 0.05 --processes 4
+
+Simulates one API process under widget traffic: each burst starts
+--threads concurrent requests at once, each checking out a connection and
+holding it for --hold seconds (SELECT pg_sleep on Postgres) like a
+request's queries would. The pool is configured exactly as the app's
+(DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, ...), so the report shows
+whether it absorbs the bursts: checkout wait percentiles, timeouts and the
+peak number of connections in use.
+
+On Postgres it also checks the connection budget: --processes API/worker
+processes, each with a sync and an async pool of up to
+DB_POOL_SIZE + DB_MAX_OVERFLOW connections, must fit in max_connections
+minus the superuser reserve.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database.session import engine
+from app.database.pool import pool_stats
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_burst(threads: int, hold: float, postgres: bool, waits: list, errors: list, lock: threading.Lock):
+    start = threading.Barrier(threads)
+
+    def request():
+        start.wait()
+        requested = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                waited = time.perf_counter() - requested
+                if postgres:
+                    connection.execute(text("SELECT pg_sleep(:hold)"), {"hold": hold})
+                else:
+                    connection.execute(text("SELECT 1"))
+                    time.sleep(hold)
+            with lock:
+                waits.append(waited)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    workers = [threading.Thread(target=request) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def check_budget(processes: int):
+    per_pool = settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+    needed = processes * 2 * per_pool
+    with engine.connect() as connection:
+        max_connections = int(connection.execute(text("SHOW max_connections")).scalar())
+        reserved = int(connection.execute(text("SHOW superuser_reserved_connections")).scalar())
+        in_use = connection.execute(text("SELECT count(*) FROM pg_stat_activity")).scalar()
+    available = max_connections - reserved
+    print(f"Connection budget: {processes} processes x 2 engines x {per_pool} = {needed} "
+          f"of {available} available ({in_use} open now)")
+    if needed > available:
+        print("  Over budget: lower DB_POOL_SIZE/DB_MAX_OVERFLOW, run fewer processes or add a pooler (PgBouncer)")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the database connection pool with bursts of requests")
+    parser.add_argument("--threads", type=int, default=50, help="Concurrent requests per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--pause", type=float, default=0.5, help="Seconds between bursts")
+    parser.add_argument("--hold", type=float, default=0.05, help="Seconds each request holds its connection")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="API and worker processes sharing the database, for the budget check")
+    args = parser.parse_args()
+
+    postgres = engine.dialect.name == "postgresql"
+    print(f"Pool: size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+          f"timeout={settings.DB_POOL_TIMEOUT}s recycle={settings.DB_POOL_RECYCLE}s "
+          f"pre_ping={settings.DB_POOL_PRE_PING} ({engine.dialect.name})")
+    within_budget = check_budget(args.processes) if postgres else True
+
+    waits, errors, lock = [], [], threading.Lock()
+    started = time.perf_counter()
+    for burst in range(args.bursts):
+        run_burst(args.threads, args.hold, postgres, waits, errors, lock)
+        if burst < args.bursts - 1:
+            time.sleep(args.pause)
+    elapsed = time.perf_counter() - started
+
+    stats = pool_stats(engine)
+    print(f"{len(waits)} requests in {elapsed:.2f}s, {len(errors)} failed")
+    print(f"Checkout wait: p50={percentile(waits, 0.5) * 1000:.1f}ms p95={percentile(waits, 0.95) * 1000:.1f}ms "
+          f"p99={percentile(waits, 0.99) * 1000:.1f}ms max={max(waits, default=0) * 1000:.1f}ms")
+    print(f"Pool: peak checked out {stats.get('peak_checked_out')}, timeouts {stats.get('timeouts')}, "
+          f"{stats.get('checked_in')} idle connections kept")
+    for error in sorted(set(errors))[:5]:
+        print(f"  {error}")
+
+    if errors or not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
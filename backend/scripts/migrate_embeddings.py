@@ -0,0 +1,136 @@
+"""
+Re-embed every client's knowledge base into a new index or namespace
+without downtime.
+
+Usage:
+   python scripts/migrate_embeddings.py --index chatbot-knowledge-1536 --dimension 1536
+   python scripts/migrate_embeddings.py --version v2 --client CLIENT_ID
+   python scripts/migrate_embeddings.py --index chatbot-knowledge-1536 --abort
+
+For each client, writes start going to both its live namespace and the new
+one, the documents and crawled pages in the database are re-embedded into
+the new one in parallel, throttled batches, and the client's reads are then
+switched over in a single UPDATE. Chat keeps answering from the live
+namespace until that moment. The old namespaces are deleted at the end,
+once API processes can no longer hold a cached client pointing at them,
+unless --keep-old is given (reconciliation will reclaim them later).
+
+--index targets a new index, created with --dimension (which selects the
+embedding model) if it does not exist; --version targets a namespace named
+"<client id>--<version>". Re-running the same command resumes: clients
+already switched are skipped and upserts are idempotent. Set
+EMBEDDING_CACHE_DIR (or --cache-dir) to reuse embeddings of unchanged text
+across runs.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.document_processor import DocumentProcessor
+from app.core.embedding_migration import abort_migration, backfill, start_migration, switch_reads, wait_for_jobs
+from app.core.vector_routing import VectorTarget, read_target
+from app.core.vector_store import VectorStore
+from app.database.models import Client
+from app.database.session import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed clients into a new index or namespace online")
+    parser.add_argument("--index", help="Target index (default: each client's current index)")
+    parser.add_argument("--dimension", type=int, choices=[1024, 1536], help="Dimension of a new target index")
+    parser.add_argument("--version", help="Target namespace suffix, e.g. v2")
+    parser.add_argument("--client", action="append", dest="client_ids", help="Only migrate this client (repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent embedding batches")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBED_BATCH_SIZE)
+    parser.add_argument("--max-batches-per-second", type=float, default=None,
+                        help="Throttle to stay within the embedding provider's rate limit")
+    parser.add_argument("--cache-dir", help="Embedding cache directory (default: EMBEDDING_CACHE_DIR)")
+    parser.add_argument("--keep-old", action="store_true", help="Don't delete the old namespaces")
+    parser.add_argument("--abort", action="store_true", help="Cancel migrations and delete their targets")
+    args = parser.parse_args()
+
+    if not args.index and not args.version:
+        parser.error("give --index, --version or both")
+    if args.cache_dir:
+        settings.EMBEDDING_CACHE_DIR = args.cache_dir
+
+    stores = {}
+
+    def get_store(index_name):
+        if index_name not in stores:
+            stores[index_name] = VectorStore(index_name, dimension=args.dimension)
+        return stores[index_name]
+
+    document_processor = DocumentProcessor()
+    old_targets = []
+    last_switch = None
+    db = SessionLocal()
+    try:
+        query = db.query(Client).order_by(Client.created_at)
+        if args.client_ids:
+            query = query.filter(Client.id.in_(args.client_ids))
+        clients = [(client.id, read_target(client)) for client in query]
+
+        for client_id, current in clients:
+            target = VectorTarget(
+                args.index or current.index_name,
+                f"{client_id}--{args.version}" if args.version else client_id
+            )
+
+            if args.abort:
+                abandoned = abort_migration(db, client_id)
+                if abandoned is not None:
+                    get_store(abandoned.index_name).delete_by_client(abandoned.namespace)
+                    print(f"{client_id}: aborted migration to {abandoned.index_name}/{abandoned.namespace}")
+                continue
+
+            if current == target:
+                print(f"{client_id}: already on {target.index_name}/{target.namespace}, skipping")
+                continue
+
+            started = time.monotonic()
+            running_jobs = start_migration(db, client_id, target)
+            wait_for_jobs(db, running_jobs)
+
+            def report(count):
+                elapsed = max(time.monotonic() - started, 1e-9)
+                print(f"{client_id}: {count} chunks re-embedded ({count / elapsed:.1f} chunks/sec)", end="\r")
+
+            count = backfill(
+                db,
+                client_id,
+                get_store(target.index_name),
+                target.namespace,
+                document_processor,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                max_batches_per_second=args.max_batches_per_second,
+                on_progress=report
+            )
+            previous = switch_reads(db, client_id)
+            last_switch = time.monotonic()
+            print(f"{client_id}: {count} chunks re-embedded, reads switched to {target.index_name}/{target.namespace}")
+            if previous is not None and not args.keep_old:
+                old_targets.append((client_id, previous))
+
+        if old_targets and not settings.AUTH_CACHE_REDIS_URL:
+            # API processes may still serve a cached client pointing at the old namespace
+            remaining = last_switch + settings.AUTH_CACHE_TTL_SECONDS - time.monotonic()
+            if remaining > 0:
+                print(f"Waiting {remaining:.0f}s for cached clients to expire")
+                time.sleep(remaining)
+        for client_id, previous in old_targets:
+            get_store(previous.index_name).delete_by_client(previous.namespace)
+            print(f"{client_id}: deleted {previous.index_name}/{previous.namespace}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
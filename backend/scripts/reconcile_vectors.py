@@ -0,0 +1,55 @@
+"""
+Find and delete orphaned vectors.
+
+Usage:
+   python scripts/reconcile_vectors.py --dry-run          # report only
+   python scripts/reconcile_vectors.py --client CLIENT_ID # one client's namespace
+   python scripts/reconcile_vectors.py --enqueue --interval 86400
+
+Compares each client's Pinecone namespace with its documents and crawled
+pages and deletes vectors that no longer belong to either, as well as the
+namespaces of deleted clients. --enqueue hands the work to the background
+workers instead; with --interval the job reschedules itself.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.session import SessionLocal
+from app.core.job_queue import enqueue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete vectors that no longer belong to any document")
+    parser.add_argument("--client", action="append", dest="client_ids", help="Only reconcile this client (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    parser.add_argument("--enqueue", action="store_true", help="Run as a background job")
+    parser.add_argument("--interval", type=int, default=None, help="With --enqueue, repeat every N seconds")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.enqueue:
+            payload = {"client_ids": args.client_ids, "dry_run": args.dry_run, "interval_seconds": args.interval}
+            job = enqueue(db, "reconcile_vectors", payload)
+            print(f"Enqueued reconcile_vectors job {job.id}")
+            return
+
+        from app.core.vector_gc import reconcile
+        from app.core.vector_store import VectorStore
+
+        report = reconcile(db, VectorStore(), client_ids=args.client_ids, dry_run=args.dry_run)
+        print(json.dumps(report, indent=2))
+        verb = "Would reclaim" if args.dry_run else "Reclaimed"
+        print(f"{verb} {report['reclaimed']} vectors")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import pytest
+from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
-from app.database.models import Client
+from app.config import settings
+from app.database.models import BackgroundJob, Client
 
 def test_create_client(client, db):
     # Test data
@@ -43,3 +45,20 @@ def test_get_clients(client, db):
     assert len(data) == 2
     assert data[0]["name"] == "Test Client 1"
     assert data[1]["name"] == "Test Client 2"
+
+def test_delete_client_returns_before_its_data_is_removed(client, db):
+    db_client = Client(name="Test Client", website_url="https://test.com")
+    db.add(db_client)
+    db.commit()
+
+    response = client.delete(f"/api/clients/{db_client.id}")
+
+    assert response.status_code == 202
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == response.json()["job_id"]).one()
+    assert (job.kind, job.payload["client_id"]) == ("delete_client", db_client.id)
+    # Not before other processes' cached copies of the client have expired
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=settings.AUTH_CACHE_TTL_SECONDS - 5)
+    # The API key stops working at once; the row itself goes with the job
+    db.refresh(db_client)
+    assert db_client.is_active is False
+    assert client.delete("/api/clients/unknown").status_code == 404
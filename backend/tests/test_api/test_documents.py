@@ -0,0 +1,160 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+from app.config import settings
+from app.database.models import BackgroundJob, Client, Document
+
+@pytest.fixture
+def api_client(db):
+    api_client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(api_client)
+    db.commit()
+    return api_client
+
+def test_bulk_create_documents_from_ndjson(client, db, api_client):
+    lines = [
+        json.dumps({"title": f"Doc {i}", "content": f"Content {i}", "url": f"https://test.com/{i}"})
+        for i in range(5)
+    ]
+    body = "\n".join(lines) + "\n"
+
+    response = client.post(
+        "/api/documents/bulk",
+        content=body,
+        headers={"api-key": api_client.api_key, "Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["count"] == 5
+
+    documents = db.query(Document).filter(Document.client_id == api_client.id).all()
+    assert sorted(document.title for document in documents) == [f"Doc {i}" for i in range(5)]
+
+    # One indexing job covers the whole upload
+    jobs = db.query(BackgroundJob).all()
+    assert len(jobs) == 1
+    assert jobs[0].id == data["job_id"]
+    assert jobs[0].kind == "process_documents"
+    assert jobs[0].payload["document_ids"] == data["document_ids"]
+
+def test_bulk_create_documents_from_files(client, db, api_client):
+    files = [
+        ("files", ("faq.txt", io.BytesIO(b"Shipping takes three days."), "text/plain")),
+        ("files", ("returns.md", io.BytesIO(b"# Returns\nWithin 30 days."), "text/markdown")),
+    ]
+
+    response = client.post("/api/documents/bulk", files=files, headers={"api-key": api_client.api_key})
+
+    assert response.status_code == 202
+    assert response.json()["count"] == 2
+    titles = {document.title: document.content for document in db.query(Document).all()}
+    assert titles == {"faq.txt": "Shipping takes three days.", "returns.md": "# Returns\nWithin 30 days."}
+
+def test_bulk_create_rejects_invalid_lines(client, db, api_client):
+    body = json.dumps({"title": "Ok", "content": "Fine"}) + "\n" + json.dumps({"title": "Missing content"})
+
+    response = client.post(
+        "/api/documents/bulk",
+        content=body,
+        headers={"api-key": api_client.api_key, "Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 422
+    assert "line 2" in response.json()["detail"]
+    # Nothing from a rejected upload is kept
+    assert db.query(Document).count() == 0
+    assert db.query(BackgroundJob).count() == 0
+
+def test_upload_document_file(client, db, api_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    content = b"# Shipping\nTakes three days.\n"
+
+    response = client.post(
+        "/api/documents/upload",
+        files={"file": ("guide.md", io.BytesIO(content), "text/markdown")},
+        headers={"api-key": api_client.api_key}
+    )
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["size"] == len(content)
+
+    # The upload is stored for the worker, which fills in the document's text
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == data["job_id"]).first()
+    assert job.kind == "process_file"
+    with open(job.payload["path"], "rb") as f:
+        assert f.read() == content
+    document = db.query(Document).filter(Document.id == data["document_id"]).first()
+    assert document.title == "guide.md"
+    assert document.content == ""
+
+def test_upload_rejects_unsupported_files(client, api_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+
+    response = client.post(
+        "/api/documents/upload",
+        files={"file": ("data.xlsx", io.BytesIO(b"..."), "application/octet-stream")},
+        headers={"api-key": api_client.api_key}
+    )
+
+    assert response.status_code == 415
+    assert list(tmp_path.iterdir()) == []
+
+def test_upload_is_cut_off_at_the_size_limit(client, db, api_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+    head = (
+        b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.txt"\r\n'
+        b"Content-Type: text/plain\r\n\r\n"
+    )
+
+    def body():
+        # Chunked, so there is no Content-Length to reject up front
+        yield head
+        for _ in range(100):
+            yield b"x" * 512
+        yield b"\r\n--b--\r\n"
+
+    response = client.post(
+        "/api/documents/upload",
+        content=body(),
+        headers={"api-key": api_client.api_key, "Content-Type": "multipart/form-data; boundary=b"}
+    )
+
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+    assert db.query(Document).count() == 0
+
+    # A declared length over the limit is rejected before the body is read
+    response = client.post(
+        "/api/documents/upload",
+        files={"file": ("big.txt", io.BytesIO(b"x" * 2048), "text/plain")},
+        headers={"api-key": api_client.api_key}
+    )
+    assert response.status_code == 413
+
+def test_list_documents_pages_by_cursor_without_content(client, db, api_client):
+    db.add_all([
+        Document(client_id=api_client.id, title=f"Doc {i}", content=f"Content {i}", created_at=datetime(2024, 1, 1))
+        for i in range(5)
+    ])
+    db.commit()
+    headers = {"api-key": api_client.api_key}
+
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/documents/", params={"limit": 2, "cursor": cursor}, headers=headers)
+        assert response.status_code == 200
+        assert all("content" not in document for document in response.json())
+        ids += [document["id"] for document in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    # Rows with equal timestamps are ordered by id, so none are skipped or repeated
+    assert ids == sorted(document.id for document in db.query(Document))
+
+    assert client.get(f"/api/documents/{ids[0]}", headers=headers).json()["content"].startswith("Content")
+    assert client.get("/api/documents/", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
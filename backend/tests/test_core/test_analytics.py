@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.core.analytics import Bucket, compact, series, totals
+from app.database.models import AnalyticsDaily, ChatMessage, ChatSession, Client
+
+NOW = datetime(2024, 3, 14, 15, 30)  # a Thursday
+
+def add_sessions(db, *start_times):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    for start_time in start_times:
+        session = ChatSession(client_id=client.id, start_time=start_time)
+        db.add(session)
+        db.flush()
+        db.add(ChatMessage(client_id=client.id, session_id=session.id, user_message="Hi",
+                           bot_response="Hello", created_at=start_time))
+    db.commit()
+    return client
+
+def test_series_counts_raw_rows_in_one_grouped_query(db):
+    client = add_sessions(
+        db,
+        datetime(2024, 3, 14, 9), datetime(2024, 3, 14, 15, 5), datetime(2024, 3, 12, 23, 59),
+        datetime(2024, 3, 1)  # outside the range
+    )
+    client_id = client.id
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        daily = series(db, client_id, "sessions", 3, Bucket.DAY, now=NOW)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    # The rollup watermark, then one GROUP BY over the raw rows
+    assert len(statements) == 2
+    assert "GROUP BY" in statements[1]
+    assert daily == [
+        {"date": "2024-03-11", "count": 0},
+        {"date": "2024-03-12", "count": 1},
+        {"date": "2024-03-13", "count": 0},
+        {"date": "2024-03-14", "count": 2},
+    ]
+
+def test_series_rejects_an_empty_window(db):
+    client = add_sessions(db)
+    with pytest.raises(ValueError):
+        series(db, client.id, "sessions", -1, Bucket.DAY, now=NOW)
+
+def test_series_hours_and_weeks(db):
+    client = add_sessions(db, datetime(2024, 3, 14, 14, 59), datetime(2024, 3, 14, 15, 1), datetime(2024, 3, 4, 8))
+
+    hourly = series(db, client.id, "sessions", 0, Bucket.HOUR, now=NOW)
+    assert hourly == [{"date": "2024-03-14 15:00", "count": 1}]
+
+    # Weeks start on Monday
+    weekly = series(db, client.id, "sessions", 14, Bucket.WEEK, now=NOW)
+    assert weekly == [
+        {"date": "2024-02-26", "count": 0},
+        {"date": "2024-03-04", "count": 1},
+        {"date": "2024-03-11", "count": 2},
+    ]
+
+def test_reads_merge_rollups_with_rows_after_the_watermark(db):
+    client = add_sessions(
+        db,
+        datetime(2024, 3, 12, 10), datetime(2024, 3, 13, 23, 10), datetime(2024, 3, 14, 9, 30),
+        datetime(2024, 3, 14, 15, 5)
+    )
+    expected = {
+        bucket: series(db, client.id, "messages", 3, bucket, now=NOW) for bucket in Bucket
+    }
+
+    result = compact(db, now=NOW, lag_seconds=0)
+    assert result["rolled_up_until"] == "2024-03-14T15:00:00"
+    # Complete days only; the current day is read from the hourly rollup
+    assert [(row.bucket_start.day, row.messages) for row in db.query(AnalyticsDaily).order_by(AnalyticsDaily.bucket_start)] \
+        == [(12, 1), (13, 1)]
+
+    # A write after compaction is counted from the raw rows
+    session = db.query(ChatSession).filter(ChatSession.start_time == datetime(2024, 3, 14, 15, 5)).one()
+    db.add(ChatMessage(client_id=client.id, session_id=session.id, user_message="Thanks",
+                       bot_response="You're welcome", created_at=datetime(2024, 3, 14, 15, 20)))
+    db.commit()
+    expected[Bucket.DAY][-1]["count"] += 1
+    expected[Bucket.WEEK][-1]["count"] += 1
+    expected[Bucket.HOUR][-1]["count"] += 1
+
+    for bucket in Bucket:
+        assert series(db, client.id, "messages", 3, bucket, now=NOW) == expected[bucket]
+    assert totals(db, client.id, datetime(2024, 3, 11, 12)) == {"sessions": 4, "messages": 5}
+    # Starting part-way through a rolled-up day leaves out that day's earlier rows
+    assert totals(db, client.id, datetime(2024, 3, 12, 11)) == {"sessions": 3, "messages": 4}
+
+    # Compacting again is a no-op until another hour has passed
+    assert compact(db, now=NOW, lag_seconds=0)["hours"] == 0
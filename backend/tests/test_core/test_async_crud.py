@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.schemas.chat import ChatMessageCreate
+from app.api.schemas.client import ClientCreate
+from app.core.analytics import series
+from app.core.auth_cache import ClientCache, MemoryBackend
+from app.database import async_crud
+from app.database.models import Base
+from app.database.session import async_database_url
+
+def test_async_database_url_swaps_the_driver():
+    assert async_database_url("postgresql://u:p@db/app").drivername == "postgresql+asyncpg"
+    assert async_database_url("sqlite:///./chatbot.db").drivername == "sqlite+aiosqlite"
+
+def test_chat_and_analytics_on_an_async_session(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    engine = create_async_engine(async_database_url(url))
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    cache = ClientCache(MemoryBackend(100), ttl=60, negative_ttl=60)
+
+    async def run():
+        async with Session() as db:
+            client = await async_crud.create_client(db, ClientCreate(name="Test Company", website_url="https://testcompany.com"))
+            assert (await cache.aget_client(db, client.api_key)).id == client.id
+            assert await cache.aget_client(db, "invalid-key") is None
+
+            session = await async_crud.create_chat_session(db, client.id)
+            for text in ["hi", "thanks"]:
+                await async_crud.create_chat_message(db, ChatMessageCreate(
+                    client_id=client.id, session_id=session.id, user_message=text, bot_response="ok"
+                ))
+            messages = (await async_crud.get_chat_messages_by_session(db, session.id)).items
+            assert [message.user_message for message in messages] == ["hi", "thanks"]
+
+            analytics = await async_crud.get_client_analytics(db, client.id)
+            assert (analytics["total_sessions"], analytics["total_messages"]) == (1, 2)
+            daily = await db.run_sync(series, client.id, "messages", 1)
+            assert sum(point["count"] for point in daily) == 2
+        await engine.dispose()
+
+    asyncio.run(run())
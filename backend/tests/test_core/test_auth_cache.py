@@ -0,0 +1,59 @@
+from sqlalchemy import event
+
+from app.api.schemas.client import ClientUpdate
+from app.core.auth_cache import ClientCache, MemoryBackend
+from app.core import auth_cache
+from app.database.crud import delete_client, update_client
+from app.database.models import Client
+
+def count_queries(db):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    return statements, lambda: event.remove(db.get_bind(), "before_cursor_execute", record)
+
+def test_cache_serves_known_and_unknown_keys_without_queries(db):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    cache = ClientCache(MemoryBackend(100), ttl=60, negative_ttl=60)
+
+    record = cache.get_client(db, client.api_key)
+    assert (record.id, record.name) == (client.id, "Test Company")
+    assert cache.get_client(db, "invalid-key") is None
+
+    statements, stop = count_queries(db)
+    try:
+        assert cache.get_client(db, client.api_key) == record
+        assert cache.get_client(db, "invalid-key") is None
+    finally:
+        stop()
+    assert statements == []
+
+def test_update_and_delete_invalidate_the_cache(db, monkeypatch):
+    cache = ClientCache(MemoryBackend(100), ttl=60, negative_ttl=60)
+    monkeypatch.setattr(auth_cache, "client_cache", cache)
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    api_key = client.api_key
+    cache.get_client(db, api_key)
+
+    update_client(db, client.id, ClientUpdate(is_active=False))
+    assert cache.get_client(db, api_key) is None
+
+    update_client(db, client.id, ClientUpdate(is_active=True, name="Renamed"))
+    assert cache.get_client(db, api_key).name == "Renamed"
+
+    delete_client(db, client.id)
+    assert cache.get_client(db, api_key) is None
+
+def test_memory_backend_drops_oldest_entries_when_full():
+    backend = MemoryBackend(2)
+    for key in ("a", "b", "c"):
+        backend.set(key, key, ttl=60)
+    assert backend.get("a") == (False, None)
+    assert backend.get("c") == (True, "c")
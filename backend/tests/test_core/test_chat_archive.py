@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.core import chat_archive
+from app.core.chat_archive import archive_boundary, archive_old_messages
+from app.core.export import ExportFormat, iter_export
+from app.database.models import AnalyticsRollupState, Base, ChatMessage, ChatSession, Client
+from app.database.session import async_database_url
+
+NOW = datetime(2024, 6, 15)
+
+def test_old_months_move_to_the_archive_and_stay_exportable(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_ARCHIVE_DIR", str(tmp_path / "archive"))
+    url = f"sqlite:///{tmp_path / 'chat.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add(Client(id="c1", name="Test", website_url="https://test.com"))
+    for month in [1, 2, 3, 5]:
+        db.add(ChatSession(id=f"s{month}", client_id="c1", start_time=datetime(2024, month, 10)))
+        db.add_all([
+            ChatMessage(client_id="c1", session_id=f"s{month}", user_message=f"{month}-{i}", bot_response="ok",
+                        created_at=datetime(2024, month, 10, i))
+            for i in range(3)
+        ])
+    # Compaction has only reached March, which holds back March's archival
+    db.add(AnalyticsRollupState(name="chat", rolled_up_until=datetime(2024, 3, 20)))
+    db.commit()
+
+    result = archive_old_messages(db, now=NOW, retention_days=60)
+
+    assert result["months"] == ["2024-01", "2024-02"]
+    assert (result["messages"], result["sessions"]) == (6, 2)
+    remaining = sorted(message.user_message for message in db.query(ChatMessage))
+    assert remaining == ["3-0", "3-1", "3-2", "5-0", "5-1", "5-2"]
+    assert {session.id for session in db.query(ChatSession)} == {"s3", "s5"}
+    assert archive_boundary() == datetime(2024, 3, 1)
+    assert os.path.exists(tmp_path / "archive" / "chat_messages" / "2024-01" / "c1.ndjson.gz")
+    db.close()
+
+    async def export():
+        async_engine = create_async_engine(async_database_url(url))
+        chunks = [chunk async for chunk in iter_export(
+            "c1", datetime(2024, 2, 1), NOW, ExportFormat.NDJSON, engine=async_engine
+        )]
+        await async_engine.dispose()
+        return b"".join(chunks)
+
+    rows = [json.loads(line) for line in asyncio.run(export()).decode("utf-8").splitlines()]
+    assert [row["user_message"] for row in rows] == ["2-0", "2-1", "2-2", "3-0", "3-1", "3-2", "5-0", "5-1", "5-2"]
+    assert rows[0]["session_id"] == "s2"
+
+def test_a_rerun_after_an_interrupted_delete_keeps_the_archived_month(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(chat_archive, "DELETE_BATCH_SIZE", 1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Client(id="c1", name="Test", website_url="https://test.com"))
+    db.add(ChatSession(id="s1", client_id="c1", start_time=datetime(2024, 1, 10)))
+    db.add_all([
+        ChatMessage(client_id="c1", session_id="s1", user_message=f"1-{i}", bot_response="ok",
+                    created_at=datetime(2024, 1, 10, i))
+        for i in range(3)
+    ])
+    db.add(AnalyticsRollupState(name="chat", rolled_up_until=datetime(2024, 5, 1)))
+    db.commit()
+
+    # The process dies after the first batch of the month's delete
+    commit = db.commit
+    commits = []
+    def crashing_commit():
+        commits.append(1)
+        if len(commits) == 2:
+            raise RuntimeError("crash")
+        commit()
+    monkeypatch.setattr(db, "commit", crashing_commit)
+    with pytest.raises(RuntimeError):
+        archive_old_messages(db, now=NOW, retention_days=130)
+    monkeypatch.setattr(db, "commit", commit)
+    db.rollback()
+    assert db.query(ChatMessage).count() == 2
+
+    result = archive_old_messages(db, now=NOW, retention_days=130)
+
+    assert result["months"] == ["2024-01"] and db.query(ChatMessage).count() == 0
+    with gzip.open(tmp_path / "archive" / "chat_messages" / "2024-01" / "c1.ndjson.gz", "rt") as f:
+        assert [json.loads(line)["user_message"] for line in f] == ["1-0", "1-1", "1-2"]
+    db.close()
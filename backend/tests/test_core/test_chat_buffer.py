@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.chat_buffer import ChatWriteBuffer
+from app.database.models import Base, ChatMessage, ChatSession, Client
+from app.database.session import async_database_url
+
+def make_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'chat.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    return create_async_engine(async_database_url(url))
+
+async def count(engine, model):
+    async with engine.connect() as connection:
+        return await connection.scalar(select(func.count()).select_from(model))
+
+async def wait_for_count(engine, model, expected):
+    # Polls what is committed: pending drops as soon as a batch is taken, before it is written
+    for _ in range(200):
+        if await count(engine, model) == expected:
+            return
+        await asyncio.sleep(0.01)
+
+def test_turns_are_written_in_batches_behind_the_response(tmp_path):
+    engine = make_engine(tmp_path)
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.execute(Client.__table__.insert(), {
+                "id": "c1", "name": "Test", "website_url": "https://test.com", "api_key": "k1"
+            })
+        buffer = ChatWriteBuffer(engine, flush_interval=0.01, max_rows=100)
+
+        session_id = await buffer.add_session("c1", "visitor")
+        for text in ["hi", "thanks"]:
+            await buffer.add_message("c1", session_id, text, "ok")
+        # Returned before anything is committed, and visible to this process meanwhile
+        assert await count(engine, ChatMessage) == 0
+        assert buffer.pending_session(session_id)["client_id"] == "c1"
+
+        await wait_for_count(engine, ChatMessage, 2)
+        assert (await count(engine, ChatSession), await count(engine, ChatMessage)) == (1, 2)
+        # Waits for the background flush to finish releasing the batch
+        await buffer.flush()
+        assert buffer.pending == 0 and buffer.pending_session(session_id) is None
+
+        # Rows left at shutdown are written by close
+        buffer.flush_interval = 60
+        await buffer.add_message("c1", session_id, "bye", "ok")
+        await buffer.close()
+        assert await count(engine, ChatMessage) == 3
+        await engine.dispose()
+
+    asyncio.run(run())
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    engine = make_engine(tmp_path)
+
+    async def run():
+        buffer = ChatWriteBuffer(engine, flush_interval=60, max_rows=3)
+        session_id = await buffer.add_session("c1")
+        await buffer.add_message("c1", session_id, "one", "ok")
+        await buffer.add_message("c1", session_id, "two", "ok")
+        await wait_for_count(engine, ChatMessage, 2)
+        assert await count(engine, ChatMessage) == 2
+        await buffer.close()
+        await engine.dispose()
+
+    asyncio.run(run())
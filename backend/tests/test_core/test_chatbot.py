@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from app.core import chatbot
+from app.core.chatbot import ChatbotEngine
+
+class FakeVectorStore:
+    index_name = "chatbot-knowledge"
+    embeddings = None
+
+class FakeIndex:
+    connections = 0
+
+    @classmethod
+    def from_existing_index(cls, index_name, embedding, namespace):
+        cls.connections += 1
+        return cls()
+
+    def as_retriever(self, search_kwargs):
+        return object()
+
+def test_retrievers_are_reused_and_created_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(chatbot, "PineconeVectorStore", FakeIndex)
+    engine = ChatbotEngine(FakeVectorStore())
+    assert engine.get_retriever(None, "c1") is engine.get_retriever("chatbot-knowledge", "c1")
+    assert FakeIndex.connections == 1
+
+    threads = []
+
+    def as_retriever(self, search_kwargs):
+        threads.append(threading.current_thread())
+        return object()
+
+    class FakeChain:
+        async def ainvoke(self, inputs):
+            return {"answer": f"re: {inputs['question']}"}
+
+    def get_retrieval_chain(client_id, client_info, session_id, index_name, namespace):
+        engine.get_retriever(index_name, namespace or client_id)
+        return FakeChain()
+
+    monkeypatch.setattr(FakeIndex, "as_retriever", as_retriever)
+    monkeypatch.setattr(engine, "get_retrieval_chain", get_retrieval_chain)
+    for _ in range(2):
+        assert asyncio.run(engine.aget_response("hi", "c2", {"name": "Test"}, "s1")) == "re: hi"
+
+    # Created once, in a worker thread; the second request finds it cached
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
@@ -0,0 +1,64 @@
+import pytest
+import tiktoken
+
+from app.core import chunker
+from app.core.chunker import TokenChunker
+
+def test_chunks_end_on_sentence_boundaries_with_overlap():
+    sentences = [f"Sentence number {i} talks about shipping." for i in range(20)]
+    text = " ".join(sentences)
+    # Room for about three sentences per chunk and one of overlap
+    sentence_tokens = TokenChunker().count_tokens(" " + sentences[10])
+    chunker = TokenChunker(chunk_size=sentence_tokens * 3 + 1, chunk_overlap=sentence_tokens + 1)
+
+    chunks = chunker.split_text(text)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunker.count_tokens(chunk) <= chunker.chunk_size
+        assert chunk.endswith(".")
+    # Consecutive chunks share their boundary sentence
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split(". ")[0] + "." in previous
+    # Nothing is dropped
+    assert all(sentence in text for chunk in chunks for sentence in chunk.split(". "))
+    assert chunks[-1].endswith(sentences[-1])
+
+def test_paragraph_breaks_are_boundaries():
+    chunker = TokenChunker(chunk_size=200, chunk_overlap=0)
+    text = "First paragraph without punctuation\n\nSecond paragraph"
+
+    assert chunker.split_text(text) == [text]
+    first_tokens = chunker.count_tokens("First paragraph without punctuation\n")
+    assert TokenChunker(chunk_size=first_tokens + 1, chunk_overlap=0).split_text(text) == [
+        "First paragraph without punctuation",
+        "Second paragraph"
+    ]
+
+def test_long_segments_are_cut_at_token_boundaries():
+    chunker = TokenChunker(chunk_size=16, chunk_overlap=0)
+    text = " ".join(["naïve café déjà vu"] * 40)
+
+    chunks = chunker.split_text(text)
+
+    assert len(chunks) > 1
+    assert all(chunker.count_tokens(chunk) <= 16 for chunk in chunks)
+    # Chunks are slices of the original text, so no characters are mangled
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "")
+
+def test_empty_text_and_invalid_sizes():
+    assert TokenChunker().split_text("") == []
+    assert TokenChunker().split_text("   \n\n  ") == []
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_size=10, chunk_overlap=10)
+
+def test_falls_back_to_counting_bytes_when_the_encoding_cannot_be_loaded(monkeypatch):
+    def offline(name):
+        raise ConnectionError("no network")
+    monkeypatch.setattr(tiktoken, "get_encoding", offline)
+    monkeypatch.setattr(chunker, "_ENCODINGS", {})
+
+    chunks = TokenChunker(chunk_size=20, chunk_overlap=0, encoding_name="cl100k_base").split_text("One. Two. Three. " * 5)
+
+    assert all(len(chunk.encode("utf-8")) <= 20 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == ("One. Two. Three. " * 5).replace(" ", "")
@@ -0,0 +1,129 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.core.crawler import WebCrawler, HostRateLimiter, parse_retry_after
+from app.core.http_cache import ResponseCache, RECORD, REPLAY
+
+BODY = "Plenty of text about our products and services. " * 5
+
+PAGES = {
+    "/": '<a href="/a">A</a><a href="/b">B</a><a href="/private/x">X</a>',
+    "/a": '<a href="/c">C</a><a href="/">Home</a>',
+    "/b": '<a href="/a">A</a>',
+    "/c": "",
+    "/private/x": "",
+    "/dead": '<a href="/gone/1">1</a><a href="/gone/2">2</a><a href="/gone/3">3</a>',
+}
+
+class SiteHandler(BaseHTTPRequestHandler):
+    throttled = set()
+    requested = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        if self.path == "/robots.txt":
+            body = "User-agent: *\nDisallow: /private/\n"
+        elif self.path == "/b" and self.path not in self.throttled:
+            # Throttle the first request to /b
+            self.throttled.add(self.path)
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        elif self.path in PAGES:
+            body = f"<html><head><title>{self.path}</title></head><body><p>{BODY}</p>{PAGES[self.path]}</body></html>"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site():
+    SiteHandler.throttled = set()
+    SiteHandler.requested = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_crawl_follows_links_and_respects_robots(site):
+    crawler = WebCrawler(site + "/", max_pages=10, concurrency=2)
+    pages = crawler.crawl()
+
+    urls = {page["url"] for page in pages}
+    assert urls == {site + "/", site + "/a", site + "/b", site + "/c"}
+    # /b was throttled once and retried
+    assert crawler.retries == {site + "/b": 1}
+    assert crawler.fetch_rate > 0
+
+def test_crawl_resumes_from_snapshot(site):
+    crawler = WebCrawler(site + "/", max_pages=10, concurrency=1)
+    pages = crawler.iter_pages()
+    first = next(pages)
+    state = crawler.snapshot()
+    pages.close()
+
+    resumed = WebCrawler(site + "/", max_pages=10, state=state)
+    urls = {page["url"] for page in resumed.crawl()}
+
+    assert first["url"] == site + "/"
+    assert site + "/" not in urls
+    assert urls == {site + "/a", site + "/b", site + "/c"}
+
+def test_max_pages_counts_failed_fetches(site):
+    crawler = WebCrawler(site + "/dead", max_pages=2, concurrency=1)
+    pages = crawler.crawl()
+
+    # The 404 uses up the budget just like a page that was indexed
+    assert [page["url"] for page in pages] == [site + "/dead"]
+    assert crawler.attempted == 2
+    assert [path for path in SiteHandler.requested if path != "/robots.txt"] == ["/dead", "/gone/1"]
+
+def test_replay_cache_crawls_offline(site, tmp_path):
+    recorded = WebCrawler(site + "/", max_pages=10, cache=ResponseCache(str(tmp_path), RECORD)).crawl()
+
+    # Replay never touches the network, so an unreachable host still works
+    replay_cache = ResponseCache(str(tmp_path), REPLAY)
+    crawler = WebCrawler(site + "/", max_pages=10, cache=replay_cache)
+    crawler.session.get = None
+    replayed = crawler.crawl()
+
+    assert {page["url"]: page["content"] for page in replayed} == \
+        {page["url"]: page["content"] for page in recorded}
+    assert replay_cache.hits > 0
+
+def test_rate_limiter_adapts_to_responses():
+    limiter = HostRateLimiter(rate=4.0, min_rate=0.5, max_rate=8.0, target_latency=1.0)
+
+    limiter.record(200, latency=0.1)
+    assert limiter.rate == 4.25
+
+    limiter.record(200, latency=2.0)
+    assert limiter.rate == pytest.approx(4.25 * 0.75)
+
+    limiter.record(429, latency=0.1, retry_after=30)
+    assert limiter.rate == pytest.approx(4.25 * 0.75 / 2)
+    assert limiter.tokens == 0.0
+
+def test_rate_limiter_honours_crawl_delay():
+    limiter = HostRateLimiter(rate=4.0, min_rate=0.5, max_rate=8.0)
+    limiter.set_crawl_delay(5)
+
+    assert limiter.max_rate == 0.2
+    assert limiter.rate == 0.2
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
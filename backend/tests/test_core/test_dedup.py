@@ -0,0 +1,37 @@
+from app.core.dedup import SimHashIndex, simhash, hamming_distance
+
+ARTICLE = (
+    "Our return policy allows you to send back any product within thirty days of delivery. "
+    "Items must be unused and in their original packaging. Refunds are issued to the original "
+    "payment method within seven business days after we receive the item. Shipping costs for "
+    "returns are covered by the customer unless the product arrived damaged or defective. "
+)
+
+def test_near_duplicates_have_close_fingerprints():
+    original = simhash(ARTICLE * 3)
+    print_view = simhash(ARTICLE * 3 + "Print this page")
+    unrelated = simhash(
+        "We deliver to the downtown metro area in fifteen to thirty minutes and to outlying "
+        "regions within an hour. Delivery hours are ten in the morning to ten at night. " * 3
+    )
+
+    assert hamming_distance(original, print_view) <= 3
+    assert hamming_distance(original, unrelated) > 3
+
+def test_index_finds_near_duplicates():
+    index = SimHashIndex(max_distance=3)
+
+    assert index.check_and_add(simhash(ARTICLE * 3), "https://test.com/returns") is None
+    assert index.check_and_add(
+        simhash(ARTICLE * 3 + "Print this page"), "https://test.com/returns?print=1"
+    ) == "https://test.com/returns"
+    assert index.check_and_add(simhash("Completely different content " * 20), "https://test.com/other") is None
+    assert index.size == 2
+
+def test_index_ignores_the_page_itself():
+    index = SimHashIndex()
+    fingerprint = simhash(ARTICLE)
+    index.add(fingerprint, "https://test.com/returns")
+
+    # A page re-fetched after a resume is not a duplicate of itself
+    assert index.check_and_add(fingerprint, "https://test.com/returns") is None
@@ -3,7 +3,7 @@ from app.core.document_processor import DocumentProcessor
 
 def test_process_document():
     # Create processor
-    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
+    processor = DocumentProcessor(chunk_size=20, chunk_overlap=6)
     
     # Test document
     document = {
@@ -23,9 +23,27 @@ def test_process_document():
     assert chunks[0]["title"] == "Test Document"
     assert chunks[0]["client_id"] == "client-123"
     assert "content" in chunks[0]
-    assert len(chunks[0]["content"]) <= 100 + 20  # chunk_size + overlap
+    # Chunks are bounded in tokens, not characters
+    assert all(processor.text_splitter.count_tokens(chunk["content"]) <= 20 for chunk in chunks)
     
     # Check metadata
     assert chunks[0]["metadata"]["document_id"] == "test-123"
     assert chunks[0]["metadata"]["client_id"] == "client-123"
     assert chunks[0]["metadata"]["title"] == "Test Document"
+
+def test_iter_document_chunks_matches_process_document():
+    processor = DocumentProcessor(chunk_size=20, chunk_overlap=6)
+    document = {
+        "id": "test-123",
+        "title": "Test Document",
+        "content": "This is a test document. " * 15,
+        "url": "https://test.com/doc"
+    }
+
+    chunks = list(processor.iter_document_chunks(document, client_id="client-123"))
+
+    # Streaming chunks share one source instead of copying its metadata
+    assert len({id(chunk.source) for chunk in chunks}) == 1
+    assert chunks[1].chunk_id == "test-123_1"
+    assert chunks[1].metadata["chunk"] == 1
+    assert [chunk.to_dict() for chunk in chunks] == processor.process_document(document, client_id="client-123")
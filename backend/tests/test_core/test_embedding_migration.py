@@ -0,0 +1,68 @@
+import pytest
+from app.config import settings
+from app.core import tasks
+from app.core.document_processor import DocumentProcessor
+from app.core.embedding_migration import backfill, start_migration, switch_reads
+from app.core.vector_routing import VectorTarget, read_target
+from app.database.models import Client, Document
+
+class FakeVectorStore:
+    def __init__(self, index_name, embedding_model):
+        self.index_name = index_name
+        self.embedding_model = embedding_model
+        self.namespaces = {}
+
+    def embed_texts(self, texts):
+        return [[self.embedding_model] for _ in texts]
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas=None, namespace=None):
+        self.namespaces.setdefault(namespace, {}).update(zip(ids, (values[0] for values in embeddings)))
+
+    def delete_chunks(self, id_prefix, namespace, keep=0):
+        return 0
+
+@pytest.fixture
+def stores(monkeypatch):
+    old = FakeVectorStore(settings.PINECONE_INDEX_NAME, "old-model")
+    new = FakeVectorStore("new-index", "new-model")
+    monkeypatch.setitem(tasks._services, "vector_store", old)
+    monkeypatch.setitem(tasks._services, "vector_store:new-index", new)
+    monkeypatch.setitem(tasks._services, "document_processor", DocumentProcessor(chunk_size=64, chunk_overlap=0))
+    return old, new
+
+def add_document(db, client, content):
+    document = Document(client_id=client.id, title="Doc", content=content)
+    db.add(document)
+    db.commit()
+    tasks.run_process_document(db, {"document_id": document.id, "client_id": client.id})
+    return f"{document.id}_0"
+
+def test_migration_dual_writes_backfills_and_switches_reads(db, stores):
+    old, new = stores
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    before = add_document(db, client, "Shipping takes three days.")
+
+    target = VectorTarget("new-index", f"{client.id}--v2")
+    assert start_migration(db, client.id, target) == []
+    # Written to both namespaces, each with its own index's model
+    during = add_document(db, client, "Returns are accepted within 30 days.")
+    assert old.namespaces[client.id] == {before: "old-model", during: "old-model"}
+    assert new.namespaces[target.namespace] == {during: "new-model"}
+
+    count = backfill(db, client.id, new, target.namespace, tasks.get_document_processor(), workers=2)
+    assert count == 2
+    assert new.namespaces[target.namespace] == {before: "new-model", during: "new-model"}
+
+    # Chat keeps reading the old namespace until the switch
+    db.refresh(client)
+    assert read_target(client) == VectorTarget(settings.PINECONE_INDEX_NAME, client.id)
+    assert switch_reads(db, client.id) == VectorTarget(settings.PINECONE_INDEX_NAME, client.id)
+    db.refresh(client)
+    assert read_target(client) == target
+    assert client.vector_migration_namespace is None
+
+    after = add_document(db, client, "Support is open on weekdays.")
+    assert after in new.namespaces[target.namespace]
+    assert after not in old.namespaces[client.id]
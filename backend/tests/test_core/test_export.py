@@ -0,0 +1,56 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.export import ExportFormat, iter_export
+from app.database.models import Base, ChatMessage, ChatSession, Client
+from app.database.session import async_database_url
+
+def make_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'export.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    with sync_engine.begin() as connection:
+        for client_id in ["c1", "c2"]:
+            connection.execute(Client.__table__.insert(), {
+                "id": client_id, "name": client_id, "website_url": "https://test.com", "api_key": client_id
+            })
+            connection.execute(ChatSession.__table__.insert(), {
+                "id": f"{client_id}-s", "client_id": client_id, "user_id": "visitor",
+                "start_time": datetime(2024, 3, 1)
+            })
+        connection.execute(ChatMessage.__table__.insert(), [
+            {"id": f"{client_id}-{day}", "client_id": client_id, "session_id": f"{client_id}-s",
+             "user_message": f'Question, "{day}"', "bot_response": "Answer", "created_at": datetime(2024, 3, day)}
+            for client_id in ["c1", "c2"] for day in range(1, 8)
+        ])
+    return create_async_engine(async_database_url(url))
+
+def export(engine, format, compress=False):
+    async def run():
+        chunks = [chunk async for chunk in iter_export(
+            "c1", datetime(2024, 3, 2), datetime(2024, 3, 7), format, compress, engine=engine, batch_size=2
+        )]
+        await engine.dispose()
+        return b"".join(chunks)
+
+    return asyncio.run(run())
+
+def test_export_ndjson_streams_the_clients_messages_in_range(tmp_path):
+    data = export(make_engine(tmp_path), ExportFormat.NDJSON)
+    rows = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    assert [row["message_id"] for row in rows] == [f"c1-{day}" for day in range(2, 7)]
+    assert rows[0]["user_id"] == "visitor"
+    assert rows[0]["created_at"] == "2024-03-02T00:00:00"
+
+def test_export_gzipped_csv(tmp_path):
+    data = gzip.decompress(export(make_engine(tmp_path), ExportFormat.CSV, compress=True))
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+    assert len(rows) == 5
+    assert rows[0]["user_message"] == 'Question, "2"'
@@ -0,0 +1,68 @@
+import pytest
+from app.core.file_extractors import iter_file_sections, UnsupportedFileType
+
+def make_pdf(pages):
+    # Minimal uncompressed PDF with one line of text per page
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+def test_markdown_is_split_by_heading(tmp_path):
+    path = tmp_path / "guide.md"
+    path.write_text("# Shipping\nTakes three days.\n\n## Returns\nWithin 30 days.\n")
+
+    sections = list(iter_file_sections(str(path), "guide.md"))
+
+    assert sections == ["# Shipping\nTakes three days.\n\n", "## Returns\nWithin 30 days.\n"]
+
+def test_html_drops_scripts(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html><script>var x = 1;</script><body><h1>Hours</h1><p>Open 9 to 5.</p></body></html>")
+
+    assert list(iter_file_sections(str(path), "page.html")) == ["Hours\nOpen 9 to 5."]
+
+def test_pdf_is_read_page_by_page(tmp_path):
+    pytest.importorskip("pypdf")
+    path = tmp_path / "manual.pdf"
+    path.write_bytes(make_pdf(["First page text", "Second page text"]))
+
+    sections = list(iter_file_sections(str(path), "manual.pdf"))
+
+    assert [section.strip() for section in sections] == ["First page text", "Second page text"]
+
+def test_docx_is_split_by_heading(tmp_path):
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    document.add_heading("Shipping", level=1)
+    document.add_paragraph("Takes three days.")
+    document.add_heading("Returns", level=1)
+    document.add_paragraph("Within 30 days.")
+    path = tmp_path / "policy.docx"
+    document.save(str(path))
+
+    sections = list(iter_file_sections(str(path), "policy.docx"))
+
+    assert sections == ["Shipping\n\nTakes three days.", "Returns\n\nWithin 30 days."]
+
+def test_unsupported_extension(tmp_path):
+    with pytest.raises(UnsupportedFileType):
+        iter_file_sections(str(tmp_path / "sheet.xlsx"), "sheet.xlsx")
@@ -0,0 +1,74 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.analytics import Bucket, truncate_expression
+from app.database.crud import DOCUMENT_SUMMARY_COLUMNS
+from app.database.models import Base, ChatMessage, ChatSession, Client, Document
+from app.database.pagination import keyset
+
+SINCE = datetime(2024, 3, 1)
+# A page deep into a listing
+CURSOR = (SINCE, "id")
+
+def hot_queries(db):
+    """The per-request and dashboard queries, by the index each should use."""
+    dialect = db.get_bind().dialect.name
+    day = truncate_expression(ChatMessage.created_at, Bucket.DAY, dialect)
+    return {
+        # Authentication, on every request (the unique constraint's index)
+        "api_key": db.query(Client).filter(Client.api_key == "key", Client.is_active == True),
+        "ix_chat_sessions_client_id_start_time": db.query(func.count()).filter(
+            ChatSession.client_id == "client", ChatSession.start_time >= SINCE
+        ),
+        "ix_chat_messages_client_id_created_at": db.query(day, func.count()).filter(
+            ChatMessage.client_id == "client", ChatMessage.created_at >= SINCE
+        ).group_by(day),
+        "ix_chat_messages_created_at": db.query(ChatMessage.client_id, day, func.count()).filter(
+            ChatMessage.created_at >= SINCE, ChatMessage.created_at < datetime(2024, 3, 8)
+        ).group_by(ChatMessage.client_id, day),
+        "ix_chat_messages_session_id_created_at_id": keyset(
+            db.query(ChatMessage).filter(ChatMessage.session_id == "session"),
+            ChatMessage.created_at, ChatMessage.id, CURSOR, 100
+        ),
+        "ix_documents_client_id_created_at": keyset(
+            db.query(*DOCUMENT_SUMMARY_COLUMNS).filter(Document.client_id == "client"),
+            Document.created_at, Document.id, CURSOR, 100
+        ),
+        "ix_clients_created_at_id": keyset(db.query(Client), Client.created_at, Client.id, CURSOR, 100),
+    }
+
+def compile_sql(db, query):
+    return str(query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+
+def test_hot_queries_use_indexes_on_sqlite(db):
+    for index, query in hot_queries(db).items():
+        plan = [row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + compile_sql(db, query)))]
+        # Every table access is an index search, and no result needs sorting
+        assert not any(step.startswith("SCAN") for step in plan), plan
+        assert not any("TEMP B-TREE FOR ORDER BY" in step for step in plan), plan
+        if index.startswith("ix_"):
+            assert any(index in step for step in plan), (index, plan)
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_hot_queries_use_indexes_on_postgres():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        # The tables are empty, so make a sequential scan look as expensive as it is on a large table
+        db.execute(text("SET enable_seqscan = off"))
+        for index, query in hot_queries(db).items():
+            plan = "\n".join(row[0] for row in db.execute(text("EXPLAIN " + compile_sql(db, query))))
+            assert "Seq Scan" not in plan, plan
+            assert "Index" in plan, plan
+            if index.startswith("ix_"):
+                assert index in plan, (index, plan)
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,187 @@
+import threading
+
+import pytest
+from app.core.dedup import SimHashIndex
+from app.core.document_processor import Chunk, ChunkSource
+from app.core.ingestion import IngestionPipeline
+
+class FakeCrawler:
+    def __init__(self, pages):
+        self.pages = pages
+        self.visited = []
+
+    def iter_pages(self):
+        for page in self.pages:
+            self.visited.append(page["url"])
+            yield page
+
+    def snapshot(self):
+        remaining = [page["url"] for page in self.pages[len(self.visited):]]
+        return {"frontier": remaining, "visited": list(self.visited), "emitted": len(self.visited)}
+
+class FakeProcessor:
+    def iter_crawled_chunks(self, page):
+        source = ChunkSource(page["url"], page["title"], {"source": page["url"]}, url=page["url"])
+        for i in range(3):
+            yield Chunk(f"{page['content']} part {i}", i, source)
+
+class FakeVectorStore:
+    def __init__(self, fail=False, fail_after=None, fail_upsert=False):
+        self.fail = fail
+        self.fail_after = fail_after
+        self.fail_upsert = fail_upsert
+        self.upserted = []
+
+    def embed_texts(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding service unavailable")
+        if self.fail_after is not None and len(self.upserted) >= self.fail_after:
+            raise RuntimeError("embedding service unavailable")
+        return [[float(len(text))] for text in texts]
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas=None, client_id=None):
+        if self.fail_upsert:
+            raise RuntimeError("index unavailable")
+        self.upserted.extend(ids)
+
+def make_pages(count):
+    return [
+        {"url": f"https://test.com/{i}", "title": f"Page {i}", "content": "Some text"}
+        for i in range(count)
+    ]
+
+def test_pipeline_streams_every_chunk():
+    vector_store = FakeVectorStore()
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(make_pages(10)),
+        document_processor=FakeProcessor(),
+        vector_store=vector_store,
+        client_id="client-123",
+        queue_size=2,
+        batch_size=4
+    )
+
+    stats = pipeline.run()
+
+    assert len(vector_store.upserted) == 30
+    assert stats["stages"]["crawl"]["items_out"] == 10
+    assert stats["stages"]["chunk"]["items_out"] == 30
+    assert stats["stages"]["embed"]["items_out"] == 30
+    assert stats["stages"]["upsert"]["items_out"] == 30
+
+def test_pages_are_reported_indexed_once_all_their_vectors_are_upserted():
+    vector_store = FakeVectorStore()
+    reported = []
+
+    stored = []
+    threads = set()
+
+    def page_sink(page, chunk_count):
+        threads.add(threading.current_thread())
+        stored.append(page["url"])
+
+    def indexed_sink(urls):
+        threads.add(threading.current_thread())
+        for url in urls:
+            assert all(f"{url}_{i}" in vector_store.upserted for i in range(3))
+            # Each page is stored before it is reported indexed
+            assert url in stored
+        reported.extend(urls)
+
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(make_pages(5)),
+        document_processor=FakeProcessor(),
+        vector_store=vector_store,
+        client_id="client-123",
+        batch_size=2,
+        page_sink=page_sink,
+        indexed_sink=indexed_sink
+    )
+
+    pipeline.run()
+
+    assert sorted(reported) == [page["url"] for page in make_pages(5)]
+    # Both sinks write from the calling thread, so they can share its session
+    assert threads == {threading.current_thread()}
+
+def test_pipeline_raises_stage_errors():
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(make_pages(50)),
+        document_processor=FakeProcessor(),
+        vector_store=FakeVectorStore(fail=True),
+        client_id="client-123",
+        queue_size=2,
+        batch_size=4
+    )
+
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+
+def test_failed_pipeline_checkpoints_unindexed_pages():
+    pages = make_pages(20)
+    vector_store = FakeVectorStore(fail_after=12)
+    checkpoints = []
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(pages),
+        document_processor=FakeProcessor(),
+        vector_store=vector_store,
+        client_id="client-123",
+        queue_size=2,
+        batch_size=3,
+        checkpoint_every=2
+    )
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(progress_interval=0.05, on_checkpoint=checkpoints.append)
+
+    final = checkpoints[-1]
+    indexed = {chunk_id.rsplit("_", 1)[0] for chunk_id in vector_store.upserted}
+    fully_indexed = {url for url in indexed if all(
+        f"{url}_{i}" in vector_store.upserted for i in range(3)
+    )}
+
+    # Every page is either fully indexed or still waiting in the frontier
+    assert set(final["visited"]) <= fully_indexed
+    assert {page["url"] for page in pages} == set(final["visited"]) | set(final["frontier"])
+    assert final["emitted"] == len(final["visited"])
+
+def test_embedded_pages_stay_unvisited_until_upserted():
+    checkpoints = []
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(make_pages(5)),
+        document_processor=FakeProcessor(),
+        vector_store=FakeVectorStore(fail_upsert=True),
+        client_id="client-123",
+        queue_size=2,
+        batch_size=3
+    )
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(on_checkpoint=checkpoints.append)
+
+    # Pages were embedded, but none of their vectors were written
+    assert pipeline.stats["embed"].items_out > 0
+    assert checkpoints[-1]["visited"] == []
+
+def test_pipeline_skips_near_duplicate_pages():
+    pages = make_pages(3)
+    pages[0]["content"] = " ".join(f"Return policy clause {i} covers item category {i * 7}." for i in range(40))
+    pages[1]["content"] = pages[0]["content"] + " Print view."
+    pages[2]["content"] = " ".join(f"Delivery zone {i} is served within {i * 3} minutes." for i in range(40))
+    vector_store = FakeVectorStore()
+    stored = []
+    pipeline = IngestionPipeline(
+        crawler=FakeCrawler(pages),
+        document_processor=FakeProcessor(),
+        vector_store=vector_store,
+        client_id="client-123",
+        page_sink=lambda page, chunk_count: stored.append((page["url"], page["duplicate_of"], chunk_count)),
+        dedup_index=SimHashIndex()
+    )
+
+    stats = pipeline.run()
+
+    assert stored[1] == ("https://test.com/1", "https://test.com/0", 0)
+    assert len(vector_store.upserted) == 6
+    assert stats["duplicates"] == 1
+    assert stats["duplicate_ratio"] == pytest.approx(1 / 3, abs=1e-4)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from app.core.job_queue import (
+    enqueue, claim_job, complete_job, fail_job, renew_lease,
+    PENDING, RUNNING, COMPLETED, FAILED
+)
+from app.database.models import BackgroundJob
+
+def test_claim_and_complete_job(db):
+    job = enqueue(db, "process_document", {"document_id": "doc-1"})
+
+    claimed = claim_job(db, "worker-1")
+    assert claimed.id == job.id
+    assert claimed.status == RUNNING
+    assert claimed.locked_by == "worker-1"
+    assert claimed.attempts == 1
+
+    # A leased job is not handed to a second worker
+    assert claim_job(db, "worker-2") is None
+
+    complete_job(db, claimed)
+    assert db.query(BackgroundJob).filter(BackgroundJob.id == job.id).first().status == COMPLETED
+
+def test_expired_lease_is_reclaimed(db):
+    enqueue(db, "crawl", {"crawler_job_id": "job-1"})
+    claimed = claim_job(db, "worker-1")
+
+    claimed.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    reclaimed = claim_job(db, "worker-2")
+    assert reclaimed.id == claimed.id
+    assert reclaimed.locked_by == "worker-2"
+    assert reclaimed.attempts == 2
+    assert not renew_lease(db, claimed.id, "worker-1")
+
+def test_job_that_keeps_killing_its_worker_fails(db):
+    job = enqueue(db, "crawl", {}, max_attempts=2)
+    for worker_id in ("worker-1", "worker-2"):
+        claimed = claim_job(db, worker_id)
+        assert claimed.id == job.id
+        # The worker dies without failing or completing the job
+        claimed.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+    assert claim_job(db, "worker-3") is None
+    db.refresh(job)
+    assert (job.status, job.attempts, job.locked_by) == (FAILED, 2, None)
+
+def test_failed_job_retries_with_backoff_then_gives_up(db):
+    job = enqueue(db, "crawl", {}, max_attempts=2)
+
+    claimed = claim_job(db, "worker-1")
+    fail_job(db, claimed, "boom")
+    assert claimed.status == PENDING
+    assert claimed.run_at > datetime.utcnow()
+
+    # Not runnable again until the backoff has passed
+    assert claim_job(db, "worker-1") is None
+    claimed.run_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    claimed = claim_job(db, "worker-1")
+    fail_job(db, claimed, "boom again")
+    assert claimed.status == FAILED
+    assert claimed.last_error == "boom again"
+
+def test_claim_filters_by_kind(db):
+    enqueue(db, "crawl", {})
+
+    assert claim_job(db, "worker-1", kinds=["process_document"]) is None
+    assert claim_job(db, "worker-1", kinds=["crawl"]) is not None
+
+def test_recurring_job_is_rescheduled_once_it_finishes(db):
+    job = enqueue(db, "compact_analytics", {"interval_seconds": 3600}, max_attempts=2)
+
+    # A failed attempt that will be retried leaves the schedule alone
+    fail_job(db, claim_job(db, "worker-1"), "boom")
+    assert db.query(BackgroundJob).count() == 1
+
+    job.run_at = datetime.utcnow()
+    db.commit()
+    complete_job(db, claim_job(db, "worker-1"))
+
+    next_run = db.query(BackgroundJob).filter(BackgroundJob.status == PENDING).one()
+    assert next_run.kind == "compact_analytics"
+    assert next_run.payload == {"interval_seconds": 3600}
+    assert next_run.run_at > datetime.utcnow() + timedelta(minutes=59)
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.database.pool import InstrumentedQueuePool, engine_options, pool_stats
+
+def test_engine_options_configure_the_pool():
+    options = engine_options("postgresql://u:p@db/app")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"} <= set(options)
+    # In-memory SQLite keeps the default pool, where every connection shares the database
+    assert "poolclass" not in engine_options("sqlite:///:memory:")
+
+def test_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = pool_stats(engine)
+        assert (stats["checked_out"], stats["overflow"]) == (1, 0)
+
+    stats = pool_stats(engine)
+    assert (stats["checkouts"], stats["timeouts"], stats["peak_checked_out"]) == (1, 1, 1)
+    assert stats["wait_seconds_max"] >= 0.05
+    engine.dispose()
+    assert pool_stats(engine)["checkouts"] == 1
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+from app.core import tasks
+from app.database.models import ChatMessage, ChatSession, Client, CrawledPage, CrawlerJob, Document
+
+class FakeVectorStore:
+    def __init__(self, embedding_model="model-a"):
+        self.embedding_model = embedding_model
+        self.namespaces = {}
+
+    def embed_texts(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas=None, namespace=None):
+        self.namespaces.setdefault(namespace, {}).update(zip(ids, texts))
+
+    def delete_chunks(self, id_prefix, namespace, keep=0):
+        stale = [vector_id for vector_id in self.namespaces.get(namespace, {})
+                 if vector_id.startswith(f"{id_prefix}_") and int(vector_id.rpartition("_")[2]) >= keep]
+        for vector_id in stale:
+            del self.namespaces[namespace][vector_id]
+        return len(stale)
+
+    def delete_by_client(self, client_id):
+        self.namespaces.pop(client_id, None)
+        return True
+
+@pytest.fixture
+def vector_store(monkeypatch):
+    vector_store = FakeVectorStore()
+    monkeypatch.setitem(tasks._services, "vector_store", vector_store)
+    return vector_store
+
+def test_process_file_indexes_sections_and_stores_text(db, vector_store, tmp_path):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    document = Document(client_id=client.id, title="guide.md", content="", document_metadata={"size": 10})
+    db.add(document)
+    db.commit()
+    path = tmp_path / "upload.md"
+    path.write_text("# Shipping\nTakes three days.\n\n# Returns\nWithin 30 days.\n")
+
+    tasks.run_process_file(db, {
+        "document_id": document.id,
+        "client_id": client.id,
+        "path": str(path),
+        "file_name": "guide.md"
+    })
+
+    # Each heading section is chunked on its own and ids follow the document
+    assert list(vector_store.namespaces[client.id]) == [f"{document.id}_0", f"{document.id}_1"]
+    db.refresh(document)
+    assert document.content == "# Shipping\nTakes three days.\n\n# Returns\nWithin 30 days."
+    assert document.document_metadata == {"size": 10, "sections": 2, "chunks": 2}
+    assert document.vector_id == f"processed_{document.id}"
+    assert not path.exists()
+
+def test_delete_client_removes_its_rows_in_batches(db, vector_store, monkeypatch, tmp_path):
+    monkeypatch.setattr(tasks.settings, "CHAT_ARCHIVE_DIR", str(tmp_path))
+    clients = [Client(name=name, website_url="https://test.com") for name in ("Gone", "Kept")]
+    db.add_all(clients)
+    db.commit()
+    for client in clients:
+        session = ChatSession(client_id=client.id)
+        db.add(session)
+        db.flush()
+        db.add_all([
+            ChatMessage(client_id=client.id, session_id=session.id, user_message=str(i), bot_response="ok",
+                        created_at=datetime(2024, 1, 1, 0, i))
+            for i in range(5)
+        ])
+        db.add(Document(client_id=client.id, title="doc", content="text"))
+    db.commit()
+    gone, kept = clients[0].id, clients[1].id
+    vector_store.namespaces = {gone: {"a_0": "text"}, kept: {"b_0": "text"}}
+
+    result = tasks.run_delete_client(db, {"client_id": gone, "batch_size": 2})
+
+    assert result == {"archived_files": 0, "deleted_namespaces": [gone]}
+    db.expire_all()
+    assert db.query(Client.id).all() == [(kept,)]
+    for model in (ChatMessage, ChatSession, Document):
+        assert {row.client_id for row in db.query(model)} == {kept}
+    assert db.query(ChatMessage).count() == 5
+    assert list(vector_store.namespaces) == [kept]
+
+    # A retried job finds nothing left to delete
+    assert tasks.run_delete_client(db, {"client_id": gone})["deleted_namespaces"] == [gone]
+
+def test_crawled_pages_count_as_indexed_once_upserted(db):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    job = CrawlerJob(client_id=client.id, url="https://testcompany.com", status="running")
+    db.add(job)
+    db.commit()
+    for url in ("https://testcompany.com/a", "https://testcompany.com/b"):
+        tasks.store_crawled_page(db, job.id, client.id, {"url": url, "title": "", "content": "text"}, 2)
+
+    tasks.mark_pages_indexed(db, job.id, ["https://testcompany.com/a"])
+    tasks.refresh_crawl_counters(db, job)
+
+    statuses = dict(db.query(CrawledPage.url, CrawledPage.status))
+    assert statuses == {"https://testcompany.com/a": "indexed", "https://testcompany.com/b": "chunked"}
+    assert (job.pages_crawled, job.pages_indexed, job.chunks_indexed) == (2, 1, 2)
@@ -0,0 +1,94 @@
+import pytest
+from app.core.vector_gc import find_orphans, reconcile
+from app.database.models import Client, CrawledPage, CrawlerJob, Document
+
+class FakeVectorStore:
+    def __init__(self, namespaces, metadata=None):
+        self.namespaces = namespaces
+        self.metadata = metadata or {}
+
+    def list_namespaces(self):
+        return {name: len(ids) for name, ids in self.namespaces.items()}
+
+    def list_ids(self, namespace, prefix=None):
+        return [vector_id for vector_id in self.namespaces[namespace] if vector_id.startswith(prefix or "")]
+
+    def fetch_metadata(self, ids, namespace):
+        return {vector_id: self.metadata[vector_id] for vector_id in ids if vector_id in self.metadata}
+
+    def delete_ids(self, ids, namespace):
+        ids = list(ids)
+        self.namespaces[namespace] = [vector_id for vector_id in self.namespaces[namespace] if vector_id not in ids]
+        return len(ids)
+
+    def delete_by_client(self, client_id):
+        del self.namespaces[client_id]
+        return True
+
+def test_reconcile_deletes_orphans(db):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+    kept = Document(client_id=client.id, title="Kept", content="...", chunk_count=2)
+    unprocessed = Document(client_id=client.id, title="Reprocessing", content="...", chunk_count=None)
+    job = CrawlerJob(client_id=client.id, url="https://testcompany.com", status="completed")
+    db.add_all([kept, unprocessed, job])
+    db.commit()
+    page = CrawledPage(job_id=job.id, client_id=client.id, url="https://testcompany.com/a", status="indexed", chunk_count=1)
+    page.set_text("Page text")
+    db.add(page)
+    db.commit()
+
+    deleted_document = "0b7f2b8e-34c5-4d0e-9a53-6d2f1e0c9a11"
+    vector_store = FakeVectorStore(
+        {
+            client.id: [
+                f"{kept.id}_0", f"{kept.id}_1", f"{kept.id}_2",          # _2 left over from a longer version
+                f"{unprocessed.id}_0", f"{unprocessed.id}_7",            # count unknown: keep all
+                f"{deleted_document}_0",                                 # document was deleted
+                "https://testcompany.com/a_0", "https://testcompany.com/gone_0",
+                "random-id-1", "random-id-2",                            # ids written by from_texts
+            ],
+            "deleted-client": ["x_0", "x_1"],
+        },
+        metadata={"random-id-1": {"document_id": deleted_document}, "random-id-2": {"source": "legacy"}}
+    )
+
+    report = reconcile(db, vector_store)
+
+    assert sorted(vector_store.namespaces[client.id]) == sorted([
+        f"{kept.id}_0", f"{kept.id}_1", f"{unprocessed.id}_0", f"{unprocessed.id}_7",
+        "https://testcompany.com/a_0", "random-id-2"
+    ])
+    assert "deleted-client" not in vector_store.namespaces
+    assert report["deleted_namespaces"] == {"deleted-client": 2}
+    assert report["namespaces"] == [
+        {"namespace": client.id, "vectors": 10, "unknown": 1, "orphans": 4, "deleted": 4}
+    ]
+    assert report["reclaimed"] == 6
+
+def test_reconcile_dry_run_deletes_nothing(db):
+    vector_store = FakeVectorStore({"deleted-client": ["x_0"]})
+
+    report = reconcile(db, vector_store, dry_run=True)
+
+    assert report["reclaimed"] == 1
+    assert vector_store.namespaces == {"deleted-client": ["x_0"]}
+
+def test_document_created_while_listing_vectors_is_not_orphaned(db):
+    client = Client(name="Test Company", website_url="https://testcompany.com")
+    db.add(client)
+    db.commit()
+
+    class ListingVectorStore(FakeVectorStore):
+        def list_ids(self, namespace, prefix=None):
+            # A document is created and indexed after the ids were read from the index
+            document = Document(client_id=client.id, title="New", content="...", chunk_count=1)
+            db.add(document)
+            db.commit()
+            self.namespaces[namespace] = [f"{document.id}_0"]
+            return super().list_ids(namespace, prefix)
+
+    result = find_orphans(db, ListingVectorStore({client.id: []}), client.id)
+
+    assert (result["vectors"], result["orphans"]) == (1, [])
@@ -30,6 +30,9 @@ import { apiService } from '../services/api';
 function Documents() {
   const [documents, setDocuments] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Cursor of the next page of documents, null once the last page is loaded
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [openAddDialog, setOpenAddDialog] = useState(false);
   const [openEditDialog, setOpenEditDialog] = useState(false);
@@ -52,6 +55,7 @@ function Documents() {
       setLoading(true);
       const response = await apiService.getDocuments();
       setDocuments(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
       setError(null);
     } catch (err) {
       console.error('Error fetching documents:', err);
@@ -61,6 +65,20 @@ function Documents() {
     }
   };
 
+  const loadMoreDocuments = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await apiService.getDocuments(nextCursor);
+      setDocuments(documents.concat(response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error('Error fetching documents:', err);
+      setError('Failed to load more documents');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData({
@@ -101,7 +119,10 @@ function Documents() {
     
     try {
       const response = await apiService.createDocument(formData);
-      setDocuments([...documents, response.data]);
+      // Newest documents come last, so with more pages to load it arrives with the last one
+      if (!nextCursor) {
+        setDocuments([...documents, response.data]);
+      }
       setOpenAddDialog(false);
       setFormData({ title: '', content: '', url: '' });
     } catch (err) {
@@ -136,12 +157,26 @@ function Documents() {
     }
   };
 
-  const openEdit = (document) => {
-    setSelectedDocument(document);
+  // Listings leave out the content, so load the full document first
+  const loadDocument = async (document) => {
+    try {
+      const response = await apiService.getDocument(document.id);
+      return response.data;
+    } catch (err) {
+      console.error('Error fetching document:', err);
+      setError('Failed to load document');
+      return null;
+    }
+  };
+
+  const openEdit = async (document) => {
+    const fullDocument = await loadDocument(document);
+    if (!fullDocument) return;
+    setSelectedDocument(fullDocument);
     setFormData({
-      title: document.title,
-      content: document.content,
-      url: document.url || ''
+      title: fullDocument.title,
+      content: fullDocument.content,
+      url: fullDocument.url || ''
     });
     setOpenEditDialog(true);
   };
@@ -151,8 +186,10 @@ function Documents() {
     setOpenDeleteDialog(true);
   };
 
-  const openPreview = (document) => {
-    setSelectedDocument(document);
+  const openPreview = async (document) => {
+    const fullDocument = await loadDocument(document);
+    if (!fullDocument) return;
+    setSelectedDocument(fullDocument);
     setOpenPreviewDialog(true);
   };
 
@@ -238,6 +275,14 @@ function Documents() {
         </Table>
       </TableContainer>
 
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={loadMoreDocuments} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
+
       {/* Add Document Dialog */}
       <Dialog open={openAddDialog} onClose={() => setOpenAddDialog(false)} maxWidth="md" fullWidth>
         <DialogTitle>Add New Document</DialogTitle>
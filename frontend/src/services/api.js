@@ -52,8 +52,9 @@ export const apiService = {
   },
   
   // Document endpoints
-  async getDocuments() {
-    return api.get('/api/documents/');
+  // One page of documents, without content; the next page's cursor is in the X-Next-Cursor header
+  async getDocuments(cursor = null) {
+    return api.get('/api/documents/', { params: cursor ? { cursor } : {} });
   },
   
   async getDocument(id) {